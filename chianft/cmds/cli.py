@@ -1,20 +1,32 @@
 from __future__ import annotations
 
 import asyncio
-import pickle
 from pathlib import Path
 
 import click
-from chia_rs import SpendBundle
-from chia_rs.sized_ints import uint32
+from click.core import ParameterSource
 
 from chianft import __version__
-from chianft.util.clients import get_node_and_wallet_clients
-from chianft.util.mint import Minter
+
+# chia and the minting code take a couple of seconds to import, so each command imports what it needs when it
+# runs rather than at module level, keeping --help, --version and argument errors fast
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
 
 
+def parse_wallet_endpoints(
+    ctx: click.Context, param: click.Parameter, values: tuple[str, ...]
+) -> list[tuple[int, int | None]]:
+    endpoints: list[tuple[int, int | None]] = []
+    for value in values:
+        port, _, fingerprint = value.partition(":")
+        try:
+            endpoints.append((int(port), int(fingerprint) if fingerprint else None))
+        except ValueError:
+            raise click.BadParameter(f"{value!r} is not PORT or PORT:FINGERPRINT")
+    return endpoints
+
+
 @click.group(
     help="\n  NFT minting for Chia Blockchain \n",
     context_settings=CONTEXT_SETTINGS,
@@ -73,6 +85,32 @@ def cli(ctx: click.Context) -> None:
     default=25,
     help="The number of NFTs to mint per spend bundle. Default: 25",
 )
+@click.option(
+    "--auto-chunk",
+    required=False,
+    default=None,
+    type=float,
+    help="Pack each spend bundle with as many NFTs as fit in this fraction of the maximum block cost, e.g. 0.5. "
+    "The first bundle uses --chunk NFTs to measure the cost per NFT",
+)
+@click.option(
+    "-l",
+    "--lanes",
+    required=False,
+    default=1,
+    type=int,
+    help="The number of funding coins to create spend bundles from in parallel. Ignored when minting from a DID",
+)
+@click.option(
+    "--wallet-shard",
+    "wallet_shards",
+    required=False,
+    multiple=True,
+    callback=parse_wallet_endpoints,
+    help="The RPC port of a further wallet process to share creation with, as PORT or PORT:FINGERPRINT. Repeat "
+    "for more wallets. Each mints its share of the rows from its own coins with the same --wallet-id. "
+    "Ignored when minting from a DID",
+)
 @click.option(
     "-wp",
     "--wallet-rpc-port",
@@ -94,6 +132,14 @@ def cli(ctx: click.Context) -> None:
     type=int,
     default=None,
 )
+@click.option(
+    "--metrics-output",
+    required=False,
+    default=None,
+    type=click.Path(),
+    help="Record RPC call counts, payload sizes, latencies and time spent in retry sleeps, and write them to "
+    "METRICS_OUTPUT.json and METRICS_OUTPUT.prom (Prometheus text format) at the end of the run",
+)
 def create_spend_bundles_cmd(
     metadata_input: Path,
     bundle_output: Path,
@@ -103,46 +149,75 @@ def create_spend_bundles_cmd(
     royalty_percentage: int | None = 0,
     has_targets: bool | None = False,
     chunk: int | None = 25,
+    auto_chunk: float | None = None,
+    lanes: int = 1,
+    wallet_shards: list[tuple[int, int | None]] | None = None,
     wallet_rpc_port: int | None = None,
     fingerprint: int | None = None,
     node_rpc_port: int | None = None,
+    metrics_output: str | None = None,
 ) -> None:
     """
     \b
     INPUT is the path of the csv file of NFT metadata to be created
-    OUTPUT is the path of the pickle file where spendbundles will be written
+    OUTPUT is the path of the file where spendbundles will be written
     """
+    # the header says which columns the file has, so the target column is only required when -t is given
+    targets_required = (
+        has_targets and click.get_current_context().get_parameter_source("has_targets") != ParameterSource.DEFAULT
+    )
 
     async def do_command() -> None:
-        maybe_clients = await get_node_and_wallet_clients(node_rpc_port, wallet_rpc_port, fingerprint)
-        if maybe_clients is None:
-            print("Failed to connect to wallet and node")
-            return
-        node_client, wallet_client = maybe_clients
-        if node_client is None or wallet_client is None:
-            print("Failed to connect to wallet and node")
-            return
+        from chia_rs.sized_ints import uint32
 
-        try:
-            minter = Minter(wallet_client, node_client)
-            spend_bundles = await minter.create_spend_bundles(
-                metadata_input,
-                bundle_output,
-                uint32(wallet_id),
-                mint_from_did,
-                royalty_address=royalty_address,
-                royalty_percentage=royalty_percentage,
-                has_targets=has_targets,
-                chunk=chunk,
+        from chianft.util.clients import RpcConnections
+        from chianft.util.metrics import Metrics
+        from chianft.util.mint import Minter
+        from chianft.util.validation import validate_metadata_csv
+
+        # check the whole file before any RPC, so a bad row can't stop creation part way through
+        errors = validate_metadata_csv(metadata_input, has_header=True, has_targets=targets_required)
+        if errors:
+            for error in errors:
+                print(error)
+            raise click.ClickException(
+                f"Found {len(errors)} problems in {metadata_input}, no spend bundles were created"
             )
-            with open(bundle_output, "wb") as f:
-                pickle.dump(spend_bundles, f)
-            print(f"Successfully created {len(spend_bundles)} spend bundles")
-        finally:
-            node_client.close()
-            wallet_client.close()
-            await node_client.await_closed()
-            await wallet_client.await_closed()
+
+        metrics = Metrics()
+        async with RpcConnections(metrics=metrics if metrics_output else None) as connections:
+            maybe_clients = await connections.get_node_and_wallet_clients(node_rpc_port, wallet_rpc_port, fingerprint)
+            if maybe_clients is None:
+                print("Failed to connect to wallet and node")
+                return
+            node_client, wallet_client = maybe_clients
+            wallet_endpoints: list[tuple[int | None, int | None]] = [(wallet_rpc_port, fingerprint)]
+            wallet_endpoints += wallet_shards or []
+            try:
+                wallet_clients = await connections.wallet_clients(wallet_endpoints)
+            except ValueError as e:
+                print(e)
+                return
+
+            try:
+                minter = Minter(wallet_client, node_client, metrics=metrics)
+                bundle_count = await minter.create_spend_bundles(
+                    metadata_input,
+                    bundle_output,
+                    uint32(wallet_id),
+                    mint_from_did,
+                    royalty_address=royalty_address,
+                    royalty_percentage=royalty_percentage,
+                    has_targets=has_targets,
+                    chunk=chunk,
+                    lanes=lanes,
+                    auto_chunk=auto_chunk,
+                    wallet_shards=wallet_clients[1:],
+                )
+                print(f"Successfully created {bundle_count} spend bundles")
+            finally:
+                if metrics_output:
+                    metrics.write(Path(metrics_output))
 
     asyncio.get_event_loop().run_until_complete(do_command())
 
@@ -156,12 +231,82 @@ def create_spend_bundles_cmd(
     required=False,
     help="Optional default fee - all spends will attempt to use this fee. If not given, fees are estimated",
 )
+@click.option(
+    "--target-blocks",
+    type=int,
+    required=False,
+    default=1,
+    help="When estimating fees, pay enough to be included within this many blocks. Default: 1",
+)
+@click.option(
+    "--max-fee",
+    type=int,
+    required=False,
+    default=None,
+    help="When estimating fees, the most to pay for a single spend bundle. Also caps replacement fees",
+)
+@click.option(
+    "--escalate-after-blocks",
+    type=int,
+    required=False,
+    default=0,
+    help="Replace a spend bundle with one paying a higher fee once it has waited in the mempool for this many "
+    "blocks, e.g. 3. Each fee coin then holds extra mojos for the replacements. Default: 0, only resubmit spend "
+    "bundles dropped from the mempool",
+)
+@click.option(
+    "--escalate-after-seconds",
+    type=float,
+    required=False,
+    default=None,
+    help="Replace a spend bundle with one paying a higher fee once it has waited this many seconds. Default: off",
+)
+@click.option(
+    "--min-fee-bump",
+    type=int,
+    required=False,
+    default=10_000_000,
+    help="How much more than the spend bundle it replaces each replacement pays. The mempool rejects "
+    "replacements that raise the fee by less than 10000000 mojos. Default: 10000000",
+)
 @click.option(
     "-o",
     "--create-sell-offer",
     required=False,
     help="Create an offer for each created NFT at the specified price.",
 )
+@click.option(
+    "--offer-concurrency",
+    required=False,
+    default=4,
+    type=int,
+    help="The number of offers to create at once in the background when using --create-sell-offer. Default: 4",
+)
+@click.option(
+    "-l",
+    "--lanes",
+    required=False,
+    default=1,
+    type=int,
+    help="The number of independent spend bundle chains to keep in flight at once, each with its own fee coin",
+)
+@click.option(
+    "--fee-coins",
+    required=False,
+    default=None,
+    type=int,
+    help="The number of coins to split the fee budget into. Each submission leases one until it confirms, so "
+    "more coins than lanes lets lanes carry on while a fee spend is stuck. Default: one per lane",
+)
+@click.option(
+    "--block-share",
+    required=False,
+    default=0,
+    type=float,
+    help="Aggregate consecutive spend bundles so each submission fills up to this fraction of the maximum block "
+    "cost, shared between the lanes, e.g. 0.5. A flat --fee is paid for each bundle in the aggregate. Default: 0, "
+    "submit one spend bundle per confirmation",
+)
 @click.option(
     "-wp",
     "--wallet-rpc-port",
@@ -183,13 +328,31 @@ def create_spend_bundles_cmd(
     type=int,
     default=None,
 )
+@click.option(
+    "--metrics-output",
+    required=False,
+    default=None,
+    type=click.Path(),
+    help="Record RPC call counts, payload sizes, latencies and time spent in retry sleeps, and write them to "
+    "METRICS_OUTPUT.json and METRICS_OUTPUT.prom (Prometheus text format) at the end of the run",
+)
 def submit_spend_bundles_cmd(
     bundle_input: Path,
     fee: int | None = None,
+    target_blocks: int = 1,
+    max_fee: int | None = None,
+    escalate_after_blocks: int = 0,
+    escalate_after_seconds: float | None = None,
+    min_fee_bump: int = 10_000_000,
     create_sell_offer: int | None = None,
+    offer_concurrency: int = 4,
+    lanes: int = 1,
+    fee_coins: int | None = None,
+    block_share: float = 0,
     wallet_rpc_port: int | None = None,
     fingerprint: int | None = None,
     node_rpc_port: int | None = None,
+    metrics_output: str | None = None,
 ) -> None:
     """
     \b
@@ -197,34 +360,102 @@ def submit_spend_bundles_cmd(
     """
 
     async def do_command() -> None:
-        maybe_clients = await get_node_and_wallet_clients(node_rpc_port, wallet_rpc_port, fingerprint)
-        if maybe_clients is None:
-            print("Failed to connect to wallet and node")
-            return
-        node_client, wallet_client = maybe_clients
-        if node_client is None or wallet_client is None:
-            print("Failed to connect to wallet and node")
-            return
-
-        try:
-            spends = []
-            with open(bundle_input, "rb") as f:
-                spends_bytes = pickle.load(f)
-            for spend_bytes in spends_bytes:
-                spends.append(SpendBundle.from_bytes(spend_bytes))
+        from chianft.util.bundle_store import BundleFile
+        from chianft.util.clients import RpcConnections
+        from chianft.util.cost import bundle_file_costs
+        from chianft.util.fees import BlockFillFeeEstimator, FeeEscalation
+        from chianft.util.job_state import JobState, job_state_path
+        from chianft.util.metrics import Metrics
+        from chianft.util.mint import Minter
 
-            minter = Minter(wallet_client, node_client)
-            await minter.submit_spend_bundles(spends, fee, create_sell_offer=create_sell_offer)
+        metrics = Metrics()
+        async with RpcConnections(metrics=metrics if metrics_output else None) as connections:
+            maybe_clients = await connections.get_node_and_wallet_clients(node_rpc_port, wallet_rpc_port, fingerprint)
+            if maybe_clients is None:
+                print("Failed to connect to wallet and node")
+                return
+            node_client, wallet_client = maybe_clients
 
-        finally:
-            node_client.close()
-            wallet_client.close()
-            await node_client.await_closed()
-            await wallet_client.await_closed()
+            try:
+                with BundleFile(bundle_input) as spends, JobState(job_state_path(bundle_input)) as job_state:
+                    fee_estimator = BlockFillFeeEstimator(target_blocks=target_blocks, max_fee=max_fee)
+                    fee_escalation = None
+                    if escalate_after_blocks > 0 or escalate_after_seconds is not None:
+                        fee_escalation = FeeEscalation(
+                            after_blocks=escalate_after_blocks or None,
+                            after_seconds=escalate_after_seconds,
+                            min_bump=min_fee_bump,
+                            max_fee=max_fee,
+                        )
+                    minter = Minter(
+                        wallet_client,
+                        node_client,
+                        fee_estimator=fee_estimator,
+                        metrics=metrics,
+                        fee_escalation=fee_escalation,
+                    )
+                    await minter.submit_spend_bundles(
+                        spends,
+                        fee,
+                        create_sell_offer=create_sell_offer,
+                        lanes=lanes,
+                        chains=spends.chains(),
+                        costs=bundle_file_costs(spends),
+                        offer_concurrency=offer_concurrency,
+                        block_share=block_share,
+                        job_state=job_state,
+                        fee_coins=fee_coins,
+                    )
+            finally:
+                if metrics_output:
+                    metrics.write(Path(metrics_output))
 
     asyncio.get_event_loop().run_until_complete(do_command())
 
 
+@cli.command("status", short_help="Summarize the progress of submitting a bundle file")
+@click.argument("bundle_input", nargs=1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--launcher-ids",
+    is_flag=True,
+    default=False,
+    help="Also list the launcher id of every confirmed NFT, in spend bundle order",
+)
+def status_cmd(bundle_input: Path, launcher_ids: bool = False) -> None:
+    """
+    \b
+    BUNDLE_INPUT is the path of the saved spend bundles from create-mint-spend-bundles
+    """
+    import time
+
+    from chianft.util.job_state import JobState, job_state_path
+
+    db_path = job_state_path(bundle_input)
+    if not db_path.exists():
+        print(f"No spend bundles from {bundle_input} have been submitted yet")
+        return
+    with JobState(db_path) as job_state:
+        summary = job_state.summary()
+        counts = summary.bundle_counts
+        print(
+            f"Spend bundles: {sum(counts.values())} ({counts['confirmed']} confirmed, {counts['submitted']} "
+            f"submitted, {counts['pending']} pending)"
+        )
+        print(f"NFTs minted: {summary.launcher_count}")
+        print(f"Fees paid: {summary.fee_paid} mojos in {summary.confirmed_submissions} confirmed spend bundles")
+        if summary.last_confirmed_height is not None:
+            print(f"Last confirmed at height: {summary.last_confirmed_height}")
+        for submission in summary.unconfirmed_submissions:
+            age = int(time.time() - submission.submitted_at)
+            print(
+                f"Unconfirmed: {submission.name.hex()} with fee {submission.fee} for spend bundles "
+                f"{submission.first_bundle} to {submission.last_bundle}, submitted {age}s ago"
+            )
+        if launcher_ids:
+            for launcher_id in job_state.launcher_ids():
+                print(launcher_id.hex())
+
+
 def main() -> None:
     asyncio.run(cli())  # pylint: disable=no-value-for-parameter
 
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import overload
+
+from chia_rs import SpendBundle
+from chia_rs.sized_bytes import bytes32
+
+from chianft.util.program_table import ProgramEncoder, decode_segments
+
+# File layout:
+#   FILE_MAGIC
+#   records: RECORD_HEADER (kind, length, bundle number, chain, cost) followed by either
+#     a shared program: the sha256 of its serialization and the encoded program, always written before the
+#     bundles using it and numbered in the order they are written
+#     a spend bundle: the encoded spend bundle
+#   index (written on close): INDEX_ENTRY per bundle, sorted by bundle number, then PROGRAM_ENTRY per shared
+#     program, in number order
+#   FOOTER (index offset, bundle count, program count, FOOTER_MAGIC)
+# A file without a valid footer (e.g. after a crash) is recovered by scanning the records.
+# A cost of 0 means the cost was not computed when the bundle was written.
+# Spend bundles and shared programs are stored with the programs they have in common cut out and replaced by
+# references to shared programs, see program_table.py.
+FILE_MAGIC = b"CNFTSB03"
+FOOTER_MAGIC = b"CNFTIDX3"
+RECORD_HEADER = struct.Struct(">BIIIQ")
+INDEX_ENTRY = struct.Struct(">QIIIQ")
+PROGRAM_ENTRY = struct.Struct(">32sQI")
+FOOTER = struct.Struct(">QII8s")
+BUNDLE_RECORD = 0
+PROGRAM_RECORD = 1
+
+
+@dataclass(frozen=True)
+class BundleEntry:
+    offset: int
+    length: int
+    number: int
+    chain: int
+    cost: int
+
+
+@dataclass(frozen=True)
+class ProgramEntry:
+    program_hash: bytes32
+    offset: int
+    length: int
+
+
+def read_entries(buf: bytes | mmap.mmap) -> tuple[list[BundleEntry], list[ProgramEntry], int]:
+    """
+    Return the entries of a bundle file sorted by bundle number, its shared programs, and the offset where
+    record data ends.
+    """
+    if buf[: len(FILE_MAGIC)] != FILE_MAGIC:
+        raise ValueError("Not a spend bundle file")
+    size = len(buf)
+    if size >= len(FILE_MAGIC) + FOOTER.size:
+        index_offset, count, program_count, footer_magic = FOOTER.unpack_from(buf, size - FOOTER.size)
+        index_size = count * INDEX_ENTRY.size + program_count * PROGRAM_ENTRY.size
+        if footer_magic == FOOTER_MAGIC and index_offset + index_size + FOOTER.size == size:
+            entries = [
+                BundleEntry(*INDEX_ENTRY.unpack_from(buf, index_offset + i * INDEX_ENTRY.size)) for i in range(count)
+            ]
+            programs_offset = index_offset + count * INDEX_ENTRY.size
+            programs = []
+            for i in range(program_count):
+                program_hash, offset, length = PROGRAM_ENTRY.unpack_from(buf, programs_offset + i * PROGRAM_ENTRY.size)
+                programs.append(ProgramEntry(bytes32(program_hash), offset, length))
+            return entries, programs, index_offset
+
+    # a later record for the same bundle number replaces the earlier one
+    scanned: dict[int, BundleEntry] = {}
+    scanned_programs: list[ProgramEntry] = []
+    position = len(FILE_MAGIC)
+    while position + RECORD_HEADER.size <= size:
+        kind, length, number, chain, cost = RECORD_HEADER.unpack_from(buf, position)
+        data_offset = position + RECORD_HEADER.size
+        if length == 0 or data_offset + length > size:
+            # partially written record or index
+            break
+        if kind == PROGRAM_RECORD:
+            program_hash = bytes32(buf[data_offset : data_offset + 32])
+            scanned_programs.append(ProgramEntry(program_hash, data_offset + 32, length - 32))
+        elif kind == BUNDLE_RECORD:
+            scanned[number] = BundleEntry(data_offset, length, number, chain, cost)
+        else:
+            break
+        position = data_offset + length
+    return sorted(scanned.values(), key=lambda entry: entry.number), scanned_programs, position
+
+
+class BundleWriter:
+    """
+    Appends spend bundles to a bundle file as they are created. Opening an existing file keeps its bundles,
+    so an interrupted run can carry on writing to the same file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.entries: dict[int, BundleEntry] = {}
+        self.programs: list[ProgramEntry] = []
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                existing_entries, self.programs, data_end = read_entries(buf)
+            self.entries = {entry.number: entry for entry in existing_entries}
+            self._file = open(self.path, "r+b")
+            self._file.truncate(data_end)
+            self._file.seek(data_end)
+        else:
+            self._file = open(self.path, "w+b")
+            self._file.write(FILE_MAGIC)
+        self.encoder = ProgramEncoder(program.program_hash for program in self.programs)
+
+    def __enter__(self) -> BundleWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __contains__(self, number: int) -> bool:
+        return number in self.entries
+
+    def append(self, number: int, sb_bytes: bytes, chain: int = 0, cost: int = 0) -> None:
+        encoded, new_programs = self.encoder.encode_bundle(sb_bytes)
+        for program_hash, program in new_programs:
+            self._file.write(RECORD_HEADER.pack(PROGRAM_RECORD, 32 + len(program), 0, 0, 0))
+            self._file.write(program_hash)
+            self.programs.append(ProgramEntry(program_hash, self._file.tell(), len(program)))
+            self._file.write(program)
+        self._file.write(RECORD_HEADER.pack(BUNDLE_RECORD, len(encoded), number, chain, cost))
+        self.entries[number] = BundleEntry(self._file.tell(), len(encoded), number, chain, cost)
+        self._file.write(encoded)
+
+    def flush(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        entries = sorted(self.entries.values(), key=lambda entry: entry.number)
+        for entry in entries:
+            self._file.write(INDEX_ENTRY.pack(entry.offset, entry.length, entry.number, entry.chain, entry.cost))
+        for program in self.programs:
+            self._file.write(PROGRAM_ENTRY.pack(program.program_hash, program.offset, program.length))
+        self._file.write(FOOTER.pack(index_offset, len(entries), len(self.programs), FOOTER_MAGIC))
+        self._file.close()
+
+
+class BundleFile(Sequence[SpendBundle]):
+    """
+    Read-only view of a bundle file. The file is memory mapped and each spend bundle is only rebuilt and
+    deserialized when it is accessed. Each shared program is rebuilt once and kept for the later bundles.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries, self.programs, _ = read_entries(self._mmap)
+        self._program_bytes: dict[int, bytes] = {}
+
+    def __enter__(self) -> BundleFile:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @overload
+    def __getitem__(self, index: int) -> SpendBundle: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[SpendBundle]: ...
+
+    def __getitem__(self, index: int | slice) -> SpendBundle | list[SpendBundle]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return SpendBundle.from_bytes(self.bundle_bytes(index))
+
+    def __iter__(self) -> Iterator[SpendBundle]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def bundle_bytes(self, index: int) -> bytes:
+        entry = self.entries[index]
+        return decode_segments(self._mmap[entry.offset : entry.offset + entry.length], self.program_bytes)
+
+    def program_bytes(self, program_number: int) -> bytes:
+        program = self._program_bytes.get(program_number)
+        if program is None:
+            entry = self.programs[program_number]
+            program = decode_segments(self._mmap[entry.offset : entry.offset + entry.length], self.program_bytes)
+            self._program_bytes[program_number] = program
+        return program
+
+    def cost(self, index: int) -> int | None:
+        return self.entries[index].cost or None
+
+    def chains(self) -> list[list[int]]:
+        chains: dict[int, list[int]] = {}
+        for i, entry in enumerate(self.entries):
+            chains.setdefault(entry.chain, []).append(i)
+        return list(chains.values())
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
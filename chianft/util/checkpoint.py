@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from chia.types.blockchain_format.coin import Coin
+from chia.util.streamable import Streamable, streamable
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint32
+
+
+@streamable
+@dataclass(frozen=True)
+class LaneCheckpoint(Streamable):
+    lane: uint32
+    next_row: uint32
+    stop_row: uint32
+    next_coin: Coin
+    did_coin: Coin | None
+    did_lineage_parent: bytes32 | None
+
+
+def checkpoint_path(bundle_output: Path) -> Path:
+    return Path(f"{bundle_output}.checkpoint")
+
+
+class CreationCheckpoint:
+    """
+    Records how far each creation lane has got, so an interrupted create-mint-spend-bundles run can pick up
+    after the last chunk that was written to the bundle file. The file is replaced atomically on every update.
+    """
+
+    def __init__(self, path: Path, settings: dict[str, Any], lanes: list[LaneCheckpoint]) -> None:
+        self.path = path
+        self.settings = settings
+        self.lanes = {int(lane.lane): lane for lane in lanes}
+
+    @classmethod
+    def load(cls, path: Path, settings: dict[str, Any]) -> CreationCheckpoint | None:
+        if not path.exists():
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        if data["settings"] != settings:
+            raise ValueError(
+                f"Checkpoint {path} was written for different inputs or options. Remove it to start a new run"
+            )
+        return cls(path, settings, [LaneCheckpoint.from_json_dict(lane) for lane in data["lanes"]])
+
+    def save(self) -> None:
+        data = {
+            "settings": self.settings,
+            "lanes": [lane.to_json_dict() for _, lane in sorted(self.lanes.items())],
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def update(self, lane: LaneCheckpoint) -> None:
+        self.lanes[int(lane.lane)] = lane
+        self.save()
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
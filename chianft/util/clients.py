@@ -1,74 +1,164 @@
 from __future__ import annotations
 
+from functools import cached_property
+from pathlib import Path
 from pprint import pprint
+from ssl import SSLContext
+from types import TracebackType
+from typing import Any, TypeVar
 
 import aiohttp
 from chia.full_node.full_node_rpc_client import FullNodeRpcClient
+from chia.rpc.rpc_client import ResponseFailureError, RpcClient
+from chia.server.server import ssl_context_for_client
+from chia.server.ssl_context import private_ssl_ca_paths
 from chia.util.config import load_config
 from chia.util.default_root import DEFAULT_ROOT_PATH
+from chia.wallet.wallet_request_types import LogIn
 from chia.wallet.wallet_rpc_client import WalletRpcClient
-from chia_rs.sized_ints import uint16
+from chia_rs.sized_ints import uint16, uint32
 
+from chianft.util.metrics import Metrics, instrument_client
 
-async def get_node_client(
-    full_node_rpc_port: int | None,
-) -> FullNodeRpcClient | None:
-    try:
+_T_RpcClient = TypeVar("_T_RpcClient", bound=RpcClient)
+
+DEFAULT_RPC_TIMEOUT = 300
+
+
+class RpcConnections:
+    """
+    Opens the node and wallet RPC clients from a single load of config.yaml. Every client shares one SSL
+    context and one aiohttp session, so keep-alive connections are pooled across all RPC calls instead of
+    doing a TLS handshake per client. Clients are created once per port and handed out again on later
+    requests. Closing the manager closes every client. When `metrics` is given every client is instrumented.
+    """
+
+    def __init__(
+        self,
+        root_path: Path = DEFAULT_ROOT_PATH,
+        config: dict[str, Any] | None = None,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.root_path = root_path
+        self.metrics = metrics
+        if config is not None:
+            self.__dict__["config"] = config
+        self._session: aiohttp.ClientSession | None = None
+        self._clients: dict[tuple[type[RpcClient], int], RpcClient] = {}
+
+    @cached_property
+    def config(self) -> dict[str, Any]:
+        config: dict[str, Any] = load_config(self.root_path, "config.yaml")
+        return config
+
+    @cached_property
+    def ssl_context(self) -> SSLContext:
+        ca_crt_path, ca_key_path = private_ssl_ca_paths(self.root_path, self.config)
+        crt_path = self.root_path / self.config["daemon_ssl"]["private_crt"]
+        key_path = self.root_path / self.config["daemon_ssl"]["private_key"]
+        return ssl_context_for_client(ca_crt_path, ca_key_path, crt_path, key_path)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            timeout = self.config.get("rpc_timeout", DEFAULT_RPC_TIMEOUT)
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout))
+        return self._session
+
+    def _get_client(self, client_type: type[_T_RpcClient], port: int) -> _T_RpcClient:
+        client = self._clients.get((client_type, port))
+        if client is None:
+            self_hostname = self.config["self_hostname"]
+            client = client_type(
+                url=f"https://{self_hostname}:{port}/",
+                session=self.session,
+                ssl_context=self.ssl_context,
+                hostname=self_hostname,
+                port=uint16(port),
+            )
+            if self.metrics is not None:
+                instrument_client(client, self.metrics)
+            self._clients[client_type, port] = client
+        assert isinstance(client, client_type)
+        return client
+
+    def node_client(self, full_node_rpc_port: int | None = None) -> FullNodeRpcClient:
         if full_node_rpc_port is None:
-            config = load_config(DEFAULT_ROOT_PATH, "config.yaml")
-            self_hostname = config["self_hostname"]
-            full_node_rpc_port = config["full_node"]["rpc_port"]
-        full_node_client = await FullNodeRpcClient.create(
-            self_hostname, uint16(full_node_rpc_port), DEFAULT_ROOT_PATH, config
-        )
-        return full_node_client
-    except Exception as e:
-        if isinstance(e, aiohttp.ClientConnectorError):
-            pprint(f"Connection error. Check if full node is running at {full_node_rpc_port}")
-        else:
-            pprint(f"Exception from 'full node' {e}")
-        return None
-
-
-async def get_wallet_client(
-    wallet_rpc_port: int | None,
-) -> WalletRpcClient | None:
-    try:
+            full_node_rpc_port = self.config["full_node"]["rpc_port"]
+        return self._get_client(FullNodeRpcClient, full_node_rpc_port)
+
+    async def wallet_client(
+        self, wallet_rpc_port: int | None = None, fingerprint: int | None = None
+    ) -> WalletRpcClient:
         if wallet_rpc_port is None:
-            config = load_config(DEFAULT_ROOT_PATH, "config.yaml")
-            self_hostname = config["self_hostname"]
-            wallet_rpc_port = config["wallet"]["rpc_port"]
-        wallet_client = await WalletRpcClient.create(self_hostname, uint16(wallet_rpc_port), DEFAULT_ROOT_PATH, config)
+            wallet_rpc_port = self.config["wallet"]["rpc_port"]
+        wallet_client = self._get_client(WalletRpcClient, wallet_rpc_port)
+        if fingerprint is not None:
+            logged_in = await wallet_client.get_logged_in_fingerprint()
+            if logged_in.fingerprint != fingerprint:
+                await wallet_client.log_in(LogIn(fingerprint=uint32(fingerprint)))
         return wallet_client
-    except Exception as e:
-        if isinstance(e, aiohttp.ClientConnectorError):
-            pprint(f"Connection error. Check if wallet is running at {wallet_rpc_port}")
-        else:
-            pprint(f"Exception from 'wallet' {e}")
-        return None
-
-
-async def get_node_and_wallet_clients(
-    full_node_rpc_port: int | None,
-    wallet_rpc_port: int | None,
-    fingerprint: int | None,
-) -> tuple[FullNodeRpcClient | None, WalletRpcClient | None] | None:
-    try:
-        full_node_client = await get_node_client(full_node_rpc_port)
-        wallet_client = await get_wallet_client(wallet_rpc_port)
-        # wallet_client_f = await get_wallet(_wallet_client, fingerprint)
-        # assert wallet_client_f is not None
-        # wallet_client, _ = wallet_client_f
-        return full_node_client, wallet_client
-    except Exception as e:
-        if isinstance(e, aiohttp.ClientConnectorError):
-            pprint("Connection error. Check if full node and wallet are running.")
-        else:
-            pprint(f"Exception from 'node or wallet' {e}")
-        return None
-
-
-def get_additional_data() -> bytes:
-    config = load_config(DEFAULT_ROOT_PATH, "config.yaml")
+
+    async def wallet_clients(self, endpoints: list[tuple[int | None, int | None]]) -> list[WalletRpcClient]:
+        """
+        Return a wallet client for each (wallet rpc port, fingerprint). A wallet process is logged in to one
+        fingerprint at a time, so every endpoint must be a separate wallet process with its own port.
+        """
+        ports = [self.config["wallet"]["rpc_port"] if port is None else port for port, _ in endpoints]
+        if len(set(ports)) < len(ports):
+            raise ValueError(f"Each wallet needs its own wallet process and RPC port, got ports {ports}")
+        return [await self.wallet_client(port, fingerprint) for port, (_, fingerprint) in zip(ports, endpoints)]
+
+    async def get_node_and_wallet_clients(
+        self,
+        full_node_rpc_port: int | None,
+        wallet_rpc_port: int | None,
+        fingerprint: int | None,
+    ) -> tuple[FullNodeRpcClient, WalletRpcClient] | None:
+        try:
+            full_node_client = self.node_client(full_node_rpc_port)
+            wallet_client = await self.wallet_client(wallet_rpc_port, fingerprint)
+            return full_node_client, wallet_client
+        except Exception as e:
+            if isinstance(e, aiohttp.ClientConnectorError):
+                pprint("Connection error. Check if full node and wallet are running.")
+            else:
+                pprint(f"Exception from 'node or wallet' {e}")
+            return None
+
+    def additional_data(self) -> bytes:
+        return get_additional_data(self.config)
+
+    async def close(self) -> None:
+        self._clients.clear()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> RpcConnections:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+
+def get_additional_data(config: dict[str, Any] | None = None) -> bytes:
+    if config is None:
+        config = load_config(DEFAULT_ROOT_PATH, "config.yaml")
     selected_network = config["farmer"]["selected_network"]
     return bytes.fromhex(config["farmer"]["network_overrides"]["constants"][selected_network]["GENESIS_CHALLENGE"])
+
+
+def rpc_error_message(err: ValueError) -> str:
+    """
+    The error an RPC call failed with. The clients raise ResponseFailureError with the node's response, whose
+    "error" is the message, and ValueError for failures of their own.
+    """
+    if isinstance(err, ResponseFailureError):
+        return str(err.response.get("error", err))
+    return str(err)
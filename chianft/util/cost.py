@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia_rs import SpendBundle, get_conditions_from_spendbundle
+
+from chianft.util.bundle_store import BundleFile
+
+# The mempool rejects any single spend bundle that costs more than half a block
+MAX_SPEND_BUNDLE_COST = DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM // 2
+# A standard spend of the fee coin, paying the fee and returning the change, costs about 8 million. Bundles
+# leave this much room for it so they are still within MAX_SPEND_BUNDLE_COST once the fee is added
+FEE_SPEND_COST = 10_000_000
+
+
+def spend_bundle_cost(spend_bundle: SpendBundle) -> int:
+    """
+    Return the cost the node charges for the bundle: running its puzzles, its conditions and its size in
+    bytes. This is what counts towards the block and mempool limits and what fees are paid per.
+    """
+    conditions = get_conditions_from_spendbundle(
+        spend_bundle, DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM, DEFAULT_CONSTANTS, DEFAULT_CONSTANTS.HARD_FORK_HEIGHT
+    )
+    return int(conditions.cost)
+
+
+def serialized_bundle_cost(sb_bytes: bytes) -> int:
+    return spend_bundle_cost(SpendBundle.from_bytes(sb_bytes))
+
+
+def bundle_file_costs(bundle_file: BundleFile, max_workers: int | None = None) -> list[int]:
+    """
+    Return the cost of every bundle in the file, using the costs stored at creation time and computing any
+    missing ones in a process pool.
+    """
+    costs = [bundle_file.cost(i) for i in range(len(bundle_file))]
+    missing = [i for i, cost in enumerate(costs) if cost is None]
+    if missing:
+        print(f"Computing the cost of {len(missing)} spend bundles")
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            missing_costs = pool.map(
+                serialized_bundle_cost, (bundle_file.bundle_bytes(i) for i in missing), chunksize=64
+            )
+            for i, cost in zip(missing, missing_costs):
+                costs[i] = cost
+    return [cost or 0 for cost in costs]
+
+
+class ChunkSizer:
+    """
+    Decides how many NFTs go in each spend bundle. Without a `target_cost` every bundle gets `chunk` NFTs.
+    With one, the first bundle gets `chunk` NFTs to measure the cost per NFT, and each later bundle is sized
+    from the cost per NFT of the bundle before it so that it costs about `target_cost`. Because that
+    measurement includes the bundle's fixed cost spread over its NFTs, sizes grow towards the target from
+    below rather than overshooting it.
+    """
+
+    def __init__(self, chunk: int, target_cost: int | None = None) -> None:
+        self.size = chunk
+        self.target_cost = target_cost
+
+    def observe(self, rows: int, cost: int) -> bool:
+        """
+        Record the cost of a bundle of `rows` NFTs and resize the next one. Returns False if the bundle is
+        over the target cost and should be created again with `size` NFTs.
+        """
+        if self.target_cost is None or cost <= 0:
+            return True
+        self.size = max(1, math.floor(self.target_cost * rows / cost))
+        return cost <= self.target_cost or rows == 1
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+
+from chia.types.blockchain_format.coin import Coin
+from chia_rs import SpendBundle
+from chia_rs.sized_bytes import bytes32
+
+
+class FeeCoinPool:
+    """
+    Coins that fees are paid from, leased to one submission at a time. A submission keeps its coin for every
+    fee attempt, so a replacement spends the same fee coin as the spend bundle it replaces, and returns it
+    once the bundle confirms: the change of the fee spend goes back into the pool, or the coin itself if no
+    fee was paid. A coin whose submission failed may still be spent by a stuck mempool item, so it is
+    retired instead of returned, and the other submissions carry on with the rest of the pool.
+    """
+
+    def __init__(self, coins: Iterable[Coin]) -> None:
+        self.free: dict[bytes32, Coin] = {coin.name(): coin for coin in coins}
+        self.leased: dict[bytes32, Coin] = {}
+        self.changed = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return len(self.free) + len(self.leased)
+
+    def coin_ids(self) -> list[bytes32]:
+        return [*self.free, *self.leased]
+
+    async def lease(self, min_amount: int = 0) -> Coin:
+        """
+        Lease the largest free coin holding at least `min_amount`, waiting for one to be returned if they are
+        all leased. Raises ValueError if no coin in the pool can ever hold that much.
+        """
+        async with self.changed:
+            while True:
+                coin = max(self.free.values(), key=lambda coin: coin.amount, default=None)
+                if coin is not None and coin.amount >= min_amount:
+                    del self.free[coin.name()]
+                    self.leased[coin.name()] = coin
+                    return coin
+                # a returned coin only gets smaller, so only a larger leased coin is worth waiting for
+                if not any(leased.amount >= min_amount for leased in self.leased.values()):
+                    raise ValueError(f"No coin left in the fee pool holds {min_amount} mojos")
+                await self.changed.wait()
+
+    async def release(self, coin: Coin, spent_by: SpendBundle | None = None) -> None:
+        """
+        Return a leased coin, or its change if `spent_by` confirmed spending it.
+        """
+        async with self.changed:
+            del self.leased[coin.name()]
+            returned: Coin | None = coin
+            if spent_by is not None and coin in spent_by.removals():
+                returned = next((c for c in spent_by.additions() if c.parent_coin_info == coin.name()), None)
+            if returned is not None and returned.amount > 0:
+                self.free[returned.name()] = returned
+            self.changed.notify_all()
+
+    async def retire(self, coin: Coin) -> None:
+        async with self.changed:
+            del self.leased[coin.name()]
+            self.changed.notify_all()
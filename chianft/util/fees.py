@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Protocol
+
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+
+from chianft.util.mempool import MempoolSnapshot
+
+# The lowest fee per cost worth paying when a fee is needed at all
+MIN_FEE_PER_COST = 5
+# How much the fee per cost goes up on each retry after a bundle was dropped from the mempool
+RETRY_FEE_PER_COST_BUMP = 1
+# The mempool only lets a spend bundle replace the ones it conflicts with if it pays at least this much more in
+# fees, and more per cost (MEMPOOL_MIN_FEE_INCREASE in chia's mempool manager)
+MIN_REPLACEMENT_FEE_BUMP = 10_000_000
+DEFAULT_ESCALATE_AFTER_BLOCKS = 3
+# Without a cap, how many replacements each fee coin is funded for
+RESERVED_REPLACEMENTS = 3
+
+
+class FeeEstimator(Protocol):
+    def estimate(self, snapshot: MempoolSnapshot, sb_cost: int, attempt: int) -> int:
+        """
+        Return the total fee in mojos to attach to a spend bundle of cost `sb_cost`. `attempt` starts at 1 and
+        goes up each time the bundle has to be resubmitted.
+        """
+        ...
+
+
+def fee_rate_distribution(snapshot: MempoolSnapshot) -> list[tuple[float, int]]:
+    """
+    Return (fee per cost, cost) for every mempool item, highest fee per cost first. This is the order the
+    node fills a block in, so walking it gives the cost already queued ahead of any given fee rate.
+    """
+    distribution = [(item["fee"] / item["cost"], item["cost"]) for item in snapshot.items.values() if item["cost"] > 0]
+    distribution.sort(key=lambda rate_cost: rate_cost[0], reverse=True)
+    return distribution
+
+
+def marginal_fee_per_cost(distribution: list[tuple[float, int]], cost_budget: int) -> float | None:
+    """
+    Return the fee per cost of the best-paying item that does not fit in `cost_budget`, which is the rate a
+    new item has to beat to be included. Returns None when the whole mempool fits.
+    """
+    queued_cost = 0
+    for fee_per_cost, cost in distribution:
+        queued_cost += cost
+        if queued_cost > cost_budget:
+            return fee_per_cost
+    return None
+
+
+class BlockFillFeeEstimator:
+    """
+    Pays just enough to land within the next `target_blocks` blocks, based on the cost-weighted distribution
+    of fee rates in the mempool. No fee is paid when the bundle fits without one. `max_fee` caps the fee
+    paid for any single bundle.
+    """
+
+    def __init__(
+        self,
+        target_blocks: int = 1,
+        max_fee: int | None = None,
+        block_cost: int = DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM,
+    ) -> None:
+        self.target_blocks = target_blocks
+        self.max_fee = max_fee
+        self.block_cost = block_cost
+
+    def estimate(self, snapshot: MempoolSnapshot, sb_cost: int, attempt: int) -> int:
+        cost_budget = self.block_cost * self.target_blocks - sb_cost
+        if snapshot.total_cost <= cost_budget and attempt == 1:
+            return 0
+        marginal = marginal_fee_per_cost(fee_rate_distribution(snapshot), cost_budget) or 0
+        fee_per_cost = max(MIN_FEE_PER_COST, math.floor(marginal) + 1) + RETRY_FEE_PER_COST_BUMP * (attempt - 1)
+        total_fee = sb_cost * fee_per_cost
+        if self.max_fee is not None and total_fee > self.max_fee:
+            print(f"Estimated fee {total_fee} is above the maximum of {self.max_fee}, paying the maximum")
+            total_fee = self.max_fee
+        return total_fee
+
+
+@dataclass(frozen=True)
+class FeeEscalation:
+    """
+    When a submitted spend bundle that is still waiting in the mempool is replaced by one paying a higher fee:
+    after `after_blocks` new blocks or `after_seconds` seconds, whichever comes first. Each replacement pays
+    at least `min_bump` more than the spend bundle it replaces, and never more than `max_fee`.
+    """
+
+    after_blocks: int | None = DEFAULT_ESCALATE_AFTER_BLOCKS
+    after_seconds: float | None = None
+    min_bump: int = MIN_REPLACEMENT_FEE_BUMP
+    max_fee: int | None = None
+
+    def reserve(self) -> int:
+        """
+        How much each fee coin holds on top of its share of the fees, to pay for replacements.
+        """
+        if self.max_fee is not None:
+            return self.max_fee
+        return self.min_bump * RESERVED_REPLACEMENTS
+
+    def replacement_fee(self, replaced_fee: int, available: int) -> int | None:
+        """
+        Return the least a replacement for a spend bundle paying `replaced_fee` has to pay, or None when that
+        is over the cap or more than the `available` mojos of the fee coin.
+        """
+        fee = replaced_fee + self.min_bump
+        if fee > available or (self.max_fee is not None and fee > self.max_fee):
+            return None
+        return fee
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+
+from chia_rs.sized_bytes import bytes32
+
+PENDING = "pending"
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+STATUSES = [PENDING, SUBMITTED, CONFIRMED]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bundles (
+    bundle_index INTEGER PRIMARY KEY,
+    chain INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    submission BLOB REFERENCES submissions (name),
+    confirmed_height INTEGER
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    name BLOB PRIMARY KEY,
+    fee INTEGER NOT NULL,
+    submitted_at REAL NOT NULL,
+    confirmed_height INTEGER
+);
+CREATE TABLE IF NOT EXISTS launchers (
+    launcher_id BLOB PRIMARY KEY,
+    bundle_index INTEGER NOT NULL REFERENCES bundles (bundle_index)
+);
+CREATE INDEX IF NOT EXISTS launchers_by_bundle ON launchers (bundle_index);
+"""
+
+
+def job_state_path(bundle_file: Path) -> Path:
+    return Path(f"{bundle_file}.db")
+
+
+def remove_job_state(path: Path) -> None:
+    for suffix in ["", "-wal", "-shm"]:
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+
+@dataclass(frozen=True)
+class SubmissionInfo:
+    name: bytes32
+    fee: int
+    submitted_at: float
+    first_bundle: int
+    last_bundle: int
+
+
+@dataclass(frozen=True)
+class JobSummary:
+    bundle_counts: dict[str, int]
+    launcher_count: int
+    fee_paid: int
+    confirmed_submissions: int
+    last_confirmed_height: int | None
+    # submissions that were pushed but haven't been seen to confirm, oldest first
+    unconfirmed_submissions: list[SubmissionInfo]
+
+
+class JobState:
+    """
+    The state of submitting a bundle file, kept in a sqlite database next to it, so resuming and status
+    queries are local lookups rather than chain scans. Each bundle moves from pending to submitted just
+    before a spend bundle containing it is pushed, and to confirmed once that spend bundle is seen on chain,
+    along with the launcher ids it minted. A bundle is submitted again under a new name for every fee
+    attempt, and each attempt is kept with its fee. Every update is one transaction, so after a crash a
+    bundle is never pending once it may have reached the mempool.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> JobState:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def add_bundles(self, chains: Sequence[Sequence[int]]) -> bool:
+        """
+        Record the bundles of the bundle file as pending, unless the job already knows them. Returns True if
+        they were added, in which case nothing is known about them yet: the bundle file may have been partly
+        submitted before the job state was created.
+        """
+        bundle_count = sum(len(chain) for chain in chains)
+        (known,) = self.connection.execute("SELECT COUNT(*) FROM bundles").fetchone()
+        if known == bundle_count:
+            return False
+        if known > 0:
+            raise ValueError(
+                f"Job state {self.path} was written for a bundle file of {known} spend bundles, not "
+                f"{bundle_count}. Remove it to start a new job"
+            )
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO bundles (bundle_index, chain, status) VALUES (?, ?, ?)",
+                ((i, chain_number, PENDING) for chain_number, chain in enumerate(chains) for i in chain),
+            )
+        return True
+
+    def statuses(self, bundle_indices: Iterable[int]) -> list[str]:
+        statuses = dict(self.connection.execute("SELECT bundle_index, status FROM bundles"))
+        return [statuses[i] for i in bundle_indices]
+
+    def resume_position(self, chain: Sequence[int]) -> tuple[int, int]:
+        """
+        Return the position in `chain` of its first bundle that isn't known to be confirmed, and how many
+        bundles from there on were submitted without being seen to confirm. Only those need checking on chain.
+        """
+        statuses = self.statuses(chain)
+        position = 0
+        while position < len(statuses) and statuses[position] == CONFIRMED:
+            position += 1
+        submitted = 0
+        while position + submitted < len(statuses) and statuses[position + submitted] == SUBMITTED:
+            submitted += 1
+        return position, submitted
+
+    def record_submitted(self, bundle_indices: Sequence[int], name: bytes32, fee: int) -> None:
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO submissions (name, fee, submitted_at) VALUES (?, ?, ?)",
+                (bytes(name), fee, time.time()),
+            )
+            self.connection.executemany(
+                "UPDATE bundles SET status = ?, submission = ? WHERE bundle_index = ?",
+                ((SUBMITTED, bytes(name), i) for i in bundle_indices),
+            )
+
+    def record_confirmed(
+        self,
+        bundle_indices: Sequence[int],
+        height: int | None,
+        launcher_ids: dict[int, list[bytes32]],
+        name: bytes32 | None = None,
+    ) -> None:
+        """
+        Mark bundles as confirmed at `height` with the launcher ids each one minted. `name` is the spend
+        bundle that confirmed them, when it is known.
+        """
+        with self.connection:
+            if name is not None:
+                self.connection.execute(
+                    "UPDATE submissions SET confirmed_height = ? WHERE name = ?", (height, bytes(name))
+                )
+                self.connection.executemany(
+                    "UPDATE bundles SET submission = ? WHERE bundle_index = ?",
+                    ((bytes(name), i) for i in bundle_indices),
+                )
+            self.connection.executemany(
+                "UPDATE bundles SET status = ?, confirmed_height = ? WHERE bundle_index = ?",
+                ((CONFIRMED, height, i) for i in bundle_indices),
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO launchers (launcher_id, bundle_index) VALUES (?, ?)",
+                ((bytes(launcher_id), i) for i in bundle_indices for launcher_id in launcher_ids.get(i, [])),
+            )
+
+    def launcher_ids(self) -> list[bytes32]:
+        rows = self.connection.execute("SELECT launcher_id FROM launchers ORDER BY bundle_index, rowid")
+        return [bytes32(launcher_id) for (launcher_id,) in rows]
+
+    def summary(self) -> JobSummary:
+        bundle_counts = dict.fromkeys(STATUSES, 0)
+        bundle_counts.update(self.connection.execute("SELECT status, COUNT(*) FROM bundles GROUP BY status"))
+        (launcher_count,) = self.connection.execute("SELECT COUNT(*) FROM launchers").fetchone()
+        # a submission only counts towards the fees paid if it is the one that confirmed its bundles
+        fee_paid, confirmed_submissions = self.connection.execute(
+            "SELECT COALESCE(SUM(fee), 0), COUNT(*) FROM submissions WHERE name IN "
+            "(SELECT submission FROM bundles WHERE status = ?)",
+            (CONFIRMED,),
+        ).fetchone()
+        (last_height,) = self.connection.execute("SELECT MAX(confirmed_height) FROM bundles").fetchone()
+        unconfirmed = [
+            SubmissionInfo(bytes32(name), fee, submitted_at, first_bundle, last_bundle)
+            for name, fee, submitted_at, first_bundle, last_bundle in self.connection.execute(
+                "SELECT s.name, s.fee, s.submitted_at, MIN(b.bundle_index), MAX(b.bundle_index) "
+                "FROM bundles b JOIN submissions s ON b.submission = s.name WHERE b.status = ? "
+                "GROUP BY s.name ORDER BY s.submitted_at",
+                (SUBMITTED,),
+            )
+        ]
+        return JobSummary(bundle_counts, launcher_count, fee_paid, confirmed_submissions, last_height, unconfirmed)
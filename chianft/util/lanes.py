@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from chia.types.blockchain_format.coin import Coin
+from chia_rs import SpendBundle
+from chia_rs.sized_bytes import bytes32
+
+
+def bundle_funding_coin(sb: SpendBundle) -> Coin:
+    """
+    The XCH coin a mint spend bundle is funded from. Launchers hold 0 mojos and a DID singleton 1, while a
+    funding coin always holds at least a mojo more than the NFTs it pays for, so it is the only removal
+    holding more than 1 mojo.
+    """
+    return next(coin for coin in sb.removals() if coin.amount > 1)
+
+
+def split_into_lanes(spend_bundles: Sequence[SpendBundle]) -> list[list[int]]:
+    """
+    Group spend bundle indices into independent chains. A bundle belongs to the same chain as any earlier
+    bundle whose additions it spends (the funding coin change, or the DID coin when minting from a DID).
+    Chains are returned in order of their first bundle, and each chain is in submission order.
+    """
+    parents = list(range(len(spend_bundles)))
+
+    def find(i: int) -> int:
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    producers: dict[bytes32, int] = {}
+    for i, sb in enumerate(spend_bundles):
+        for coin in sb.removals():
+            producer = producers.get(coin.name())
+            if producer is not None:
+                parents[find(i)] = find(producer)
+        for coin in sb.additions():
+            producers[coin.name()] = i
+
+    chains: dict[int, list[int]] = {}
+    for i in range(len(spend_bundles)):
+        chains.setdefault(find(i), []).append(i)
+    return list(chains.values())
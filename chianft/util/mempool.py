@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from chia.full_node.full_node_rpc_client import FullNodeRpcClient
+from chia_rs.sized_bytes import bytes32
+
+DEFAULT_MEMPOOL_TTL = 2.0
+
+
+@dataclass(frozen=True)
+class MempoolSnapshot:
+    """
+    A point-in-time view of the node's mempool, indexed for the lookups the Minter needs.
+    """
+
+    items: dict[bytes32, dict[str, Any]]
+    # spend bundle name -> mempool tx id
+    by_sb_name: dict[bytes32, bytes32]
+    # parent coin id of any addition -> mempool tx id
+    by_parent_id: dict[bytes32, bytes32]
+    total_cost: int
+    total_fee: int
+    min_fee_per_cost: float | None
+
+    @classmethod
+    def from_items(cls, items: dict[bytes32, dict[str, Any]]) -> MempoolSnapshot:
+        by_sb_name: dict[bytes32, bytes32] = {}
+        by_parent_id: dict[bytes32, bytes32] = {}
+        total_cost = 0
+        total_fee = 0
+        min_fee_per_cost: float | None = None
+        for tx_id, item in items.items():
+            by_sb_name[bytes32.from_hexstr(item["spend_bundle_name"])] = tx_id
+            for coin in item["additions"]:
+                by_parent_id[bytes32.from_hexstr(coin["parent_coin_info"])] = tx_id
+            total_cost += item["cost"]
+            total_fee += item["fee"]
+            if item["cost"] > 0:
+                fee_per_cost = item["fee"] / item["cost"]
+                if min_fee_per_cost is None or fee_per_cost < min_fee_per_cost:
+                    min_fee_per_cost = fee_per_cost
+        return cls(
+            items=items,
+            by_sb_name=by_sb_name,
+            by_parent_id=by_parent_id,
+            total_cost=total_cost,
+            total_fee=total_fee,
+            min_fee_per_cost=min_fee_per_cost,
+        )
+
+    def item_for_sb_name(self, sb_name: bytes32) -> tuple[bytes32, dict[str, Any]] | None:
+        tx_id = self.by_sb_name.get(sb_name)
+        if tx_id is None:
+            return None
+        return tx_id, self.items[tx_id]
+
+    def item_spending_coin(self, coin_id: bytes32) -> dict[str, Any] | None:
+        tx_id = self.by_parent_id.get(coin_id)
+        if tx_id is None:
+            return None
+        return self.items[tx_id]
+
+
+class MempoolView:
+    """
+    Caches the result of `get_all_mempool_items` for `ttl` seconds so that every mempool question asked
+    while submitting a bundle is answered from a single fetch. Concurrent callers share the same refresh.
+    """
+
+    def __init__(self, node_client: FullNodeRpcClient, ttl: float = DEFAULT_MEMPOOL_TTL) -> None:
+        self.node_client = node_client
+        self.ttl = ttl
+        self._snapshot: MempoolSnapshot | None = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    async def snapshot(self) -> MempoolSnapshot:
+        async with self._lock:
+            if self._snapshot is None or time.monotonic() - self._fetched_at >= self.ttl:
+                mempool_items = await self.node_client.get_all_mempool_items()
+                self._snapshot = MempoolSnapshot.from_items(mempool_items)
+                self._fetched_at = time.monotonic()
+            return self._snapshot
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import itertools
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+DEFAULT_HEADER = [
+    "hash",
+    "uris",
+    "meta_hash",
+    "meta_uris",
+    "license_hash",
+    "license_uris",
+    "edition_number",
+    "edition_total",
+]
+LIST_HEADERS = ["uris", "meta_uris", "license_uris"]
+
+
+def default_header(has_targets: bool | None = False) -> list[str]:
+    header_row = list(DEFAULT_HEADER)
+    if has_targets:
+        header_row.append("target")
+    return header_row
+
+
+def parse_metadata_row(header_row: list[str], row: list[str]) -> tuple[dict[str, Any], str | None]:
+    meta_dict: dict[str, Any] = {header: [] for header in LIST_HEADERS}
+    target = None
+    for i, header in enumerate(header_row):
+        if header in LIST_HEADERS:
+            meta_dict[header].append(row[i])
+        elif header == "target":
+            target = row[i]
+        else:
+            meta_dict[header] = row[i]
+    return meta_dict, target
+
+
+def count_metadata_rows(file_path: Path, has_header: bool | None = False) -> int:
+    with open(file_path, newline="") as f:
+        row_count = sum(1 for _ in csv.reader(f))
+    if has_header and row_count > 0:
+        row_count -= 1
+    return row_count
+
+
+def metadata_file_hash(file_path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def iter_metadata_rows(
+    file_path: Path,
+    has_header: bool | None = False,
+    has_targets: bool | None = False,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[tuple[dict[str, Any], str | None]]:
+    """
+    Yield the metadata and target of each of rows `start` to `stop`, reading the file as it goes.
+    """
+    with open(file_path, newline="") as f:
+        csv_reader = csv.reader(f)
+        if has_header:
+            first_row = next(csv_reader, None)
+            if first_row is None:
+                return
+            header_row = first_row
+        else:
+            header_row = default_header(has_targets)
+        for row in itertools.islice(csv_reader, start, stop):
+            yield parse_metadata_row(header_row, row)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from chia.rpc.rpc_client import RpcClient
+
+# Upper bounds in seconds of the RPC latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class MethodStats:
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def observe(self, seconds: float) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+
+@dataclass
+class SleepStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+class Metrics:
+    """
+    Call counts, payload sizes and latency histograms per RPC method, plus the time spent sleeping in each
+    retry or polling loop. RPCs are only recorded for clients passed to `instrument_client`.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.rpc: dict[str, MethodStats] = {}
+        self.sleeps: dict[str, SleepStats] = {}
+
+    def record_rpc(
+        self, method: str, seconds: float, request_bytes: int, response_bytes: int, error: bool = False
+    ) -> None:
+        stats = self.rpc.setdefault(method, MethodStats())
+        stats.observe(seconds)
+        stats.request_bytes += request_bytes
+        stats.response_bytes += response_bytes
+        if error:
+            stats.errors += 1
+
+    async def sleep(self, reason: str, seconds: float) -> None:
+        start = time.monotonic()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stats = self.sleeps.setdefault(reason, SleepStats())
+            stats.count += 1
+            stats.seconds += time.monotonic() - start
+
+    def to_json_dict(self) -> dict[str, Any]:
+        return {
+            "elapsed_seconds": time.monotonic() - self.started_at,
+            "rpc": {
+                method: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "seconds": stats.seconds,
+                    "mean_seconds": stats.seconds / stats.calls,
+                    "request_bytes": stats.request_bytes,
+                    "response_bytes": stats.response_bytes,
+                    "latency_buckets": {
+                        str(bound): count for bound, count in zip([*LATENCY_BUCKETS, "+Inf"], stats.buckets)
+                    },
+                }
+                for method, stats in sorted(self.rpc.items())
+            },
+            "sleeps": {
+                reason: {"count": stats.count, "seconds": stats.seconds}
+                for reason, stats in sorted(self.sleeps.items())
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP chianft_rpc_calls_total RPC calls made, by method",
+            "# TYPE chianft_rpc_calls_total counter",
+            *(f'chianft_rpc_calls_total{{method="{method}"}} {stats.calls}' for method, stats in self.rpc.items()),
+            "# HELP chianft_rpc_errors_total RPC calls that failed, by method",
+            "# TYPE chianft_rpc_errors_total counter",
+            *(f'chianft_rpc_errors_total{{method="{method}"}} {stats.errors}' for method, stats in self.rpc.items()),
+            "# HELP chianft_rpc_request_bytes_total JSON bytes sent, by method",
+            "# TYPE chianft_rpc_request_bytes_total counter",
+            *(
+                f'chianft_rpc_request_bytes_total{{method="{method}"}} {stats.request_bytes}'
+                for method, stats in self.rpc.items()
+            ),
+            "# HELP chianft_rpc_response_bytes_total JSON bytes received, by method",
+            "# TYPE chianft_rpc_response_bytes_total counter",
+            *(
+                f'chianft_rpc_response_bytes_total{{method="{method}"}} {stats.response_bytes}'
+                for method, stats in self.rpc.items()
+            ),
+            "# HELP chianft_rpc_latency_seconds RPC latency, by method",
+            "# TYPE chianft_rpc_latency_seconds histogram",
+        ]
+        for method, stats in self.rpc.items():
+            cumulative = 0
+            for bound, count in zip([*LATENCY_BUCKETS, "+Inf"], stats.buckets):
+                cumulative += count
+                lines.append(f'chianft_rpc_latency_seconds_bucket{{method="{method}",le="{bound}"}} {cumulative}')
+            lines.append(f'chianft_rpc_latency_seconds_sum{{method="{method}"}} {stats.seconds}')
+            lines.append(f'chianft_rpc_latency_seconds_count{{method="{method}"}} {stats.calls}')
+        lines += [
+            "# HELP chianft_sleep_seconds_total Time spent sleeping in retry and polling loops, by reason",
+            "# TYPE chianft_sleep_seconds_total counter",
+            *(
+                f'chianft_sleep_seconds_total{{reason="{reason}"}} {stats.seconds}'
+                for reason, stats in self.sleeps.items()
+            ),
+            "# HELP chianft_sleeps_total Sleeps in retry and polling loops, by reason",
+            "# TYPE chianft_sleeps_total counter",
+            *(f'chianft_sleeps_total{{reason="{reason}"}} {stats.count}' for reason, stats in self.sleeps.items()),
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, output: Path) -> None:
+        """
+        Write the JSON summary to `<output>.json` and the Prometheus text file to `<output>.prom`.
+        """
+        output = Path(output)
+        with open(output.with_name(output.name + ".json"), "w") as f:
+            json.dump(self.to_json_dict(), f, indent=2)
+        with open(output.with_name(output.name + ".prom"), "w") as f:
+            f.write(self.to_prometheus())
+
+
+def instrument_client(client: RpcClient, metrics: Metrics) -> None:
+    """
+    Time every request `client` makes. All RPC client methods go through `fetch`, so wrapping it on the
+    instance covers every wallet and node call.
+    """
+    fetch = client.fetch
+
+    async def instrumented_fetch(path: str, request_json: dict[str, Any]) -> dict[str, Any]:
+        request_bytes = len(json.dumps(request_json))
+        start = time.monotonic()
+        try:
+            response = await fetch(path, request_json)
+        except Exception:
+            metrics.record_rpc(path, time.monotonic() - start, request_bytes, 0, error=True)
+            raise
+        metrics.record_rpc(path, time.monotonic() - start, request_bytes, len(json.dumps(response)))
+        return response
+
+    client.fetch = instrumented_fetch  # type: ignore[method-assign]
@@ -1,26 +1,20 @@
 from __future__ import annotations
 
 import asyncio
-import csv
+import itertools
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any
 
 from chia.consensus.default_constants import DEFAULT_CONSTANTS
 from chia.full_node.full_node_rpc_client import FullNodeRpcClient
 from chia.types.blockchain_format.coin import Coin
-from chia.types.blockchain_format.program import INFINITE_COST, run_with_cost
-from chia.util.byte_types import hexstr_to_bytes
-from chia.wallet.singleton import SINGLETON_LAUNCHER_PUZZLE_HASH
 from chia.wallet.util.tx_config import DEFAULT_COIN_SELECTION_CONFIG, DEFAULT_TX_CONFIG
-from chia.wallet.util.wallet_types import WalletType
 from chia.wallet.wallet_request_types import (
     Addition,
-    CreateOfferForIDs,
     CreateSignedTransaction,
     DIDGetDID,
     DIDGetInfo,
-    GetWallets,
-    NFTGetWalletDID,
     NFTMintBulk,
     NFTMintBulkResponse,
     NFTMintMetadata,
@@ -31,73 +25,163 @@ from chia_rs import CoinRecord, SpendBundle
 from chia_rs.sized_bytes import bytes32
 from chia_rs.sized_ints import uint16, uint32, uint64
 
+from chianft.util.bundle_store import BundleWriter
+from chianft.util.checkpoint import CreationCheckpoint, LaneCheckpoint, checkpoint_path
+from chianft.util.clients import rpc_error_message
+from chianft.util.cost import FEE_SPEND_COST, MAX_SPEND_BUNDLE_COST, ChunkSizer, spend_bundle_cost
+from chianft.util.fee_pool import FeeCoinPool
+from chianft.util.fees import BlockFillFeeEstimator, FeeEscalation, FeeEstimator
+from chianft.util.job_state import SUBMITTED, JobState, job_state_path, remove_job_state
+from chianft.util.lanes import bundle_funding_coin, split_into_lanes
+from chianft.util.mempool import MempoolView
+from chianft.util.metadata import count_metadata_rows, iter_metadata_rows, metadata_file_hash
+from chianft.util.metrics import Metrics
+from chianft.util.offers import DEFAULT_OFFER_CONCURRENCY, OfferWorker
+from chianft.util.scheduler import BlockFillScheduler
+from chianft.util.tracker import ConfirmationTracker, minted_launcher_ids
+from chianft.util.wallet_cache import DEFAULT_WALLET_CACHE_DIR, get_wallet_map
+
+SPLIT_POLL_INTERVAL = 5
+# How many polls a coin split may go unseen in the mempool before it counts as dropped
+SPLIT_MAX_UNSEEN_POLLS = 3
+# How long to wait for a coin split to confirm while it sits in the mempool
+SPLIT_CONFIRM_TIMEOUT = 30 * 60
+
 
 class Minter:
     def __init__(
         self,
         wallet_client: WalletRpcClient,
         node_client: FullNodeRpcClient,
+        fee_estimator: FeeEstimator | None = None,
+        wallet_cache_dir: Path | None = DEFAULT_WALLET_CACHE_DIR,
+        metrics: Metrics | None = None,
+        fee_escalation: FeeEscalation | None = None,
     ) -> None:
         self.wallet_client = wallet_client
         self.node_client = node_client
+        self.wallet_cache_dir = wallet_cache_dir
+        self.metrics = metrics or Metrics()
+        self.mempool = MempoolView(node_client)
+        self.tracker = ConfirmationTracker(node_client, self.mempool, metrics=self.metrics)
+        self.fee_estimator: FeeEstimator = fee_estimator or BlockFillFeeEstimator()
+        # without it a submitted bundle is only resubmitted once it has been dropped from the mempool
+        self.fee_escalation = fee_escalation
+        # CLVM cost by spend bundle name, so a bundle is only run once however many fee attempts it takes
+        self.bundle_costs: dict[bytes32, int] = {}
 
     async def get_wallet_ids(
         self,
         nft_wallet_id: uint32 | None = None,
     ) -> None:
-        nft_wallets_response = await self.wallet_client.get_wallets(request=GetWallets(type=uint16(WalletType.NFT)))
-        nft_wallets = nft_wallets_response.wallets
+        wallet_map = await get_wallet_map(self.wallet_client, self.wallet_cache_dir)
+        self.fingerprint = int(wallet_map.fingerprint)
+        nft_wallets = wallet_map.nft_wallets
+        # the DID of each NFT wallet, None for the ones without a DID
+        self.nft_wallet_dids = {wallet.wallet_id: wallet.did_id for wallet in nft_wallets}
         if nft_wallet_id is not None:
             if len(nft_wallets) > 1:
-                self.non_did_nft_wallet_ids = [wallet.id for wallet in nft_wallets if wallet.id != nft_wallet_id]
+                self.non_did_nft_wallet_ids = [
+                    wallet.wallet_id for wallet in nft_wallets if wallet.wallet_id != nft_wallet_id
+                ]
             self.nft_wallet_id = nft_wallet_id
             self.did_coin_id = None
             self.did_wallet_id = uint32(0)
 
-            did_id_for_nft = await self.wallet_client.get_nft_wallet_did(NFTGetWalletDID(wallet_id=nft_wallet_id))
-            did_wallets_response = await self.wallet_client.get_wallets(
-                request=GetWallets(type=uint16(WalletType.DECENTRALIZED_ID))
-            )
-            did_wallets = did_wallets_response.wallets
-            for wallet in did_wallets:
-                did_info = await self.wallet_client.get_did_id(DIDGetDID(wallet_id=wallet.id))
-                if did_info.my_did == did_id_for_nft.did_id:
-                    self.did_coin_id = did_info.coin_id
-                    self.did_wallet_id = wallet.id
+            did_id_for_nft = next((wallet.did_id for wallet in nft_wallets if wallet.wallet_id == nft_wallet_id), None)
+            for did_wallet in wallet_map.did_wallets:
+                if did_wallet.my_did == did_id_for_nft:
+                    self.did_coin_id = did_wallet.coin_id
+                    self.did_wallet_id = did_wallet.wallet_id
                     break
         else:
             self.non_did_nft_wallet_ids = []
             for wallet in nft_wallets:
-                did_id = await self.wallet_client.get_nft_wallet_did(NFTGetWalletDID(wallet_id=wallet.id))
-                if did_id is None:
-                    self.non_did_nft_wallet_ids.append(wallet.id)
+                if wallet.did_id is None:
+                    self.non_did_nft_wallet_ids.append(wallet.wallet_id)
                 else:
-                    self.nft_wallet_id = wallet.id
+                    self.nft_wallet_id = wallet.wallet_id
 
-        xch_wallets_response = await self.wallet_client.get_wallets(
-            request=GetWallets(type=uint16(WalletType.STANDARD_WALLET))
-        )
-        xch_wallets = xch_wallets_response.wallets
-        self.xch_wallet_id = xch_wallets[0].id
+        self.xch_wallet_id = wallet_map.xch_wallet_id
 
-    async def get_funding_coin(self, amount: int) -> Coin:
+    async def get_funding_coin(self, amount: int, excluded_coin_ids: list[bytes32] | None = None) -> Coin:
+        csc = DEFAULT_COIN_SELECTION_CONFIG
+        if excluded_coin_ids:
+            csc = csc.override(excluded_coin_ids=excluded_coin_ids)
         coins_response = await self.wallet_client.select_coins(
             request=SelectCoins.from_coin_selection_config(
                 amount=uint64(amount),
                 wallet_id=self.xch_wallet_id,
-                coin_selection_config=DEFAULT_COIN_SELECTION_CONFIG,
+                coin_selection_config=csc,
             )
         )
         if len(coins_response.coins) > 1:
             raise ValueError(f"Bulk minting requires a single coin with value greater than {amount}")
         return coins_response.coins[0]
 
-    async def get_tx_from_mempool(self, sb_name: bytes32) -> tuple[bool, bytes32 | None]:
-        mempool_items = await self.node_client.get_all_mempool_items()
-        for item in mempool_items.items():
-            if bytes32(hexstr_to_bytes(item[1]["spend_bundle_name"])) == sb_name:
-                return True, item[0]
-        return False, None
+    async def get_lane_funding_coins(
+        self, amounts: list[int], excluded_coin_ids: list[bytes32] | None = None
+    ) -> list[Coin]:
+        # Prefer distinct coins the wallet already holds, otherwise split one coin into a coin per lane
+        excluded_coin_ids = excluded_coin_ids or []
+        funding_coins: list[Coin] = []
+        for amount in amounts:
+            try:
+                coin = await self.get_funding_coin(
+                    amount, [*excluded_coin_ids, *(coin.name() for coin in funding_coins)]
+                )
+            except ValueError:
+                break
+            funding_coins.append(coin)
+        if len(funding_coins) == len(amounts):
+            return funding_coins
+        return await self.split_funding_coin(amounts, excluded_coin_ids)
+
+    async def split_funding_coin(
+        self, amounts: list[int], excluded_coin_ids: list[bytes32] | None = None
+    ) -> list[Coin]:
+        """
+        Split one coin into coins of `amounts` in a single transaction, paying the estimated fee for it, and
+        return them once it confirms. Raises ValueError if the split leaves the mempool without confirming, or
+        doesn't confirm within SPLIT_CONFIRM_TIMEOUT seconds.
+        """
+        source_coin = await self.get_funding_coin(sum(amounts), excluded_coin_ids)
+        split_sb = await self.create_split(source_coin, amounts, 0)
+        fee = self.fee_estimator.estimate(await self.mempool.snapshot(), self.spend_cost(split_sb), 1)
+        if fee > 0:
+            if source_coin.amount < sum(amounts) + fee:
+                source_coin = await self.get_funding_coin(sum(amounts) + fee, excluded_coin_ids)
+            split_sb = await self.create_split(source_coin, amounts, fee)
+        split_coins = [coin for coin in split_sb.additions() if coin.parent_coin_info == source_coin.name()]
+        funding_coins = [next(coin for coin in split_coins if coin.amount == amount) for amount in amounts]
+        print(f"Splitting coin {source_coin.name().hex()} into {len(amounts)} funding coins with a fee of {fee}")
+        await self.node_client.push_tx(split_sb)
+        self.mempool.invalidate()
+        unseen_polls = 0
+        for _ in range(SPLIT_CONFIRM_TIMEOUT // SPLIT_POLL_INTERVAL):
+            records = await self.node_client.get_coin_records_by_names([coin.name() for coin in funding_coins])
+            if len(records) == len(funding_coins):
+                return funding_coins
+            snapshot = await self.mempool.snapshot()
+            unseen_polls = 0 if snapshot.item_for_sb_name(split_sb.name()) is not None else unseen_polls + 1
+            if unseen_polls >= SPLIT_MAX_UNSEEN_POLLS:
+                raise ValueError(f"Coin split {split_sb.name().hex()} left the mempool without confirming")
+            await self.metrics.sleep("split_funding_coin", SPLIT_POLL_INTERVAL)
+            self.mempool.invalidate()
+        raise ValueError(f"Coin split {split_sb.name().hex()} did not confirm within {SPLIT_CONFIRM_TIMEOUT} seconds")
+
+    async def create_split(self, source_coin: Coin, amounts: list[int], fee: int) -> SpendBundle:
+        split_tx = await self.wallet_client.create_signed_transactions(
+            CreateSignedTransaction(
+                additions=[Addition(amount=uint64(amount), puzzle_hash=source_coin.puzzle_hash) for amount in amounts],
+                coins=[source_coin],
+                fee=uint64(fee),
+            ),
+            tx_config=DEFAULT_TX_CONFIG,
+        )
+        split_sb = split_tx.signed_tx.spend_bundle
+        assert split_sb is not None
+        return split_sb
 
     async def create_spend_bundles(
         self,
@@ -109,108 +193,241 @@ class Minter:
         royalty_percentage: int | None = 0,
         has_targets: bool | None = True,
         chunk: int | None = 25,
-    ) -> list[bytes]:
-        await self.get_wallet_ids(wallet_id)
-        metadata_list, target_list = read_metadata_csv(metadata_input, has_header=True, has_targets=has_targets)
-        mint_total = len(metadata_list)
-        funding_coin: Coin = await self.get_funding_coin(mint_total)
-        next_coin = funding_coin
-        spend_bundles = []
-        if mint_from_did:
-            did = await self.wallet_client.get_did_id(DIDGetDID(wallet_id=self.did_wallet_id))
-            did_cr = await self.wallet_client.get_did_info(DIDGetInfo(coin_id=did.my_did, latest=True))
-            did_coin_record: CoinRecord | None = await self.node_client.get_coin_record_by_name(did_cr.latest_coin)
-            assert did_coin_record is not None
-            did_coin = did_coin_record.coin
-            assert did_coin is not None
-        else:
-            did_coin = None
-        did_lineage_parent = None
+        lanes: int = 1,
+        auto_chunk: float | None = None,
+        wallet_shards: Sequence[WalletRpcClient] = (),
+    ) -> int:
+        """
+        Write the spend bundles minting every row of `metadata_input` to `bundle_output` and return how many
+        were created. Each bundle holds `chunk` NFTs, or with `auto_chunk` set the first bundle of each lane
+        holds `chunk` NFTs and later ones are packed to cost about that fraction of the maximum block cost,
+        leaving room for the fee spend.
+        `wallet_shards` are the clients of further wallet processes, each minting from its own funding coins
+        with NFT wallet `wallet_id`. Lanes are dealt out between this wallet and the shards in turn, so every
+        wallet signs its share of the bundles at the same time.
+        """
+        if (
+            auto_chunk is not None
+            and not 0 < auto_chunk * DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM <= MAX_SPEND_BUNDLE_COST
+        ):
+            raise ValueError("auto_chunk must be a fraction of the block cost between 0 and 0.5")
+        shards = [self] + [
+            Minter(wallet_client, self.node_client, self.fee_estimator, self.wallet_cache_dir, self.metrics)
+            for wallet_client in wallet_shards
+        ]
+        lanes = max(lanes, len(shards))
+        mint_total = count_metadata_rows(metadata_input, has_header=True)
         assert chunk is not None
         assert royalty_percentage is not None
         assert royalty_address is not None
-        for i in range(0, mint_total, chunk):
-            resp: NFTMintBulkResponse = await self.wallet_client.nft_mint_bulk(
-                NFTMintBulk(
-                    wallet_id=self.nft_wallet_id,
-                    metadata_list=[
-                        NFTMintMetadata.from_json_dict(metadata) for metadata in metadata_list[i : i + chunk]
-                    ],
-                    target_list=target_list[i : i + chunk],
-                    royalty_percentage=uint16.construct_optional(royalty_percentage),
-                    royalty_address=royalty_address,
-                    mint_number_start=uint32(i + 1),
-                    mint_total=uint32(mint_total),
-                    xch_coins=[next_coin],
-                    xch_change_target=next_coin.to_json_dict()["puzzle_hash"],
-                    did_coin=did_coin,
-                    did_lineage_parent=did_lineage_parent,
-                    mint_from_did=bool(mint_from_did),
-                ),
-                tx_config=DEFAULT_TX_CONFIG,
+        if mint_from_did and lanes > 1:
+            # every bundle spends the DID singleton created by the bundle before it, so they form one chain
+            print("Minting from a DID chains every spend bundle through the DID coin, using a single lane")
+            lanes = 1
+            shards = [self]
+        for shard in shards:
+            shard.bundle_costs = self.bundle_costs
+        await asyncio.gather(*(shard.get_wallet_ids(wallet_id) for shard in shards))
+        if len(shards) > 1:
+            # wallet ids are per wallet process, so the id has to be checked in each of them before any funding
+            for shard in shards:
+                if wallet_id not in shard.nft_wallet_dids or shard.nft_wallet_dids[wallet_id] is not None:
+                    raise ValueError(
+                        f"Wallet {shard.fingerprint} on port {shard.wallet_client.port} has no NFT wallet without "
+                        f"a DID with id {wallet_id}"
+                    )
+
+        settings = {
+            "metadata_input": str(Path(metadata_input).resolve()),
+            # an edited file with the same name and row count would otherwise resume minting the old rows' NFTs
+            "metadata_sha256": metadata_file_hash(metadata_input),
+            "mint_total": mint_total,
+            "wallet_id": int(wallet_id),
+            "mint_from_did": bool(mint_from_did),
+            "royalty_address": royalty_address,
+            "royalty_percentage": int(royalty_percentage),
+            "has_targets": bool(has_targets),
+            "chunk": chunk,
+            "lanes": lanes,
+        }
+        target_cost = None
+        if auto_chunk is not None:
+            settings["auto_chunk"] = auto_chunk
+            # at 0.5 the bundle alone may cost all the mempool accepts, so keep room for the fee spend
+            target_cost = min(
+                int(DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM * auto_chunk), MAX_SPEND_BUNDLE_COST - FEE_SPEND_COST
             )
-            if not resp:
-                raise ValueError(f"SpendBundle could not be created for metadata rows: {i} to {i + chunk}")
-            sb = resp.spend_bundle
-            spend_bundles.append(bytes(sb))
-            next_coin = next(c for c in sb.additions() if c.puzzle_hash == funding_coin.puzzle_hash)
+        if len(shards) > 1:
+            # each lane's coins belong to one wallet, so a resumed run must be given the same wallets in order
+            settings["wallet_shards"] = [[int(shard.wallet_client.port), shard.fingerprint] for shard in shards]
+        checkpoint = CreationCheckpoint.load(checkpoint_path(bundle_output), settings)
+        if checkpoint is not None:
+            remaining_rows = sum(lane.stop_row - lane.next_row for lane in checkpoint.lanes.values())
+            print(f"Resuming spend bundle creation with {remaining_rows} of {mint_total} rows remaining")
+        else:
+            Path(bundle_output).unlink(missing_ok=True)
+            # the bundle file is replaced, so the state of submitting the old one no longer applies
+            remove_job_state(job_state_path(bundle_output))
             if mint_from_did:
+                did = await self.wallet_client.get_did_id(DIDGetDID(wallet_id=self.did_wallet_id))
+                did_cr = await self.wallet_client.get_did_info(DIDGetInfo(coin_id=did.my_did, latest=True))
+                did_coin_record: CoinRecord | None = await self.node_client.get_coin_record_by_name(did_cr.latest_coin)
+                assert did_coin_record is not None
+                did_coin = did_coin_record.coin
                 assert did_coin is not None
-                did_lineage_parent = next(c for c in sb.removals() if c.name() == did_coin.name()).parent_coin_info
-                did_coin = next(
-                    c
-                    for c in sb.additions()
-                    if (c.parent_coin_info == did_coin.name()) and (c.amount == did_coin.amount)
+            else:
+                did_coin = None
+
+            # Give each lane a contiguous run of chunks so the lanes' outputs concatenate in row order
+            chunk_starts = list(range(0, mint_total, chunk))
+            lanes = max(1, min(lanes, len(chunk_starts)))
+            lane_size = max(1, -(-len(chunk_starts) // lanes))
+            lane_ranges = [
+                (chunk_starts[i], min(chunk_starts[i] + lane_size * chunk, mint_total))
+                for i in range(0, len(chunk_starts), lane_size)
+            ]
+
+            async def get_shard_funding_coins(shard_index: int) -> list[Coin]:
+                # amounts are offset by the lane index so split coins never share a coin id
+                # a mojo over the NFTs keeps a change coin after every bundle but a lane's last, which the wallet
+                # only creates when there is change left, and keeps the funding coin apart from 1 mojo coins
+                amounts = [
+                    stop - start + lane + 1
+                    for lane, (start, stop) in enumerate(lane_ranges)
+                    if lane % len(shards) == shard_index
+                ]
+                if len(amounts) == 0:
+                    return []
+                if len(amounts) == 1:
+                    return [await shards[shard_index].get_funding_coin(amounts[0])]
+                return await shards[shard_index].get_lane_funding_coins(amounts)
+
+            shard_funding_coins = await asyncio.gather(*(get_shard_funding_coins(i) for i in range(len(shards))))
+            funding_coins = [
+                shard_funding_coins[lane % len(shards)][lane // len(shards)] for lane in range(len(lane_ranges))
+            ]
+            checkpoint = CreationCheckpoint(
+                checkpoint_path(bundle_output),
+                settings,
+                [
+                    LaneCheckpoint(uint32(lane), uint32(start), uint32(stop), funding_coin, did_coin, None)
+                    for lane, ((start, stop), funding_coin) in enumerate(zip(lane_ranges, funding_coins))
+                ],
+            )
+            checkpoint.save()
+
+        async def create_lane(progress: LaneCheckpoint) -> None:
+            shard = shards[progress.lane % len(shards)]
+            next_coin = progress.next_coin
+            did_coin = progress.did_coin
+            did_lineage_parent = progress.did_lineage_parent
+            rows = iter_metadata_rows(
+                metadata_input,
+                has_header=True,
+                has_targets=has_targets,
+                start=progress.next_row,
+                stop=progress.stop_row,
+            )
+            pending_rows: list[tuple[dict[str, Any], str | None]] = []
+            chunk_sizer = ChunkSizer(chunk, target_cost)
+            i = int(progress.next_row)
+            while i < progress.stop_row:
+                size = min(chunk_sizer.size, progress.stop_row - i)
+                pending_rows.extend(itertools.islice(rows, max(0, size - len(pending_rows))))
+                batch = pending_rows[:size]
+                resp: NFTMintBulkResponse = await shard.wallet_client.nft_mint_bulk(
+                    NFTMintBulk(
+                        wallet_id=shard.nft_wallet_id,
+                        metadata_list=[NFTMintMetadata.from_json_dict(metadata) for metadata, _ in batch],
+                        target_list=[target for _, target in batch if target is not None],
+                        royalty_percentage=uint16.construct_optional(royalty_percentage),
+                        royalty_address=royalty_address,
+                        mint_number_start=uint32(i + 1),
+                        mint_total=uint32(mint_total),
+                        xch_coins=[next_coin],
+                        xch_change_target=next_coin.to_json_dict()["puzzle_hash"],
+                        did_coin=did_coin,
+                        did_lineage_parent=did_lineage_parent,
+                        mint_from_did=bool(mint_from_did),
+                    ),
+                    tx_config=DEFAULT_TX_CONFIG,
+                )
+                if not resp:
+                    raise ValueError(f"SpendBundle could not be created for metadata rows: {i} to {i + len(batch)}")
+                sb = resp.spend_bundle
+                sb_cost = self.spend_cost(sb)
+                if not chunk_sizer.observe(len(batch), sb_cost):
+                    print(
+                        f"Spend bundle for rows {i} to {i + len(batch)} costs {sb_cost}, over the target of "
+                        f"{target_cost}. Creating it again with {chunk_sizer.size} NFTs"
+                    )
+                    continue
+                del pending_rows[:size]
+                if i + len(batch) < progress.stop_row:
+                    next_coin = next(c for c in sb.additions() if c.puzzle_hash == next_coin.puzzle_hash)
+                if mint_from_did:
+                    assert did_coin is not None
+                    did_lineage_parent = next(c for c in sb.removals() if c.name() == did_coin.name()).parent_coin_info
+                    did_coin = next(
+                        c
+                        for c in sb.additions()
+                        if (c.parent_coin_info == did_coin.name()) and (c.amount == did_coin.amount)
+                    )
+                    assert did_coin is not None
+                # bundles are numbered in row order, by chunk for fixed chunks and by first row for packed ones
+                bundle_number = i if target_cost is not None else i // chunk
+                # the bundle must be on disk before the checkpoint moves past it
+                writer.append(bundle_number, bytes(sb), chain=progress.lane, cost=sb_cost)
+                writer.flush()
+                i += len(batch)
+                checkpoint.update(
+                    LaneCheckpoint(
+                        progress.lane,
+                        uint32(i),
+                        progress.stop_row,
+                        next_coin,
+                        did_coin,
+                        did_lineage_parent,
+                    )
                 )
-                assert did_coin is not None
-        return spend_bundles
+
+        # bundles are written as each lane produces them, the file index keeps them in row order
+        with BundleWriter(bundle_output) as writer:
+            # let every lane get as far as it can before surfacing a failure, so a rerun redoes as little as possible
+            results = await asyncio.gather(
+                *(create_lane(progress) for progress in checkpoint.lanes.values()), return_exceptions=True
+            )
+            bundle_count = len(writer.entries)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        checkpoint.remove()
+        return bundle_count
 
     def spend_cost(self, spend_bundle: SpendBundle) -> int:
-        sb_cost = 0
-        for spend in spend_bundle.coin_spends:
-            cost, _ = run_with_cost(spend.puzzle_reveal, INFINITE_COST, spend.solution)
-            sb_cost += cost
+        sb_name = spend_bundle.name()
+        sb_cost = self.bundle_costs.get(sb_name)
+        if sb_cost is None:
+            sb_cost = spend_bundle_cost(spend_bundle)
+            self.bundle_costs[sb_name] = sb_cost
         return sb_cost
 
-    async def is_mempool_full(self, sb_cost: int) -> bool:
-        mempool_items = await self.node_client.get_all_mempool_items()
-        costs = 0
-        for key, val in mempool_items.items():
-            costs += val["cost"]
-        if costs + sb_cost >= DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM:
-            return True
-        return False
-
     async def add_fee_to_spend(
         self,
         spend: SpendBundle,
         fee_coin: Coin,
         attempt: int,
-        max_fee: int | None,
+        flat_fee: int | None,
+        min_fee: int = 0,
     ) -> tuple[SpendBundle, int]:
-        if max_fee:
-            total_fee = max_fee
+        if flat_fee:
+            total_fee = max(flat_fee, min_fee)
         else:
-            mempool_items = await self.node_client.get_all_mempool_items()
-            costs = []
-            fees = []
-            fee_per_costs = []
-            for key, val in mempool_items.items():
-                costs.append(val["cost"])
-                fees.append(val["fee"])
-                if val["cost"] > 0:
-                    fee_per_costs.append(val["fee"] / val["cost"])
-            sb_cost = self.spend_cost(spend)
-            if await self.is_mempool_full(sb_cost):
-                fee_to_replace = min(fee_per_costs)
-                if fee_to_replace < 5:
-                    fee_per_cost = 5
-                else:
-                    fee_per_cost = int(fee_to_replace) + 5
-            else:
+            snapshot = await self.mempool.snapshot()
+            total_fee = max(self.fee_estimator.estimate(snapshot, self.spend_cost(spend), attempt), min_fee)
+            if total_fee == 0:
                 # No fee required
                 return spend, 0
-            total_fee = sb_cost * (fee_per_cost * attempt)
         print(f"Fee for inclusion: {total_fee}")
         fee_tx = await self.wallet_client.create_signed_transactions(
             CreateSignedTransaction(
@@ -229,229 +446,369 @@ class Minter:
         spend_with_fee = SpendBundle.aggregate([fee_tx.signed_tx.spend_bundle, spend])
         return spend_with_fee, total_fee
 
-    async def sb_in_mempool(self, sb_name: bytes32) -> bool:
-        mempool_items = await self.node_client.get_all_mempool_items()
-        for item in mempool_items.items():
-            if bytes32(hexstr_to_bytes(item[1]["spend_bundle_name"])) == sb_name:
-                return True
-        return False
-
-    async def tx_confirmed(self, sb: SpendBundle) -> bool:
-        # grab the NFT coins from the spend and check if they are visible to the node_client
-        # we can't check against wallet client b/c they might be transferred during the mint spend
-        removal_ids = [coin.name() for coin in sb.removals() if coin.amount == 0]
-        nft_list = [coin for coin in sb.additions() if coin.amount == 1 and coin.parent_coin_info in removal_ids]
-        confirmed_nfts = 0
-        for nft in nft_list:
-            # Retry up to 10 times to find NFTs on node
-            for j in range(10):
-                record = await self.node_client.get_coin_record_by_name(nft.name())
-                if not record:
-                    await asyncio.sleep(1)
-                    continue
-                else:
-                    confirmed_nfts += 1
-                    break
-        if confirmed_nfts == len(nft_list):
-            return True
-        else:
-            print(f"Only found {confirmed_nfts} of {len(nft_list)} confirmed nfts")
-            return False
-
-    async def monitor_mempool(self, sb: SpendBundle) -> bool:
-        while True:
-            # make sure we find the spend in mempool before going on to check
-            is_in = await self.sb_in_mempool(sb.name())
-            if is_in:
-                break
-            else:
-                # If testing with the sim autofarming
-                confirmed = await self.tx_confirmed(sb)
-                if confirmed:
-                    break
-        while True:
-            if await self.sb_in_mempool(sb.name()):
-                # Tx is still in mempool so keep waiting
-                await asyncio.sleep(5)
-                continue
-            elif await self.tx_confirmed(sb):
-                # Tx has exited mempool and tx is confirmed so return
-                return True
-            else:
-                # Tx has exited mempool but is not confirmed
-
-                return False
+    async def monitor_mempool(self, sb: SpendBundle, escalation: FeeEscalation | None = None) -> int | None:
+        # the confirmed height once the spend is confirmed, None if it was kicked from the mempool without confirming,
+        # and with `escalation` an asyncio.TimeoutError once it is due to be replaced
+        if escalation is None:
+            return await self.tracker.wait_for_height(sb)
+        return await self.tracker.wait_for_height(sb, escalation.after_blocks, escalation.after_seconds)
 
     async def submit_spend(
         self,
         i: int,
         sb: SpendBundle,
         fee_coin: Coin,
-        max_fee: int | None,
-    ) -> SpendBundle:
+        flat_fee: int | None,
+        job_state: JobState | None = None,
+        bundle_indices: list[int] | None = None,
+    ) -> tuple[SpendBundle, int]:
+        """
+        Submit `sb` with a fee until it confirms and return the spend bundle that confirmed and its height.
+        `flat_fee` is paid instead of an estimated fee when it is set. Each attempt is recorded in `job_state`
+        against `bundle_indices` before it is pushed. With fee escalation, a spend bundle that waits in the
+        mempool for too long is replaced by one paying more.
+        """
         max_retries = 10
+        # the submitted spend bundle, and its fee, that the next attempt has to replace in the mempool
+        replacing: tuple[SpendBundle, int] | None = None
         for j in range(max_retries):
-            final_sb, _total_fee = await self.add_fee_to_spend(sb, fee_coin, j + 1, max_fee)
+            min_fee = 0
+            if replacing is not None:
+                assert self.fee_escalation is not None
+                replacement_fee = self.fee_escalation.replacement_fee(replacing[1], fee_coin.amount)
+                if replacement_fee is None:
+                    print(f"The fee of {replacing[1]} can't be raised any further. Waiting for confirmation")
+                    confirmed_height = await self.monitor_mempool(replacing[0])
+                    if confirmed_height is not None:
+                        return replacing[0], confirmed_height
+                    print(f"Spend was kicked from mempool. Retrying {j} of {max_retries}")
+                    replacing = None
+                    continue
+                min_fee = replacement_fee
+            final_sb, total_fee = await self.add_fee_to_spend(sb, fee_coin, j + 1, flat_fee, min_fee)
             print(f"Submitting SB: {final_sb.name()}")
+            if job_state is not None:
+                job_state.record_submitted(bundle_indices or [i], final_sb.name(), total_fee)
             try:
                 resp = await self.node_client.push_tx(final_sb)
+                self.mempool.invalidate()
                 if resp["success"]:
                     # Monitor the progress of tx through the mempool
                     print("Spend successfully submitted. Waiting for confirmation")
-                    tx_confirmed = await self.monitor_mempool(final_sb)
-                    if tx_confirmed:
-                        return final_sb
+                    # the last attempt waits for as long as it takes
+                    escalation = self.fee_escalation if j < max_retries - 1 else None
+                    try:
+                        confirmed_height = await self.monitor_mempool(final_sb, escalation)
+                    except asyncio.TimeoutError as err:
+                        print(f"{err}. Replacing it with a higher fee")
+                        replacing = (final_sb, total_fee)
+                        continue
+                    if confirmed_height is not None:
+                        return final_sb, confirmed_height
                     else:
                         print(f"Spend was kicked from mempool. Retrying {j} of {max_retries}")
+                        replacing = None
                         continue
             except ValueError as err:
-                error_msg = err.args[0]["error"]
+                error_msg = rpc_error_message(err)
+                if replacing is not None:
+                    # the replacement was turned down, or the spend bundle it replaces confirmed in the meantime
+                    print(f"Replacement was not accepted: {error_msg}. Waiting for SB: {replacing[0].name()}")
+                    confirmed_height = await self.monitor_mempool(replacing[0])
+                    if confirmed_height is not None:
+                        return replacing[0], confirmed_height
+                    print(f"Spend was kicked from mempool. Retrying {j} of {max_retries}")
+                    replacing = None
+                    continue
                 if "DOUBLE_SPEND" in error_msg:
                     print("SpendBundle was already submitted, skipping")
                     break
                 print(error_msg)
                 print("retrying in 20 seconds")
-                await asyncio.sleep(20)
+                await self.metrics.sleep("submit_spend_retry", 20)
 
         raise ValueError("Submit spend failed. Wait for a few blocks and retry")
 
-    async def get_unspent_spend_bundle(self, spend_bundles: list[SpendBundle]) -> tuple[Coin, int]:
-        for i, sb in enumerate(spend_bundles):
-            xch_coin_to_spend = next(coin for coin in sb.removals() if coin.amount > 1)
-            coin_record = await self.node_client.get_coin_record_by_name(xch_coin_to_spend.name())
-            assert coin_record is not None
-            if coin_record.spent_block_index == 0:
-                starting_spend_index: int = i
-                return xch_coin_to_spend, starting_spend_index
-        raise ValueError("All spend bundles have been spent")
-
-    async def create_offer(self, launcher_ids: list[str], create_sell_offer: int) -> None:
-        assert self.wallet_client is not None
-        for launcher_id in launcher_ids:
-            offer_dict: dict[str, str] = {
-                launcher_id: "-1",
-                str(self.xch_wallet_id): str(create_sell_offer),
-            }
-            for i in range(10):
-                try:
-                    offer_resp = await self.wallet_client.create_offer_for_ids(
-                        CreateOfferForIDs(offer=offer_dict, fee=uint64(0)),
-                        tx_config=DEFAULT_TX_CONFIG,
-                    )
-                    offer = offer_resp.offer
-                    filepath = f"offers/{launcher_id}.offer"
-                    assert offer is not None
-                    with open(Path(filepath), "w") as file:
-                        file.write(offer.to_bech32())
-                    break
-                except ValueError as err:
-                    print(err)
-                    print("Retrying offer creation in 5 seconds")
-                    await asyncio.sleep(5)
-                    continue
+    async def funding_coin_spent(self, sb: SpendBundle) -> bool:
+        xch_coin_to_spend = bundle_funding_coin(sb)
+        # a funding coin that doesn't exist yet belongs to a bundle after the resume point
+        records = await self.node_client.get_coin_records_by_names([xch_coin_to_spend.name()], include_spent_coins=True)
+        return len(records) > 0 and records[0].spent_block_index > 0
+
+    async def get_unspent_spend_bundle(
+        self,
+        spend_bundles: Sequence[SpendBundle],
+        chain: list[int] | None = None,
+        low: int = 0,
+        high: int | None = None,
+    ) -> tuple[Coin, int]:
+        # Each bundle spends the change of the one before it, so the spent bundles are always a prefix of the
+        # chain and the resume point can be found with a binary search. The bundles before `low` are known to be
+        # spent and the bundles from `high` on are known to be unspent.
+        if chain is None:
+            chain = list(range(len(spend_bundles)))
+        if high is None:
+            high = len(chain)
+        while low < high:
+            mid = (low + high) // 2
+            if await self.funding_coin_spent(spend_bundles[chain[mid]]):
+                low = mid + 1
+            else:
+                high = mid
+        if low == len(chain):
+            raise ValueError("All spend bundles have been spent")
+        xch_coin_to_spend = bundle_funding_coin(spend_bundles[chain[low]])
+        return xch_coin_to_spend, low
+
+    async def resume_chain(
+        self,
+        spend_bundles: Sequence[SpendBundle],
+        chain: list[int],
+        job_state: JobState,
+        new_job: bool = False,
+    ) -> tuple[Coin, int]:
+        """
+        Find where `chain` resumes from the job state. Only the bundles that were submitted without being seen
+        to confirm are looked up on chain, or every bundle of the chain for a `new_job`, and the ones that turn
+        out to have confirmed are recorded.
+        """
+        if new_job:
+            position, submitted = 0, len(chain)
+        else:
+            position, submitted = job_state.resume_position(chain)
+        chain_index = position
+        funding_coin = None
+        if submitted > 0:
+            try:
+                funding_coin, chain_index = await self.get_unspent_spend_bundle(
+                    spend_bundles, chain, low=position, high=position + submitted
+                )
+            except ValueError:
+                chain_index = len(chain)
+        if chain_index > position:
+            confirmed = chain[position:chain_index]
+            funding_coin_ids = [bundle_funding_coin(spend_bundles[i]).name() for i in confirmed]
+            records = await self.node_client.get_coin_records_by_names(funding_coin_ids, include_spent_coins=True)
+            spent_heights = {record.coin.name(): int(record.spent_block_index) for record in records}
+            for i, coin_id in zip(confirmed, funding_coin_ids):
+                # each bundle is recorded at the height its funding coin was spent, with the last attempt's fee
+                job_state.record_confirmed([i], spent_heights.get(coin_id), {i: minted_launcher_ids(spend_bundles[i])})
+        if chain_index == len(chain):
+            raise ValueError("All spend bundles have been spent")
+        if funding_coin is None:
+            funding_coin = bundle_funding_coin(spend_bundles[chain[chain_index]])
+        return funding_coin, chain_index
 
     async def coin_in_mempool(self, funding_coin: Coin) -> SpendBundle | None:
         # the raw spend bundle won't be included in mempool if it has fee added, so we have to check
         # for matching funding coin name in the parent ids of the additions
-        mempool_items = await self.node_client.get_all_mempool_items()
-        for item in mempool_items.items():
-            for coin in item[1]["additions"]:
-                if bytes32.from_hexstr(coin["parent_coin_info"]) == funding_coin.name():
-                    return SpendBundle.from_json_dict(item[1]["spend_bundle"])
-        return None
+        snapshot = await self.mempool.snapshot()
+        item = snapshot.item_spending_coin(funding_coin.name())
+        if item is None:
+            return None
+        return SpendBundle.from_json_dict(item["spend_bundle"])
+
+    async def select_fee_coin(self, amount: int, excluded_coin_ids: list[bytes32]) -> Coin:
+        csc = DEFAULT_COIN_SELECTION_CONFIG.override(excluded_coin_ids=excluded_coin_ids)
+        fee_coin_response = await self.wallet_client.select_coins(
+            request=SelectCoins.from_coin_selection_config(
+                amount=uint64(amount),
+                wallet_id=self.xch_wallet_id,
+                coin_selection_config=csc,
+            )
+        )
+        return fee_coin_response.coins[0]
+
+    async def create_fee_pool(self, fee_budget: int, coin_count: int, excluded_coin_ids: list[bytes32]) -> FeeCoinPool:
+        """
+        Return a pool of `coin_count` coins holding `fee_budget` between them, taken from distinct coins the
+        wallet already holds if it has enough, otherwise split from one coin in a single transaction.
+        """
+        if coin_count == 1:
+            return FeeCoinPool([await self.select_fee_coin(fee_budget, excluded_coin_ids)])
+        # amounts are offset by the coin index so split coins never share a coin id
+        amount = -(-fee_budget // coin_count)
+        coins = await self.get_lane_funding_coins([amount + i for i in range(coin_count)], excluded_coin_ids)
+        return FeeCoinPool(coins)
+
+    async def submit_chain(
+        self,
+        spend_bundles: Sequence[SpendBundle],
+        chain: list[int],
+        fee_pool: FeeCoinPool,
+        fee: int | None,
+        offer_worker: OfferWorker | None = None,
+        costs: Sequence[int] | None = None,
+        scheduler: BlockFillScheduler | None = None,
+        job_state: JobState | None = None,
+    ) -> None:
+        chain_costs = None
+        if costs is not None:
+            chain_costs = [costs[i] for i in chain]
+        elif scheduler is not None:
+            chain_costs = [self.spend_cost(spend_bundles[i]) for i in chain]
+        position = 0
+        while position < len(chain):
+            count = 1
+            if scheduler is not None:
+                assert chain_costs is not None
+                budget = scheduler.budget(await self.mempool.snapshot())
+                count = scheduler.take(chain_costs, budget, start=position)
+            batch = chain[position : position + count]
+            if count > 1:
+                # the change coins between the bundles are created and spent within the aggregate
+                print(f"Aggregating spend bundles {batch[0]} to {batch[-1]}")
+                sb = SpendBundle.aggregate([spend_bundles[i] for i in batch])
+            else:
+                sb = spend_bundles[batch[0]]
+            if chain_costs is not None:
+                self.bundle_costs[sb.name()] = sum(chain_costs[position : position + count])
+            # a flat fee is paid for every bundle in the aggregate
+            batch_fee = fee * count if fee else fee
+            # the coin is kept for every fee attempt, so each replacement spends the coin of the bundle it replaces
+            fee_coin = await fee_pool.lease(batch_fee or 0)
+            try:
+                final_sb, confirmed_height = await self.submit_spend(
+                    batch[0], sb, fee_coin, batch_fee, job_state=job_state, bundle_indices=batch
+                )
+            except BaseException:
+                await fee_pool.retire(fee_coin)
+                raise
+            await fee_pool.release(fee_coin, final_sb)
+
+            launcher_ids = {i: minted_launcher_ids(spend_bundles[i]) for i in batch}
+            if job_state is not None:
+                job_state.record_confirmed(batch, confirmed_height, launcher_ids, name=final_sb.name())
+            if offer_worker is not None:
+                offer_worker.submit([launcher_id.hex() for i in batch for launcher_id in launcher_ids[i]])
+            if count > 1:
+                print(f"Spendbundles {batch[0]} to {batch[-1]} Confirmed")
+            else:
+                print(f"Spendbundle {batch[0]} Confirmed")
+            bs = await self.node_client.get_blockchain_state()
+            mempool_pc = bs["mempool_cost"] / bs["mempool_max_total_cost"]
+            print(f"Mempool utilization: {mempool_pc:.0%}")
+            position += count
 
     async def submit_spend_bundles(
         self,
-        spend_bundles: list[SpendBundle],
+        spend_bundles: Sequence[SpendBundle],
         fee: int | None = None,
         create_sell_offer: int | None = None,
+        lanes: int = 1,
+        chains: list[list[int]] | None = None,
+        costs: Sequence[int] | None = None,
+        offer_concurrency: int = DEFAULT_OFFER_CONCURRENCY,
+        block_share: float | None = None,
+        job_state: JobState | None = None,
+        fee_coins: int | None = None,
     ) -> None:
+        """
+        Submit every bundle that hasn't been spent yet. With `block_share` set, consecutive bundles of a chain
+        are aggregated so that each submission fills up to that fraction of a block, otherwise each bundle is
+        submitted on its own once the one before it has confirmed. With `job_state` set, progress is recorded
+        there as the bundles are submitted and confirmed, and resuming only checks the chain for bundles that
+        were submitted without being seen to confirm. Fees are paid from a pool of `fee_coins` coins, one per
+        lane by default, which each submission leases until its bundles confirm.
+        """
         await self.get_wallet_ids()
-        funding_coin, sb_index = await self.get_unspent_spend_bundle(spend_bundles)
-        if sb_index > 0:
-            print(f"Resuming from spend bundle: {sb_index}")
 
-        # setup a directory for offers if needed
-        if create_sell_offer:
-            Path("offers").mkdir(parents=True, exist_ok=True)
+        # Bundles that spend each other's coins must go in order, independent chains can be in flight together
+        if chains is None:
+            chains = split_into_lanes(spend_bundles)
+        # a job state without any record of the bundles can't tell which of them were already submitted
+        new_job = job_state is not None and job_state.add_bundles(chains)
+        pending_chains: list[list[int]] = []
+        funding_coin_ids: list[bytes32] = []
+        chains_in_mempool = 0
+        for chain in chains:
+            try:
+                if job_state is not None:
+                    funding_coin, chain_index = await self.resume_chain(spend_bundles, chain, job_state, new_job)
+                else:
+                    funding_coin, chain_index = await self.get_unspent_spend_bundle(spend_bundles, chain)
+            except ValueError:
+                continue
+            if chain_index > 0:
+                print(f"Resuming from spend bundle: {chain[chain_index]}")
+            # check current sb is not in mempool, and if it is wait for it to confirm. A bundle the job state has
+            # never submitted can't be there.
+            last_sb = None
+            if job_state is None or new_job or job_state.statuses([chain[chain_index]]) == [SUBMITTED]:
+                last_sb = await self.coin_in_mempool(funding_coin)
+            if last_sb:
+                print(f"Previous tx for spend bundle {chain[chain_index]} is not yet confirmed. Wait a few blocks")
+                chains_in_mempool += 1
+                continue
+            funding_coin_ids.append(funding_coin.name())
+            pending_chains.append(chain[chain_index:])
+        if not pending_chains:
+            if chains_in_mempool:
+                print("Previous tx is not yet confirmed. Wait a few blocks and restart")
+                return None
+            raise ValueError("All spend bundles have been spent")
 
-        # select a coin to use for fees
+        # split the fee budget between the coins of the fee pool
+        lane_count = min(lanes, len(pending_chains))
+        total_pending = sum(len(chain) for chain in pending_chains)
         if fee:
-            estimated_max_fee = len(spend_bundles) * fee
+            fee_budget = total_pending * fee
         else:
-            estimated_max_fee = len(spend_bundles) * self.spend_cost(spend_bundles[0]) * 5
-        csc = DEFAULT_COIN_SELECTION_CONFIG.override(excluded_coin_ids=[funding_coin.name()])
-        fee_coin_response = await self.wallet_client.select_coins(
-            request=SelectCoins.from_coin_selection_config(
-                amount=uint64(estimated_max_fee),
-                wallet_id=self.xch_wallet_id,
-                coin_selection_config=csc,
-            )
-        )
-        fee_coin = fee_coin_response.coins[0]
-
-        # check current sb is not in mempool, and if it is wait for it to confirm and adjust sb_index
-        last_sb = await self.coin_in_mempool(funding_coin)
-        if last_sb:
-            print("Previous tx is not yet confirmed. Wait a few blocks and restart")
-            return None
+            first_index = pending_chains[0][0]
+            first_cost = costs[first_index] if costs is not None else self.spend_cost(spend_bundles[first_index])
+            fee_budget = total_pending * first_cost * 5
+        fee_coin_count = max(1, fee_coins or lane_count)
+        if self.fee_escalation is not None:
+            fee_budget += fee_coin_count * self.fee_escalation.reserve()
+        fee_pool = await self.create_fee_pool(fee_budget, fee_coin_count, funding_coin_ids)
 
-        # Loop through the unspent bundles and try to submit them
-        print(f"Submitting a total of {len(spend_bundles[sb_index:])} spend bundles")
-        for i, sb in enumerate(spend_bundles[sb_index:]):
-            final_sb = await self.submit_spend(i, sb, fee_coin, fee)
+        scheduler = None
+        if block_share:
+            scheduler = BlockFillScheduler(block_share, lanes=lane_count)
 
-            fee_coin_list = [coin for coin in final_sb.additions() if coin.parent_coin_info == fee_coin.name()]
-            if fee_coin_list:
-                fee_coin = fee_coin_list[0]
+        # Each lane works through whole chains, leasing a fee coin per submission, so a stuck lane doesn't hold up
+        # the others
+        print(f"Submitting a total of {total_pending} spend bundles in {lane_count} lane(s)")
+        chain_queue: asyncio.Queue[list[int]] = asyncio.Queue()
+        for pending_chain in pending_chains:
+            chain_queue.put_nowait(pending_chain)
+        failed_bundles: list[int] = []
 
-            launcher_ids = [
-                coin.name().hex() for coin in sb.removals() if coin.puzzle_hash == SINGLETON_LAUNCHER_PUZZLE_HASH
-            ]
-            if create_sell_offer:
-                await self.create_offer(launcher_ids, create_sell_offer)
-            print(f"Spendbundle {sb_index + i} Confirmed")
-            bs = await self.node_client.get_blockchain_state()
-            mempool_pc = bs["mempool_cost"] / bs["mempool_max_total_cost"]
-            print(f"Mempool utilization: {mempool_pc:.0%}")
+        # offers are created in the background as bundles confirm, so submission never waits on them
+        offer_worker = None
+        if create_sell_offer:
+            offer_worker = OfferWorker(
+                self.wallet_client,
+                self.xch_wallet_id,
+                create_sell_offer,
+                concurrency=offer_concurrency,
+                metrics=self.metrics,
+            )
+            offer_worker.start()
 
+        async def run_lane() -> None:
+            while not chain_queue.empty():
+                lane_chain = chain_queue.get_nowait()
+                try:
+                    await self.submit_chain(
+                        spend_bundles,
+                        lane_chain,
+                        fee_pool,
+                        fee,
+                        offer_worker=offer_worker,
+                        costs=costs,
+                        scheduler=scheduler,
+                        job_state=job_state,
+                    )
+                except ValueError as err:
+                    print(f"Lane stopped on chain starting at spend bundle {lane_chain[0]}: {err}")
+                    failed_bundles.append(lane_chain[0])
 
-def read_metadata_csv(
-    file_path: Path,
-    has_header: bool | None = False,
-    has_targets: bool | None = False,
-) -> tuple[list[dict[str, Any]], list[str]]:
-    with open(file_path) as f:
-        csv_reader = csv.reader(f)
-        bulk_data = list(csv_reader)
-    metadata_list: list[dict[str, Any]] = []
-    if has_header:
-        header_row = bulk_data[0]
-        rows = bulk_data[1:]
-    else:
-        header_row = [
-            "hash",
-            "uris",
-            "meta_hash",
-            "meta_uris",
-            "license_hash",
-            "license_uris",
-            "edition_number",
-            "edition_total",
-        ]
-        if has_targets:
-            header_row.append("target")
-        rows = bulk_data
-    list_headers = ["uris", "meta_uris", "license_uris"]
-    targets = []
-    for row in rows:
-        meta_dict: dict[str, Any] = {list_headers[i]: [] for i in range(len(list_headers))}
-        for i, header in enumerate(header_row):
-            if header in list_headers:
-                meta_dict[header].append(row[i])
-            elif header == "target":
-                targets.append(row[i])
-            else:
-                meta_dict[header] = row[i]
-        metadata_list.append(meta_dict)
-    return metadata_list, targets
+        try:
+            await asyncio.gather(*(run_lane() for _ in range(lane_count)))
+        finally:
+            if offer_worker is not None:
+                print("Waiting for offer creation to finish")
+                await offer_worker.close()
+        if failed_bundles:
+            raise ValueError(f"Submit spend failed for chains starting at spend bundles: {sorted(failed_bundles)}")
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from chia.wallet.util.tx_config import DEFAULT_TX_CONFIG
+from chia.wallet.wallet_request_types import CreateOfferForIDs
+from chia.wallet.wallet_rpc_client import WalletRpcClient
+from chia_rs.sized_ints import uint32, uint64
+
+from chianft.util.metrics import Metrics
+
+DEFAULT_OFFER_CONCURRENCY = 4
+
+
+class OfferWorker:
+    """
+    Creates sell offers for confirmed NFTs in the background. Launcher ids are queued with `submit`, up to
+    `concurrency` offers are requested from the wallet at a time, and each offer is written to `offers_dir`
+    as soon as the wallet has made it. An offer that fails is recorded in `failed` and the worker carries on,
+    so `close` always returns once everything queued has been handled.
+    """
+
+    def __init__(
+        self,
+        wallet_client: WalletRpcClient,
+        xch_wallet_id: uint32,
+        price: int,
+        concurrency: int = DEFAULT_OFFER_CONCURRENCY,
+        offers_dir: Path = Path("offers"),
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.wallet_client = wallet_client
+        self.xch_wallet_id = xch_wallet_id
+        self.price = price
+        self.concurrency = concurrency
+        self.offers_dir = offers_dir
+        self.metrics = metrics or Metrics()
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.failed: list[str] = []
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        self.offers_dir.mkdir(parents=True, exist_ok=True)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    def submit(self, launcher_ids: list[str]) -> None:
+        for launcher_id in launcher_ids:
+            self.queue.put_nowait(launcher_id)
+
+    async def close(self) -> None:
+        await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.failed:
+            print(f"Failed to create offers for {len(self.failed)} NFTs: {', '.join(self.failed)}")
+
+    async def _work(self) -> None:
+        while True:
+            launcher_id = await self.queue.get()
+            try:
+                offer = await self.create_offer(launcher_id)
+                if offer is None:
+                    self.failed.append(launcher_id)
+                else:
+                    self.write_offer(launcher_id, offer)
+            except Exception as e:
+                print(f"Failed to create offer for {launcher_id}: {e!r}")
+                self.failed.append(launcher_id)
+            finally:
+                self.queue.task_done()
+
+    async def create_offer(self, launcher_id: str) -> str | None:
+        offer_dict: dict[str, str] = {
+            launcher_id: "-1",
+            str(self.xch_wallet_id): str(self.price),
+        }
+        for i in range(10):
+            try:
+                offer_resp = await self.wallet_client.create_offer_for_ids(
+                    CreateOfferForIDs(offer=offer_dict, fee=uint64(0)),
+                    tx_config=DEFAULT_TX_CONFIG,
+                )
+                offer = offer_resp.offer
+                assert offer is not None
+                return offer.to_bech32()
+            except ValueError as err:
+                print(err)
+                print("Retrying offer creation in 5 seconds")
+                await self.metrics.sleep("create_offer_retry", 5)
+        return None
+
+    def write_offer(self, launcher_id: str, offer: str) -> None:
+        with open(self.offers_dir / f"{launcher_id}.offer", "w") as file:
+            file.write(offer)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+
+from chia_rs import is_canonical_serialization, serialized_length
+from chia_rs.sized_bytes import bytes32
+
+# Programs shorter than a serialized 32 byte atom are always kept inline
+MIN_SHARED_PROGRAM_BYTES = 33
+# What storing a shared program costs on top of its bytes: a record header, its hash, the encoding's
+# header and an index entry. A program is shared once its repeats have cost more than that.
+SHARED_PROGRAM_OVERHEAD = 21 + 32 + 8 + 44
+# How many programs that aren't shared yet have their sightings counted
+RECENT_PROGRAMS = 1 << 16
+# A coin spend starts with its coin: parent coin id, puzzle hash and amount
+COIN_BYTES = 32 + 32 + 8
+U32 = struct.Struct(">I")
+REF = struct.Struct(">II")
+QUOTE = 0x01
+PAIR = 0xFF
+ATOM_SIZE_PREFIX = 0x80
+SMALL_ATOM_SIZE_MASK = 0x3F
+
+# Encoded form of a spend bundle or shared program, which is its serialized bytes with shared programs cut out:
+#   u32 reference count, u32 length and literal bytes,
+#   then for each reference: u32 shared program number, u32 length and the literal bytes that follow it
+
+
+class Segments:
+    def __init__(self) -> None:
+        self.refs: list[int] = []
+        self.literals: list[list[bytes | memoryview]] = [[]]
+
+    def literal(self, data: bytes | memoryview) -> None:
+        if len(data) > 0:
+            self.literals[-1].append(data)
+
+    def ref(self, program_number: int) -> None:
+        self.refs.append(program_number)
+        self.literals.append([])
+
+    def to_bytes(self) -> bytes:
+        literals = [b"".join(parts) for parts in self.literals]
+        parts: list[bytes] = [REF.pack(len(self.refs), len(literals[0])), literals[0]]
+        for program_number, literal in zip(self.refs, literals[1:]):
+            parts += [REF.pack(program_number, len(literal)), literal]
+        return b"".join(parts)
+
+
+def decode_segments(data: bytes, lookup: Callable[[int], bytes]) -> bytes:
+    """
+    Rebuild the serialized bytes of an encoded bundle or program, using `lookup` for each shared program.
+    """
+    ref_count, length = REF.unpack_from(data, 0)
+    position = REF.size + length
+    parts = [data[REF.size : position]]
+    for _ in range(ref_count):
+        program_number, length = REF.unpack_from(data, position)
+        parts.append(lookup(program_number))
+        parts.append(data[position + REF.size : position + REF.size + length])
+        position += REF.size + length
+    return b"".join(parts)
+
+
+class ProgramEncoder:
+    """
+    Cuts the programs that bundles have in common out of their serialized bytes. NFT puzzles are curried, and
+    every curried module and argument is a quoted program, so the singleton, NFT state and ownership layer
+    modules each appear as a quoted program in every NFT's puzzle reveal, along with the same module hashes.
+    Each puzzle reveal, solution, quoted program and atom of 32 bytes or more is keyed by the hash of its
+    serialization and, once its repeats have taken more space than storing it once would, becomes a shared
+    program that later bundles refer to by number. Programs are only cut up when serialized canonically, so
+    the hash identifies a program as surely as its tree hash does, at a small fraction of the cost. Programs
+    that differ between NFTs, like the curried puzzles holding their metadata, stay inline with the shared
+    programs inside them replaced.
+
+    `shared` is the hashes of the shared programs already stored, in order.
+    """
+
+    def __init__(self, shared: Iterable[bytes32] = ()) -> None:
+        self.shared: dict[bytes32, int] = {program_hash: number for number, program_hash in enumerate(shared)}
+        self.sightings: OrderedDict[bytes32, int] = OrderedDict()
+
+    def encode_bundle(self, sb_bytes: bytes) -> tuple[bytes, list[tuple[bytes32, bytes]]]:
+        """
+        Return the encoded bundle and the new shared programs, as (hash, encoded program) in number
+        order, which have to be stored before it.
+        """
+        buf = memoryview(sb_bytes)
+        out = Segments()
+        new_programs: list[tuple[bytes32, bytes]] = []
+        (spend_count,) = U32.unpack_from(buf, 0)
+        out.literal(buf[:4])
+        position = 4
+        for _ in range(spend_count):
+            out.literal(buf[position : position + COIN_BYTES])
+            position += COIN_BYTES
+            # the puzzle reveal and then the solution
+            for _ in range(2):
+                end = position + serialized_length(buf[position:])
+                if is_canonical_serialization(bytes(buf[position:end])):
+                    self.encode_program(buf, position, end, out, new_programs)
+                else:
+                    # back references point at earlier bytes of the same program, so it can't be cut up
+                    out.literal(buf[position:end])
+                position = end
+        out.literal(buf[position:])
+        return out.to_bytes(), new_programs
+
+    def encode_program(
+        self, buf: memoryview, start: int, end: int, out: Segments, new_programs: list[tuple[bytes32, bytes]]
+    ) -> None:
+        if end - start < MIN_SHARED_PROGRAM_BYTES:
+            out.literal(buf[start:end])
+            return
+        program_hash = bytes32(hashlib.sha256(buf[start:end]).digest())
+        program_number = self.shared.get(program_hash)
+        if program_number is not None:
+            out.ref(program_number)
+            return
+        sightings = self.sightings.pop(program_hash, 0) + 1
+        if sightings * (end - start - REF.size) <= end - start + SHARED_PROGRAM_OVERHEAD:
+            self.sightings[program_hash] = sightings
+            if len(self.sightings) > RECENT_PROGRAMS:
+                self.sightings.popitem(last=False)
+            self.encode_nodes(buf, start, end, out, new_programs)
+            return
+        program = Segments()
+        self.encode_nodes(buf, start, end, program, new_programs)
+        program_number = len(self.shared)
+        self.shared[program_hash] = program_number
+        new_programs.append((program_hash, program.to_bytes()))
+        out.ref(program_number)
+
+    def encode_nodes(
+        self, buf: memoryview, start: int, end: int, out: Segments, new_programs: list[tuple[bytes32, bytes]]
+    ) -> None:
+        if buf[start] != PAIR:
+            out.literal(buf[start:end])
+            return
+        # walk the program's nodes in serialization order, looking for quoted programs, (q . X) is 0xff 0x01 X,
+        # and large atoms
+        position = start
+        literal_start = start
+        pending_nodes = 1
+        while pending_nodes > 0:
+            pending_nodes -= 1
+            first_byte = buf[position]
+            if first_byte == PAIR:
+                if buf[position + 1] != QUOTE:
+                    position += 1
+                    pending_nodes += 2
+                    continue
+                node_start = position + 2
+            elif first_byte <= ATOM_SIZE_PREFIX:
+                # nil and single byte atoms
+                position += 1
+                continue
+            else:
+                node_start = position
+            if buf[node_start] & ~SMALL_ATOM_SIZE_MASK == ATOM_SIZE_PREFIX:
+                node_end = node_start + 1 + (buf[node_start] & SMALL_ATOM_SIZE_MASK)
+            else:
+                node_end = node_start + serialized_length(buf[node_start:end])
+            if node_end - node_start >= MIN_SHARED_PROGRAM_BYTES:
+                out.literal(buf[literal_start:node_start])
+                self.encode_program(buf, node_start, node_end, out, new_programs)
+                literal_start = node_end
+            position = node_end
+        out.literal(buf[literal_start:end])
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+
+from chianft.util.cost import FEE_SPEND_COST, MAX_SPEND_BUNDLE_COST
+from chianft.util.mempool import MempoolSnapshot
+
+DEFAULT_BLOCK_SHARE = 0.5
+
+
+class BlockFillScheduler:
+    """
+    Decides how many bundles of a chain to submit at once. Each bundle in a chain spends the change coin of
+    the one before it, and the mempool won't take a spend of a coin created by another unconfirmed item, so
+    the only way to get more than one of them into a block is to aggregate them into a single spend bundle
+    in which the change coins are ephemeral. Aggregates are filled up to `block_share` of the block cost,
+    split between the `lanes` submitting at the same time, and never beyond the room left in the mempool's
+    next block or the most a single spend bundle may cost once the fee spend is added.
+    """
+
+    def __init__(
+        self,
+        block_share: float = DEFAULT_BLOCK_SHARE,
+        lanes: int = 1,
+        block_cost: int = DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM,
+    ) -> None:
+        if not 0 < block_share <= 1:
+            raise ValueError("block_share must be a fraction of the block cost between 0 and 1")
+        self.block_share = block_share
+        self.lanes = max(1, lanes)
+        self.block_cost = block_cost
+
+    def budget(self, snapshot: MempoolSnapshot) -> int:
+        """
+        Return the cost one lane may submit in its next spend bundle.
+        """
+        return min(
+            int(self.block_cost * self.block_share) // self.lanes,
+            self.block_cost - snapshot.total_cost,
+            MAX_SPEND_BUNDLE_COST - FEE_SPEND_COST,
+        )
+
+    def take(self, costs: Sequence[int], budget: int, start: int = 0) -> int:
+        """
+        Return how many of the bundles from `costs[start]` on fit in `budget`. The first one is always
+        taken, so a chain keeps moving when the mempool is full and the fee estimate has to get it in.
+        """
+        end = start
+        total_cost = 0
+        while end < len(costs) and (end == start or total_cost + costs[end] <= budget):
+            total_cost += costs[end]
+            end += 1
+        return end - start
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+
+from chia.full_node.full_node_rpc_client import FullNodeRpcClient
+from chia.wallet.singleton import SINGLETON_LAUNCHER_PUZZLE_HASH
+from chia_rs import SpendBundle
+from chia_rs.sized_bytes import bytes32
+
+from chianft.util.mempool import MempoolView
+from chianft.util.metrics import Metrics
+
+DEFAULT_PEAK_POLL_INTERVAL = 2.0
+# How many new blocks a submitted bundle may go unseen in the mempool before it counts as dropped
+DEFAULT_MAX_UNSEEN_PEAKS = 3
+
+
+def launched_nft_ids(sb: SpendBundle) -> list[bytes32]:
+    # the NFT coins are the 1 mojo children of the spend's launchers (the 0 mojo removals)
+    launcher_ids = {coin.name() for coin in sb.removals() if coin.amount == 0}
+    return [coin.name() for coin in sb.additions() if coin.amount == 1 and coin.parent_coin_info in launcher_ids]
+
+
+def minted_launcher_ids(sb: SpendBundle) -> list[bytes32]:
+    return [coin.name() for coin in sb.removals() if coin.puzzle_hash == SINGLETON_LAUNCHER_PUZZLE_HASH]
+
+
+@dataclass
+class InFlightBundle:
+    missing_nft_ids: set[bytes32]
+    # the confirmed height, or None if the bundle left the mempool unconfirmed
+    result: asyncio.Future[int | None]
+    seen_in_mempool: bool = False
+    unseen_peaks: int = 0
+    confirmed_height: int = 0
+    # give up waiting once the bundle has sat in the mempool for this many blocks
+    max_blocks: int | None = None
+    first_peak: int | None = None
+
+
+class ConfirmationTracker:
+    """
+    Waits for submitted spend bundles to confirm. The node's peak height is polled cheaply, and only when a
+    new block arrives are all in-flight bundles reconciled, with one batched coin record lookup and one
+    mempool fetch shared between them.
+    """
+
+    def __init__(
+        self,
+        node_client: FullNodeRpcClient,
+        mempool: MempoolView,
+        poll_interval: float = DEFAULT_PEAK_POLL_INTERVAL,
+        max_unseen_peaks: int = DEFAULT_MAX_UNSEEN_PEAKS,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.node_client = node_client
+        self.mempool = mempool
+        self.poll_interval = poll_interval
+        self.max_unseen_peaks = max_unseen_peaks
+        self.metrics = metrics or Metrics()
+        self.in_flight: dict[bytes32, InFlightBundle] = {}
+        self._peak_height: int | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def wait_for_height(
+        self, sb: SpendBundle, max_blocks: int | None = None, timeout: float | None = None
+    ) -> int | None:
+        """
+        Return the height `sb` confirmed at, or None if it left the mempool (or never showed up) unconfirmed.
+        Raises asyncio.TimeoutError if it is still waiting in the mempool after `max_blocks` new blocks or `timeout`
+        seconds, whichever comes first.
+        """
+        result: asyncio.Future[int | None] = asyncio.get_running_loop().create_future()
+        self.in_flight[sb.name()] = InFlightBundle(set(launched_nft_ids(sb)), result, max_blocks=max_blocks)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            return await asyncio.wait_for(asyncio.shield(result), timeout)
+        except asyncio.TimeoutError:
+            self.in_flight.pop(sb.name(), None)
+            raise
+
+    async def _run(self) -> None:
+        try:
+            while self.in_flight:
+                blockchain_state = await self.node_client.get_blockchain_state()
+                peak = blockchain_state["peak"]
+                peak_height = None if peak is None else int(peak.height)
+                if peak_height != self._peak_height:
+                    self._peak_height = peak_height
+                    await self.reconcile()
+                if self.in_flight:
+                    await self.metrics.sleep("confirmation_poll", self.poll_interval)
+        except Exception as e:
+            for bundle in self.in_flight.values():
+                if not bundle.result.done():
+                    bundle.result.set_exception(e)
+            self.in_flight.clear()
+
+    async def reconcile(self) -> None:
+        # the mempool is fetched before the coin records, so a bundle that confirms in between is found confirmed
+        # rather than missing from both
+        self.mempool.invalidate()
+        snapshot = await self.mempool.snapshot()
+        missing_nft_ids = [nft_id for bundle in self.in_flight.values() for nft_id in bundle.missing_nft_ids]
+        found_nft_ids: dict[bytes32, int] = {}
+        if missing_nft_ids:
+            records = await self.node_client.get_coin_records_by_names(missing_nft_ids, include_spent_coins=True)
+            found_nft_ids = {record.coin.name(): int(record.confirmed_block_index) for record in records}
+
+        for sb_name, bundle in list(self.in_flight.items()):
+            for nft_id in bundle.missing_nft_ids & found_nft_ids.keys():
+                bundle.confirmed_height = max(bundle.confirmed_height, found_nft_ids[nft_id])
+            bundle.missing_nft_ids -= found_nft_ids.keys()
+            if not bundle.missing_nft_ids:
+                confirmed_height: int | None = bundle.confirmed_height
+            elif sb_name in snapshot.by_sb_name:
+                bundle.seen_in_mempool = True
+                bundle.unseen_peaks = 0
+                if bundle.first_peak is None:
+                    bundle.first_peak = self._peak_height
+                blocks_waited = (self._peak_height or 0) - (bundle.first_peak or 0)
+                if bundle.max_blocks is None or blocks_waited < bundle.max_blocks:
+                    continue
+                del self.in_flight[sb_name]
+                if not bundle.result.done():
+                    bundle.result.set_exception(asyncio.TimeoutError(f"Not included within {blocks_waited} blocks"))
+                continue
+            elif bundle.seen_in_mempool:
+                # Tx has exited mempool but is not confirmed
+                confirmed_height = None
+            else:
+                bundle.unseen_peaks += 1
+                if bundle.unseen_peaks < self.max_unseen_peaks:
+                    continue
+                confirmed_height = None
+            del self.in_flight[sb_name]
+            if not bundle.result.done():
+                bundle.result.set_result(confirmed_height)
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import csv
+import functools
+import itertools
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from chia.util.bech32m import CHARSET, M
+from chia_rs.sized_bytes import bytes32
+
+from chianft.util.metadata import LIST_HEADERS, default_header
+
+HASH_HEADERS = ["hash", "meta_hash", "license_hash"]
+EDITION_HEADERS = ["edition_number", "edition_total"]
+REQUIRED_HEADERS = ["hash", "uris"]
+MAX_EDITION = 2**64 - 1
+# Rows sent to a worker process at a time, large enough that pickling the rows is cheap next to checking them
+VALIDATION_BATCH_ROWS = 5000
+WHITESPACE = re.compile(r"\s")
+
+# A puzzle hash address is the prefix, "1", 52 characters of data holding 32 bytes and a 6 character checksum
+ADDRESS_DATA_LENGTH = 58
+MAX_ADDRESS_LENGTH = 90
+BECH32_VALUES = {char: value for value, char in enumerate(CHARSET)}
+BECH32_GENERATOR = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+# The bech32 checksum step for each value of the checksum's top 5 bits, so each character takes one lookup
+# instead of five, which makes checking addresses several times faster than `decode_puzzle_hash`
+BECH32_POLYMOD_TABLE = tuple(
+    functools.reduce(lambda chk, i: chk ^ (BECH32_GENERATOR[i] if (top >> i) & 1 else 0), range(5), 0)
+    for top in range(32)
+)
+
+
+@dataclass(frozen=True)
+class MetadataRowError:
+    # row number in the file, counting the header row if there is one, as a spreadsheet would show it
+    row: int
+    column: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"Row {self.row}, {self.column}: {self.message}"
+
+
+def hash_error(value: str) -> str | None:
+    try:
+        bytes32.from_hexstr(value)
+    except ValueError:
+        return f"{value!r} is not 32 bytes of hex"
+    return None
+
+
+def uri_error(value: str) -> str | None:
+    if value == "" or WHITESPACE.search(value):
+        return f"{value!r} is not a URI"
+    try:
+        parts = urlsplit(value)
+    except ValueError as e:
+        return f"{value!r} is not a URI: {e}"
+    if not parts.scheme or not (parts.netloc or parts.path):
+        return f"{value!r} is not a URI, it needs a scheme such as https://"
+    return None
+
+
+def edition_value(value: str) -> int | None:
+    if not value.isdecimal() or not value.isascii():
+        return None
+    return int(value)
+
+
+def bech32_polymod(values: list[int], chk: int = 1) -> int:
+    for value in values:
+        chk = ((chk & 0x1FFFFFF) << 5) ^ value ^ BECH32_POLYMOD_TABLE[chk >> 25]
+    return chk
+
+
+@functools.cache
+def prefix_polymod(prefix: str) -> int:
+    # a file has one or two address prefixes at most, so the prefix's part of the checksum is worked out once
+    return bech32_polymod([ord(x) >> 5 for x in prefix] + [0] + [ord(x) & 31 for x in prefix])
+
+
+def target_error(value: str) -> str | None:
+    """
+    Check an address the same way as `decode_puzzle_hash`, which the wallet applies to the target list.
+    """
+    address = value.strip()
+    if address.lower() != address and address.upper() != address:
+        return f"{value!r} is not an address, it mixes upper and lower case"
+    address = address.lower()
+    pos = address.rfind("1")
+    prefix = address[:pos]
+    data = address[pos + 1 :]
+    if pos < 1 or len(address) > MAX_ADDRESS_LENGTH or any(ord(x) < 33 or ord(x) > 126 for x in prefix):
+        return f"{value!r} is not an address"
+    if len(data) != ADDRESS_DATA_LENGTH:
+        return f"{value!r} is not an address of a 32 byte puzzle hash"
+    try:
+        values = [BECH32_VALUES[char] for char in data]
+    except KeyError:
+        return f"{value!r} is not an address, it has characters outside the bech32 alphabet"
+    if bech32_polymod(values, prefix_polymod(prefix)) != M:
+        return f"{value!r} is not an address, the checksum does not match"
+    # the data is 260 bits, the 4 bits after the puzzle hash must be zero padding
+    if values[-7] & 15:
+        return f"{value!r} is not an address of a 32 byte puzzle hash"
+    return None
+
+
+def validate_metadata_row(header_row: list[str], row: list[str]) -> list[tuple[str, str]]:
+    """
+    Return (column, message) for every problem with one row of the metadata csv.
+    """
+    if len(row) != len(header_row):
+        return [("row", f"expected {len(header_row)} columns, found {len(row)}")]
+    errors: list[tuple[str, str]] = []
+    editions: dict[str, int] = {}
+    for header, value in zip(header_row, row):
+        if header in HASH_HEADERS:
+            error = hash_error(value)
+        elif header in LIST_HEADERS:
+            # only the NFT's own uri is required, the metadata and license uris may be left empty
+            error = None if value == "" and header not in REQUIRED_HEADERS else uri_error(value)
+        elif header == "target":
+            error = target_error(value)
+        elif header in EDITION_HEADERS:
+            edition = edition_value(value)
+            if edition is None or not 1 <= edition <= MAX_EDITION:
+                error = f"{value!r} is not a whole number from 1 to {MAX_EDITION}"
+            else:
+                editions[header] = edition
+                error = None
+        else:
+            error = None
+        if error is not None:
+            errors.append((header, error))
+    number = editions.get("edition_number", 0)
+    total = editions.get("edition_total", MAX_EDITION)
+    if number > total:
+        errors.append(("edition_number", f"edition {number} is above the total of {total}"))
+    return errors
+
+
+def validate_metadata_batch(header_row: list[str], first_row: int, rows: list[list[str]]) -> list[MetadataRowError]:
+    return [
+        MetadataRowError(row_number, column, message)
+        for row_number, row in enumerate(rows, first_row)
+        for column, message in validate_metadata_row(header_row, row)
+    ]
+
+
+def validate_header(header_row: list[str], has_targets: bool | None) -> list[MetadataRowError]:
+    required = [*REQUIRED_HEADERS, "target"] if has_targets else REQUIRED_HEADERS
+    return [MetadataRowError(1, header, "column is missing") for header in required if header not in header_row]
+
+
+def validate_metadata_csv(
+    file_path: Path,
+    has_header: bool | None = False,
+    has_targets: bool | None = False,
+    max_workers: int | None = None,
+    batch_rows: int = VALIDATION_BATCH_ROWS,
+) -> list[MetadataRowError]:
+    """
+    Check every row of the metadata csv and return all the problems found, in row order. The file is read
+    in this process and the rows are checked in a process pool, with only a few batches in flight at once
+    so memory stays flat however long the file is. A file of a single batch is checked in this process.
+    """
+    with open(file_path, newline="") as f:
+        csv_reader = csv.reader(f)
+        if has_header:
+            first_row = next(csv_reader, None)
+            if first_row is None:
+                return []
+            header_row = first_row
+            header_errors = validate_header(header_row, has_targets)
+            if header_errors:
+                return header_errors
+        else:
+            header_row = default_header(has_targets)
+        row_offset = 2 if has_header else 1
+        batches = iter(lambda: list(itertools.islice(csv_reader, batch_rows)), [])
+        errors: list[MetadataRowError] = []
+        workers = max_workers or os.cpu_count() or 1
+        first_batch = next(batches, [])
+        second_batch = next(batches, [])
+        if workers == 1 or not second_batch:
+            for batch_index, batch in enumerate(itertools.chain([first_batch, second_batch], batches)):
+                errors.extend(validate_metadata_batch(header_row, row_offset + batch_index * batch_rows, batch))
+            return errors
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: deque[Future[list[MetadataRowError]]] = deque()
+            for batch_index, batch in enumerate(itertools.chain([first_batch, second_batch], batches)):
+                pending.append(
+                    pool.submit(validate_metadata_batch, header_row, row_offset + batch_index * batch_rows, batch)
+                )
+                if len(pending) >= 2 * workers:
+                    errors.extend(pending.popleft().result())
+            while pending:
+                errors.extend(pending.popleft().result())
+        return errors
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from chia.util.default_root import DEFAULT_ROOT_PATH
+from chia.util.streamable import Streamable, streamable
+from chia.wallet.util.wallet_types import WalletType
+from chia.wallet.wallet_request_types import DIDGetDID, GetWallets, NFTGetWalletDID
+from chia.wallet.wallet_rpc_client import WalletRpcClient
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint16, uint32
+
+DEFAULT_WALLET_CACHE_DIR = DEFAULT_ROOT_PATH / "chianft"
+
+
+@streamable
+@dataclass(frozen=True)
+class NFTWalletDID(Streamable):
+    wallet_id: uint32
+    did_id: str | None
+
+
+@streamable
+@dataclass(frozen=True)
+class DIDWallet(Streamable):
+    wallet_id: uint32
+    my_did: str
+    # the DID coin at discovery time, it moves on every DID spend so mints look up the latest coin themselves
+    coin_id: bytes32 | None
+
+
+@streamable
+@dataclass(frozen=True)
+class WalletMap(Streamable):
+    fingerprint: uint32
+    # (wallet id, wallet type) for every wallet, used to check a cached map still matches the wallet
+    wallet_types: list[tuple[uint32, uint16]]
+    xch_wallet_id: uint32
+    nft_wallets: list[NFTWalletDID]
+    did_wallets: list[DIDWallet]
+
+
+def wallet_map_path(cache_dir: Path, fingerprint: int) -> Path:
+    return cache_dir / f"wallet_map_{fingerprint}.json"
+
+
+def load_wallet_map(path: Path) -> WalletMap | None:
+    if not path.exists():
+        return None
+    try:
+        with open(path) as f:
+            return WalletMap.from_json_dict(json.load(f))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def save_wallet_map(path: Path, wallet_map: WalletMap) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(wallet_map.to_json_dict(), f)
+    os.replace(tmp_path, path)
+
+
+async def get_wallet_map(
+    wallet_client: WalletRpcClient, cache_dir: Path | None = DEFAULT_WALLET_CACHE_DIR
+) -> WalletMap:
+    """
+    Return the wallet's NFT wallet to DID to DID wallet mapping. A map cached for the logged in fingerprint is
+    reused as long as the wallet still has exactly the same wallets, which costs a single get_wallets call.
+    """
+    wallets_response = await wallet_client.get_wallets(GetWallets(include_data=False))
+    wallet_types = sorted((wallet.id, uint16(wallet.type)) for wallet in wallets_response.wallets)
+    fingerprint = wallets_response.fingerprint
+    path = None
+    if cache_dir is not None and fingerprint is not None:
+        path = wallet_map_path(cache_dir, fingerprint)
+        cached = load_wallet_map(path)
+        if cached is not None and cached.fingerprint == fingerprint and cached.wallet_types == wallet_types:
+            return cached
+
+    def wallet_ids(wallet_type: WalletType) -> list[uint32]:
+        return [wallet_id for wallet_id, type_ in wallet_types if type_ == wallet_type.value]
+
+    nft_wallet_ids = wallet_ids(WalletType.NFT)
+    did_wallet_ids = wallet_ids(WalletType.DECENTRALIZED_ID)
+    xch_wallet_ids = wallet_ids(WalletType.STANDARD_WALLET)
+    nft_dids, did_infos = await asyncio.gather(
+        asyncio.gather(
+            *(wallet_client.get_nft_wallet_did(NFTGetWalletDID(wallet_id=wallet_id)) for wallet_id in nft_wallet_ids)
+        ),
+        asyncio.gather(*(wallet_client.get_did_id(DIDGetDID(wallet_id=wallet_id)) for wallet_id in did_wallet_ids)),
+    )
+    wallet_map = WalletMap(
+        fingerprint=uint32(fingerprint or 0),
+        wallet_types=wallet_types,
+        xch_wallet_id=xch_wallet_ids[0],
+        nft_wallets=[NFTWalletDID(wallet_id, nft_did.did_id) for wallet_id, nft_did in zip(nft_wallet_ids, nft_dids)],
+        did_wallets=[
+            DIDWallet(wallet_id, did_info.my_did, did_info.coin_id)
+            for wallet_id, did_info in zip(did_wallet_ids, did_infos)
+        ],
+    )
+    if path is not None:
+        save_wallet_map(path, wallet_map)
+    return wallet_map
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import time
+from collections import Counter
+from functools import cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia.rpc.rpc_client import ResponseFailureError
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.serialized_program import SerializedProgram
+from chia.types.coin_spend import make_spend
+from chia.wallet.util.wallet_types import WalletType
+from chia_rs import CoinRecord, G2Element, SpendBundle
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint16, uint32, uint64
+
+from chianft.util.cost import spend_bundle_cost
+from chianft.util.fees import MIN_REPLACEMENT_FEE_BUMP, FeeEscalation
+from chianft.util.metadata import DEFAULT_HEADER
+from chianft.util.mint import Minter
+from chianft.util.tracker import ConfirmationTracker
+
+# Wallet coins use the identity puzzle, so a spend's solution is just its list of conditions. Programs are
+# built with the rust SerializedProgram, which keeps the fake wallet from dominating benchmark timings.
+XCH_PUZZLE = SerializedProgram.to(1)
+XCH_PUZZLE_HASH = XCH_PUZZLE.get_tree_hash()
+NFT_PUZZLE_HASH = SerializedProgram.to(2).get_tree_hash()
+CREATE_COIN = 51
+REMARK = 1
+
+
+@cache
+def launcher_puzzle(index: int) -> SerializedProgram:
+    # (i (q . index) 1 1) returns its solution like the identity puzzle, but hashes differently for each index
+    # so the launchers created by one coin all get distinct coin ids
+    return SerializedProgram.to([3, (1, index), 1, 1])
+
+
+@cache
+def wallet_puzzle(wallet_index: int) -> SerializedProgram:
+    # (f (c 1 (q . index))) also returns its solution, so every fake wallet has its own identity puzzle
+    return XCH_PUZZLE if wallet_index == 0 else SerializedProgram.to([5, [4, 1, (1, wallet_index)]])
+
+
+def spend_coin(coin: Coin, conditions: list[list[Any]], puzzle: SerializedProgram = XCH_PUZZLE) -> SpendBundle:
+    return SpendBundle([make_spend(coin, puzzle, SerializedProgram.to(conditions))], G2Element())
+
+
+class FakeChain:
+    """
+    An in-process stand-in for a full node and wallet. Blocks are farmed on a fixed `block_time` clock,
+    lazily whenever an RPC is made, and each block takes mempool items in fee per cost order up to
+    `block_cost`. `mempool_load` is a list of (cost, fee) items from other users that is topped back up
+    after every block, to benchmark against a busy mempool. Every RPC sleeps for `latency` seconds and is
+    counted in `calls`. A rejected push raises ResponseFailureError, as the RPC client does.
+    """
+
+    def __init__(
+        self,
+        coin_amounts: list[int],
+        block_time: float = 0.05,
+        latency: float = 0.0,
+        mempool_load: list[tuple[int, int]] | None = None,
+        block_cost: int = DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM,
+    ) -> None:
+        self.block_time = block_time
+        self.latency = latency
+        self.mempool_load = mempool_load or []
+        self.block_cost = block_cost
+        self.calls: Counter[str] = Counter()
+        self.height = 0
+        self.coin_records: dict[bytes32, CoinRecord] = {}
+        self.mempool: dict[bytes32, dict[str, Any]] = {}
+        self.mempool_bundles: dict[bytes32, SpendBundle] = {}
+        self.next_block_at = time.monotonic() + block_time
+        for amount in coin_amounts:
+            self.add_coin(amount)
+        self.add_mempool_load()
+
+    def add_coin(self, amount: int, puzzle_hash: bytes32 = XCH_PUZZLE_HASH) -> None:
+        coin = Coin(bytes32(len(self.coin_records).to_bytes(32, "big")), puzzle_hash, uint64(amount))
+        self.coin_records[coin.name()] = CoinRecord(coin, uint32(0), uint32(0), False, uint64(0))
+
+    async def rpc(self, name: str) -> None:
+        self.calls[name] += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        while time.monotonic() >= self.next_block_at:
+            self.farm_block()
+            self.next_block_at += self.block_time
+
+    def add_mempool_load(self) -> None:
+        for i, (cost, fee) in enumerate(self.mempool_load):
+            item_id = bytes32(b"\xff" * 28 + i.to_bytes(4, "big"))
+            self.mempool[item_id] = {
+                "spend_bundle_name": item_id.hex(),
+                "cost": cost,
+                "fee": fee,
+                "additions": [],
+                "removals": [],
+            }
+
+    def farm_block(self) -> None:
+        self.height += 1
+        block_cost = 0
+        for tx_id, item in sorted(self.mempool.items(), key=lambda tx: tx[1]["fee"] / tx[1]["cost"], reverse=True):
+            if block_cost + item["cost"] > self.block_cost:
+                break
+            block_cost += item["cost"]
+            del self.mempool[tx_id]
+            sb = self.mempool_bundles.pop(tx_id, None)
+            if sb is None:
+                continue
+            for coin in sb.additions():
+                self.coin_records[coin.name()] = CoinRecord(coin, uint32(self.height), uint32(0), False, uint64(0))
+            for coin in sb.removals():
+                record = self.coin_records[coin.name()]
+                self.coin_records[coin.name()] = CoinRecord(
+                    coin, record.confirmed_block_index or uint32(self.height), uint32(self.height), False, uint64(0)
+                )
+        self.add_mempool_load()
+
+    def push(self, sb: SpendBundle) -> None:
+        additions = {coin.name() for coin in sb.additions()}
+        removals = {coin.name().hex() for coin in sb.removals()}
+        conflicts: set[bytes32] = set()
+        for coin in sb.removals():
+            if coin.name() in additions:
+                continue
+            record = self.coin_records.get(coin.name())
+            if record is None:
+                raise ResponseFailureError({"success": False, "error": f"UNKNOWN_UNSPENT: {coin.name().hex()}"})
+            if record.spent_block_index > 0:
+                raise ResponseFailureError({"success": False, "error": f"DOUBLE_SPEND: {coin.name().hex()}"})
+            conflicts.update(
+                tx_id
+                for tx_id, item in self.mempool.items()
+                if any(spent["coin"] == coin.name().hex() for spent in item["removals"])
+            )
+        removed = sum(coin.amount for coin in sb.removals())
+        added = sum(coin.amount for coin in sb.additions())
+        cost = spend_bundle_cost(sb)
+        # like the mempool, a spend bundle replaces the items it conflicts with if it spends all their coins
+        # and pays enough more
+        for tx_id in conflicts:
+            item = self.mempool[tx_id]
+            if (
+                not {spent["coin"] for spent in item["removals"]} <= removals
+                or removed - added < item["fee"] + MIN_REPLACEMENT_FEE_BUMP
+                or (removed - added) / cost <= item["fee"] / item["cost"]
+            ):
+                raise ResponseFailureError({"success": False, "error": "DOUBLE_SPEND: conflicts with a mempool item"})
+        for tx_id in conflicts:
+            del self.mempool[tx_id]
+            self.mempool_bundles.pop(tx_id, None)
+        tx_id = sb.name()
+        self.mempool[tx_id] = {
+            "spend_bundle_name": sb.name().hex(),
+            "spend_bundle": sb.to_json_dict(),
+            "cost": cost,
+            "fee": removed - added,
+            "additions": [coin.to_json_dict() for coin in sb.additions()],
+            "removals": [{"coin": coin.name().hex()} for coin in sb.removals()],
+        }
+        self.mempool_bundles[tx_id] = sb
+
+
+class FakeNodeClient:
+    def __init__(self, chain: FakeChain) -> None:
+        self.chain = chain
+
+    async def get_blockchain_state(self) -> dict[str, Any]:
+        await self.chain.rpc("get_blockchain_state")
+        return {
+            "peak": SimpleNamespace(height=uint32(self.chain.height)),
+            "mempool_cost": sum(item["cost"] for item in self.chain.mempool.values()),
+            "mempool_max_total_cost": self.chain.block_cost * 10,
+        }
+
+    async def get_all_mempool_items(self) -> dict[bytes32, dict[str, Any]]:
+        await self.chain.rpc("get_all_mempool_items")
+        return dict(self.chain.mempool)
+
+    async def get_coin_records_by_names(
+        self, names: list[bytes32], include_spent_coins: bool = True
+    ) -> list[CoinRecord]:
+        await self.chain.rpc("get_coin_records_by_names")
+        records = [self.chain.coin_records[name] for name in names if name in self.chain.coin_records]
+        if not include_spent_coins:
+            records = [record for record in records if record.spent_block_index == 0]
+        return records
+
+    async def push_tx(self, spend_bundle: SpendBundle) -> dict[str, Any]:
+        await self.chain.rpc("push_tx")
+        self.chain.push(spend_bundle)
+        return {"success": True, "status": "SUCCESS"}
+
+
+class FakeWalletClient:
+    """
+    A wallet with one standard wallet (id 1) and one NFT wallet without a DID (id 2 by default) that owns every coin
+    with its `wallet_puzzle` on the fake chain. Like a wallet process, it signs one transaction at a time,
+    taking `signing_time` seconds for each.
+    """
+
+    def __init__(self, chain: FakeChain, wallet_index: int = 0, signing_time: float = 0.0) -> None:
+        self.chain = chain
+        self.wallet_index = wallet_index
+        self.puzzle = wallet_puzzle(wallet_index)
+        self.puzzle_hash = self.puzzle.get_tree_hash()
+        self.port = uint16(9256 + wallet_index)
+        # the id of the NFT wallet
+        self.nft_wallet_id = uint32(2)
+        self.signing_time = signing_time
+        self.signing_lock = asyncio.Lock()
+        # (mint_number_start, NFT count) of every nft_mint_bulk call
+        self.mints: list[tuple[int, int]] = []
+
+    async def sign(self) -> None:
+        if self.signing_time > 0:
+            async with self.signing_lock:
+                await asyncio.sleep(self.signing_time)
+
+    async def get_wallets(self, request: Any) -> SimpleNamespace:
+        await self.chain.rpc("get_wallets")
+        wallets = [
+            SimpleNamespace(id=uint32(1), type=WalletType.STANDARD_WALLET),
+            SimpleNamespace(id=self.nft_wallet_id, type=WalletType.NFT),
+        ]
+        return SimpleNamespace(wallets=wallets, fingerprint=uint32(self.wallet_index + 1))
+
+    async def get_nft_wallet_did(self, request: Any) -> SimpleNamespace:
+        await self.chain.rpc("get_nft_wallet_did")
+        return SimpleNamespace(did_id=None)
+
+    async def select_coins(self, request: Any) -> SimpleNamespace:
+        await self.chain.rpc("select_coins")
+        excluded = set(request.excluded_coin_ids or [])
+        coins = sorted(
+            (
+                record.coin
+                for name, record in self.chain.coin_records.items()
+                if record.spent_block_index == 0
+                and record.coin.puzzle_hash == self.puzzle_hash
+                and record.coin.amount >= request.amount
+                and name not in excluded
+            ),
+            key=lambda coin: coin.amount,
+        )
+        if not coins:
+            raise ValueError(f"Could not select a coin of at least {request.amount}")
+        return SimpleNamespace(coins=coins[:1])
+
+    async def create_signed_transactions(self, request: Any, tx_config: Any) -> SimpleNamespace:
+        await self.chain.rpc("create_signed_transactions")
+        await self.sign()
+        conditions = [[CREATE_COIN, addition.puzzle_hash, addition.amount] for addition in request.additions]
+        # like the wallet, what the coins hold beyond the additions and the fee comes back as change
+        change = sum(coin.amount for coin in request.coins) - sum(a.amount for a in request.additions) - request.fee
+        if change > 0:
+            conditions.append([CREATE_COIN, self.puzzle_hash, change])
+        sb = SpendBundle.aggregate(
+            [
+                spend_coin(coin, conditions, self.puzzle) if i == 0 else spend_coin(coin, [], self.puzzle)
+                for i, coin in enumerate(request.coins)
+            ]
+        )
+        return SimpleNamespace(signed_tx=SimpleNamespace(spend_bundle=sb))
+
+    async def nft_mint_bulk(self, request: Any, tx_config: Any) -> SimpleNamespace:
+        await self.chain.rpc("nft_mint_bulk")
+        await self.sign()
+        funding_coin = request.xch_coins[0]
+        mint_count = len(request.metadata_list)
+        self.mints.append((int(request.mint_number_start), mint_count))
+        # like the wallet, a change coin is only created when there is change
+        change = funding_coin.amount - mint_count
+        conditions: list[list[Any]] = []
+        if change > 0:
+            conditions.append([CREATE_COIN, bytes32.from_hexstr(request.xch_change_target), change])
+        spends = []
+        for i, metadata in enumerate(request.metadata_list):
+            # launchers are created with 0 mojos and create a 1 mojo NFT, funded from the XCH coin
+            puzzle = launcher_puzzle(i)
+            conditions.append([CREATE_COIN, puzzle.get_tree_hash(), 0])
+            launcher = Coin(funding_coin.name(), puzzle.get_tree_hash(), uint64(0))
+            spends.append(spend_coin(launcher, [[CREATE_COIN, NFT_PUZZLE_HASH, 1], [REMARK, metadata.hash]], puzzle))
+        funding_spend = spend_coin(funding_coin, conditions, self.puzzle)
+        return SimpleNamespace(spend_bundle=SpendBundle.aggregate([funding_spend, *spends]))
+
+
+def write_metadata(path: Path, rows: int) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(DEFAULT_HEADER)
+        for i in range(rows):
+            data_hash = i.to_bytes(32, "big").hex()
+            writer.writerow(
+                [
+                    data_hash,
+                    f"https://example.com/{i}.png",
+                    data_hash,
+                    f"https://example.com/{i}.json",
+                    data_hash,
+                    "https://example.com/license",
+                    1,
+                    1,
+                ]
+            )
+
+
+def make_minter(chain: FakeChain, poll_interval: float = 0.005, fee_escalation: FeeEscalation | None = None) -> Minter:
+    node_client = FakeNodeClient(chain)
+    wallet_client = FakeWalletClient(chain)
+    minter = Minter(wallet_client, node_client, wallet_cache_dir=None, fee_escalation=fee_escalation)  # type: ignore[arg-type]
+    # the fake chain farms blocks in milliseconds, so poll it at the same pace
+    minter.mempool.ttl = 0
+    minter.tracker = ConfirmationTracker(node_client, minter.mempool, poll_interval=poll_interval)  # type: ignore[arg-type]
+    return minter
+
+
+async def create_bundles(minter: Minter, tmp_path: Path, rows: int, **options: Any) -> tuple[Path, int]:
+    """
+    Write `rows` rows of metadata and create their spend bundles with NFT wallet 2. Returns the path of the
+    bundle file and how many bundles it holds.
+    """
+    metadata_path = tmp_path / "metadata.csv"
+    bundle_path = tmp_path / "output.bundles"
+    write_metadata(metadata_path, rows)
+    bundle_count = await minter.create_spend_bundles(
+        metadata_path, bundle_path, uint32(2), has_targets=False, **options
+    )
+    return bundle_path, bundle_count
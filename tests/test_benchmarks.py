@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import os
+import time
+import tracemalloc
+from collections.abc import Awaitable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeVar
+
+import pytest
+from chia_rs.sized_ints import uint32
+
+from chianft.util.bundle_store import BundleFile
+from chianft.util.cost import bundle_file_costs
+from chianft.util.mint import Minter
+from tests.fake_rpc import FakeChain, FakeNodeClient, FakeWalletClient, create_bundles, make_minter, write_metadata
+
+_T = TypeVar("_T")
+
+# Set to e.g. "1000,100000,1000000" to benchmark larger collections
+BENCHMARK_ROWS = [int(rows) for rows in os.environ.get("CHIANFT_BENCHMARK_ROWS", "1000").split(",")]
+CHUNK = 25
+LANES = 4
+BLOCK_TIME = 0.02
+WALLET_COINS = [10**12] * (2 * LANES)
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    name: str
+    rows: int
+    bundles: int
+    seconds: float
+    rpc_calls: int
+    peak_memory: int
+
+    @property
+    def bundles_per_second(self) -> float:
+        return self.bundles / self.seconds
+
+    @property
+    def rpc_calls_per_bundle(self) -> float:
+        return self.rpc_calls / self.bundles
+
+    def report(self) -> None:
+        print(
+            f"{self.name}: {self.rows} rows, {self.bundles} bundles in {self.seconds:.2f}s, "
+            f"{self.bundles_per_second:.1f} bundles/s, {self.rpc_calls_per_bundle:.2f} RPC calls/bundle, "
+            f"peak memory {self.peak_memory / 2**20:.1f} MiB"
+        )
+
+
+async def measure(chain: FakeChain, work: Awaitable[_T]) -> tuple[_T, float, int, int]:
+    chain.calls.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = await work
+        seconds = time.perf_counter() - start
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, sum(chain.calls.values()), peak_memory
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("rows", BENCHMARK_ROWS)
+async def test_create_spend_bundles_benchmark(tmp_path: Path, rows: int) -> None:
+    chain = FakeChain(WALLET_COINS, block_time=BLOCK_TIME)
+    minter = make_minter(chain, poll_interval=BLOCK_TIME / 4)
+    (_, bundle_count), seconds, rpc_calls, peak_memory = await measure(
+        chain, create_bundles(minter, tmp_path, rows, chunk=CHUNK, lanes=LANES)
+    )
+    result = BenchmarkResult("create_spend_bundles", rows, bundle_count, seconds, rpc_calls, peak_memory)
+    result.report()
+
+    assert bundle_count == -(-rows // CHUNK)
+    # one nft_mint_bulk per bundle plus a fixed amount of wallet discovery and coin selection
+    assert rpc_calls <= bundle_count + 20
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("rows", BENCHMARK_ROWS)
+@pytest.mark.parametrize("block_share", [None, 0.5])
+async def test_submit_spend_bundles_benchmark(tmp_path: Path, rows: int, block_share: float | None) -> None:
+    chain = FakeChain(WALLET_COINS, block_time=BLOCK_TIME)
+    minter = make_minter(chain, poll_interval=BLOCK_TIME / 4)
+    bundle_path, bundle_count = await create_bundles(minter, tmp_path, rows, chunk=CHUNK, lanes=LANES)
+
+    with BundleFile(bundle_path) as spends:
+        work = minter.submit_spend_bundles(
+            spends, lanes=LANES, chains=spends.chains(), costs=bundle_file_costs(spends), block_share=block_share
+        )
+        _, seconds, rpc_calls, peak_memory = await measure(chain, work)
+    name = "submit_spend_bundles" if block_share is None else f"submit_spend_bundles block_share={block_share}"
+    result = BenchmarkResult(name, rows, bundle_count, seconds, rpc_calls, peak_memory)
+    result.report()
+
+    assert chain.mempool_bundles == {}
+    if block_share is None:
+        assert chain.calls["push_tx"] == bundle_count
+        # a push and a progress report per bundle, with confirmation polling shared by every lane
+        assert result.rpc_calls_per_bundle < 8
+    else:
+        # each lane's bundles are aggregated up to its share of the block
+        assert chain.calls["push_tx"] < bundle_count
+        assert result.rpc_calls_per_bundle < 4
+
+
+async def create_sharded(tmp_path: Path, rows: int, shards: int, signing_time: float) -> BenchmarkResult:
+    chain = FakeChain(WALLET_COINS, block_time=BLOCK_TIME)
+    wallets = [FakeWalletClient(chain, wallet_index, signing_time=signing_time) for wallet_index in range(shards)]
+    for wallet in wallets[1:]:
+        chain.add_coin(10**12, wallet.puzzle_hash)
+    minter = Minter(wallets[0], FakeNodeClient(chain), wallet_cache_dir=None)  # type: ignore[arg-type]
+    metadata_path = tmp_path / "metadata.csv"
+    write_metadata(metadata_path, rows)
+    work = minter.create_spend_bundles(
+        metadata_path,
+        tmp_path / f"output_{shards}.bundles",
+        uint32(2),
+        has_targets=False,
+        chunk=CHUNK,
+        lanes=shards,
+        wallet_shards=wallets[1:],  # type: ignore[arg-type]
+    )
+    bundle_count, seconds, rpc_calls, peak_memory = await measure(chain, work)
+    name = f"create_spend_bundles shards={shards}"
+    return BenchmarkResult(name, rows, bundle_count, seconds, rpc_calls, peak_memory)
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("rows", BENCHMARK_ROWS)
+async def test_create_spend_bundles_shards_benchmark(tmp_path: Path, rows: int) -> None:
+    # a wallet process signs one bundle at a time, so creation scales with the number of wallets
+    signing_time = 0.04
+    single = await create_sharded(tmp_path, rows, 1, signing_time)
+    sharded = await create_sharded(tmp_path, rows, 4, signing_time)
+    single.report()
+    sharded.report()
+
+    # timings on shared machines are too noisy to assert on, so the speedup is only reported
+    print(f"create_spend_bundles rows={rows}: 4 shards took {sharded.seconds / single.seconds:.2f}x the time of 1")
+    assert single.bundles == sharded.bundles == -(-rows // CHUNK)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from pathlib import Path
+from secrets import token_bytes
+
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.program import Program
+from chia.types.coin_spend import make_spend
+from chia.util.hash import std_hash
+from chia.wallet.nft_wallet.nft_puzzle_utils import (
+    create_full_puzzle,
+    create_ownership_layer_puzzle,
+    metadata_to_program,
+)
+from chia.wallet.nft_wallet.nft_puzzles import NFT_METADATA_UPDATER_HASH
+from chia.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import puzzle_for_pk
+from chia.wallet.singleton import SINGLETON_LAUNCHER_PUZZLE
+from chia_rs import G1Element, G2Element, SpendBundle
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint16, uint64
+
+from chianft.util.bundle_store import BundleFile, BundleWriter
+from chianft.util.cost import bundle_file_costs, spend_bundle_cost
+
+P2_PUZZLE = puzzle_for_pk(G1Element())
+
+
+def random_bundle() -> SpendBundle:
+    coin = Coin(bytes32(token_bytes(32)), Program.to(1).get_tree_hash(), uint64(100))
+    return SpendBundle([make_spend(coin, Program.to(1), Program.to([]))], G2Element())
+
+
+def nft_bundle(start: int, count: int) -> SpendBundle:
+    """
+    A bundle shaped like one from nft_mint_bulk: a funding spend, then a launcher and an eve spend per NFT
+    with the full singleton, NFT state and ownership layer puzzle.
+    """
+    funding_coin = Coin(std_hash(start.to_bytes(8, "big")), P2_PUZZLE.get_tree_hash(), uint64(10**9))
+    conditions = [[51, P2_PUZZLE.get_tree_hash(), 10**9 - count]]
+    spends = [make_spend(funding_coin, P2_PUZZLE, Program.to([0, (1, conditions), 0]))]
+    for i in range(start, start + count):
+        launcher = Coin(funding_coin.name(), SINGLETON_LAUNCHER_PUZZLE.get_tree_hash(), uint64(i))
+        metadata = metadata_to_program(
+            {
+                b"u": [f"https://example.com/{i}.png"],
+                b"h": std_hash(b"data" + i.to_bytes(8, "big")),
+                b"mu": [f"https://example.com/{i}.json"],
+                b"mh": std_hash(b"meta" + i.to_bytes(8, "big")),
+                b"lu": ["https://example.com/license"],
+                b"lh": std_hash(b"license"),
+                b"sn": i + 1,
+                b"st": 10000,
+            }
+        )
+        inner_puzzle = create_ownership_layer_puzzle(launcher.name(), b"", P2_PUZZLE, uint16(300), std_hash(b"r"))
+        nft_puzzle = create_full_puzzle(launcher.name(), metadata, NFT_METADATA_UPDATER_HASH, inner_puzzle)
+        launcher_solution = Program.to([nft_puzzle.get_tree_hash(), 1, []])
+        spends.append(make_spend(launcher, SINGLETON_LAUNCHER_PUZZLE, launcher_solution))
+        eve_coin = Coin(launcher.name(), nft_puzzle.get_tree_hash(), uint64(1))
+        transfer = [0, (1, [[51, std_hash(b"target" + i.to_bytes(8, "big")), 1]]), 0]
+        spends.append(make_spend(eve_coin, nft_puzzle, Program.to([[funding_coin.name(), i], 1, [[[], transfer]]])))
+    return SpendBundle(spends, G2Element())
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "bundles"
+    bundles = [random_bundle() for _ in range(5)]
+    with BundleWriter(path) as writer:
+        # written out of order, as parallel lanes would
+        for number in [3, 0, 4, 1, 2]:
+            writer.append(number, bytes(bundles[number]), chain=number % 2)
+
+    with BundleFile(path) as bundle_file:
+        assert len(bundle_file) == 5
+        assert list(bundle_file) == bundles
+        assert bundle_file[1:3] == bundles[1:3]
+        assert bundle_file.chains() == [[0, 2, 4], [1, 3]]
+
+
+def test_recover_unclosed_file(tmp_path: Path) -> None:
+    path = tmp_path / "bundles"
+    bundles = [random_bundle() for _ in range(3)]
+    writer = BundleWriter(path)
+    for number, sb in enumerate(bundles):
+        writer.append(number, bytes(sb))
+    writer.flush()
+    # simulate a crash part way through the next record
+    with open(path, "ab") as f:
+        f.write(b"\x00\x00\x10\x00\x00\x00")
+
+    with BundleFile(path) as bundle_file:
+        assert list(bundle_file) == bundles
+
+
+def test_append_to_existing_file(tmp_path: Path) -> None:
+    path = tmp_path / "bundles"
+    bundles = [random_bundle() for _ in range(4)]
+    with BundleWriter(path) as writer:
+        writer.append(0, bytes(bundles[0]))
+        writer.append(1, bytes(bundles[1]))
+
+    with BundleWriter(path) as writer:
+        assert 1 in writer
+        writer.append(2, bytes(bundles[2]))
+        writer.append(3, bytes(bundles[3]))
+
+    with BundleFile(path) as bundle_file:
+        assert list(bundle_file) == bundles
+
+
+def test_bundle_costs(tmp_path: Path) -> None:
+    path = tmp_path / "bundles"
+    bundles = [random_bundle() for _ in range(3)]
+    with BundleWriter(path) as writer:
+        writer.append(0, bytes(bundles[0]), cost=spend_bundle_cost(bundles[0]))
+        writer.append(1, bytes(bundles[1]))
+        writer.append(2, bytes(bundles[2]), cost=12345)
+
+    with BundleFile(path) as bundle_file:
+        assert bundle_file.cost(1) is None
+        costs = bundle_file_costs(bundle_file, max_workers=2)
+    assert costs == [spend_bundle_cost(bundles[0]), spend_bundle_cost(bundles[1]), 12345]
+
+
+def test_shares_nft_puzzles(tmp_path: Path) -> None:
+    path = tmp_path / "bundles"
+    bundles = [nft_bundle(i * 25, 25) for i in range(8)]
+    with BundleWriter(path) as writer:
+        for number, sb in enumerate(bundles):
+            writer.append(number, bytes(sb))
+
+    with BundleFile(path) as bundle_file:
+        assert list(bundle_file) == bundles
+        # the modules and constants are shared, not the coins, launcher ids and metadata of each of the 200 NFTs
+        assert len(bundle_file.programs) < 100
+    assert path.stat().st_size * 5 < sum(len(bytes(sb)) for sb in bundles)
+
+
+def test_resume_and_recover_with_shared_programs(tmp_path: Path) -> None:
+    path = tmp_path / "bundles"
+    bundles = [nft_bundle(i * 5, 5) for i in range(4)]
+    with BundleWriter(path) as writer:
+        writer.append(0, bytes(bundles[0]))
+        writer.append(1, bytes(bundles[1]))
+
+    # the second writer refers to the programs shared by the first one, and never closes the file
+    writer = BundleWriter(path)
+    program_count = len(writer.programs)
+    writer.append(2, bytes(bundles[2]))
+    writer.append(3, bytes(bundles[3]))
+    writer.flush()
+    assert len(writer.programs) == program_count
+
+    with BundleFile(path) as bundle_file:
+        assert list(bundle_file) == bundles
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from pathlib import Path
+from secrets import token_bytes
+
+import pytest
+from chia.types.blockchain_format.coin import Coin
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint32, uint64
+
+from chianft.util.checkpoint import CreationCheckpoint, LaneCheckpoint, checkpoint_path
+from chianft.util.mint import Minter
+from tests.fake_rpc import FakeChain, FakeNodeClient, FakeWalletClient, write_metadata
+
+
+def test_checkpoint_round_trip(tmp_path: Path) -> None:
+    path = checkpoint_path(tmp_path / "output.bundles")
+    settings = {"metadata_input": "metadata.csv", "chunk": 25}
+    coin = Coin(bytes32(token_bytes(32)), bytes32(token_bytes(32)), uint64(100))
+    checkpoint = CreationCheckpoint(
+        path, settings, [LaneCheckpoint(uint32(0), uint32(0), uint32(100), coin, None, None)]
+    )
+    checkpoint.save()
+
+    did_coin = Coin(bytes32(token_bytes(32)), bytes32(token_bytes(32)), uint64(1))
+    lineage_parent = bytes32(token_bytes(32))
+    checkpoint.update(LaneCheckpoint(uint32(0), uint32(25), uint32(100), coin, did_coin, lineage_parent))
+
+    loaded = CreationCheckpoint.load(path, settings)
+    assert loaded is not None
+    assert loaded.lanes[0] == LaneCheckpoint(uint32(0), uint32(25), uint32(100), coin, did_coin, lineage_parent)
+
+    with pytest.raises(ValueError, match="different inputs"):
+        CreationCheckpoint.load(path, {**settings, "chunk": 10})
+
+    loaded.remove()
+    assert CreationCheckpoint.load(path, settings) is None
+
+
+@pytest.mark.asyncio
+async def test_resume_checks_options_and_metadata(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    chain = FakeChain([10**12])
+    minter = Minter(FakeWalletClient(chain), FakeNodeClient(chain), wallet_cache_dir=None)  # type: ignore[arg-type]
+    metadata_path = tmp_path / "metadata.csv"
+    bundle_path = tmp_path / "output.bundles"
+    write_metadata(metadata_path, 50)
+    # the checkpoint of a run is kept, as if it was interrupted after its last chunk
+    monkeypatch.setattr(CreationCheckpoint, "remove", lambda self: None)
+    await minter.create_spend_bundles(metadata_path, bundle_path, uint32(2), has_targets=False)
+
+    with pytest.raises(ValueError, match="different inputs or options"):
+        await minter.create_spend_bundles(
+            metadata_path, bundle_path, uint32(2), has_targets=False, royalty_percentage=500
+        )
+    # the same number of rows with different content
+    metadata_path.write_text(metadata_path.read_text().replace("/0.png", "/zero.png"))
+    with pytest.raises(ValueError, match="different inputs or options"):
+        await minter.create_spend_bundles(metadata_path, bundle_path, uint32(2), has_targets=False)
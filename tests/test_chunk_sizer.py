@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia_rs.sized_ints import uint32
+
+from chianft.util.bundle_store import BundleFile
+from chianft.util.cost import FEE_SPEND_COST, MAX_SPEND_BUNDLE_COST, ChunkSizer, spend_bundle_cost
+from chianft.util.mint import Minter
+from chianft.util.tracker import launched_nft_ids
+from tests.fake_rpc import FakeChain, FakeNodeClient, FakeWalletClient, write_metadata
+
+
+def test_fixed_chunk() -> None:
+    chunk_sizer = ChunkSizer(25)
+    assert chunk_sizer.observe(25, 10**9)
+    assert chunk_sizer.size == 25
+
+
+def test_packs_towards_target() -> None:
+    # 100 fixed cost plus 10 per NFT
+    chunk_sizer = ChunkSizer(10, target_cost=1000)
+    sizes = []
+    for _ in range(4):
+        rows = chunk_sizer.size
+        assert chunk_sizer.observe(rows, 100 + 10 * rows)
+        sizes.append(chunk_sizer.size)
+    assert sizes == [50, 83, 89, 89]
+    assert 100 + 10 * sizes[-1] <= 1000
+
+
+def test_shrinks_bundle_over_target() -> None:
+    chunk_sizer = ChunkSizer(100, target_cost=1000)
+    assert not chunk_sizer.observe(100, 2000)
+    assert chunk_sizer.size == 50
+    # a single NFT over the target can't be split any further
+    assert chunk_sizer.observe(1, 2000)
+
+
+@pytest.mark.asyncio
+async def test_create_spend_bundles_auto_chunk(tmp_path: Path) -> None:
+    chain = FakeChain([10**12])
+    minter = Minter(FakeWalletClient(chain), FakeNodeClient(chain), wallet_cache_dir=None)  # type: ignore[arg-type]
+    metadata_path = tmp_path / "metadata.csv"
+    bundle_path = tmp_path / "output.bundles"
+    write_metadata(metadata_path, 1000)
+    # the fake wallet's bundles cost about 3M plus 5.6M per NFT, and one of 60 NFTs costs exactly this
+    target_cost = 341_372_564
+    bundle_count = await minter.create_spend_bundles(
+        metadata_path,
+        bundle_path,
+        uint32(2),
+        has_targets=False,
+        chunk=10,
+        auto_chunk=target_cost / DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM,
+    )
+
+    with BundleFile(bundle_path) as bundles:
+        assert len(bundles) == bundle_count
+        assert sum(len(launched_nft_ids(sb)) for sb in bundles) == 1000
+        assert all(spend_bundle_cost(sb) <= target_cost for sb in bundles)
+        sizes = [len(launched_nft_ids(sb)) for sb in bundles]
+    # after the first bundle measures the cost per NFT, bundles are packed to within a few NFTs of 60
+    assert sizes[0] == 10
+    assert all(57 <= size <= 60 for size in sizes[1:-1])
+    assert bundle_count == 18
+
+
+@pytest.mark.asyncio
+async def test_auto_chunk_leaves_room_for_fee(tmp_path: Path) -> None:
+    chain = FakeChain([10**12])
+    minter = Minter(FakeWalletClient(chain), FakeNodeClient(chain), wallet_cache_dir=None)  # type: ignore[arg-type]
+    metadata_path = tmp_path / "metadata.csv"
+    bundle_path = tmp_path / "output.bundles"
+    write_metadata(metadata_path, 1100)
+    await minter.create_spend_bundles(
+        metadata_path, bundle_path, uint32(2), has_targets=False, chunk=100, auto_chunk=0.5
+    )
+
+    with BundleFile(bundle_path) as bundles:
+        costs = [spend_bundle_cost(sb) for sb in bundles]
+    assert max(costs) <= MAX_SPEND_BUNDLE_COST - FEE_SPEND_COST
+    # and the bundles are still packed to within a couple of NFTs of that
+    assert max(costs) > MAX_SPEND_BUNDLE_COST - 2 * FEE_SPEND_COST
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import csv
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from chianft.cmds.cli import cli
+from chianft.util.metadata import DEFAULT_HEADER
+
+HEAVY_MODULES = ["chia.wallet", "chia.full_node", "chia.consensus", "chianft.util.mint"]
+
+
+def run_python(*args: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def test_cli_import_is_light() -> None:
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, chianft.cmds.cli; print('\\n'.join(sys.modules))"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    modules = result.stdout.split()
+    assert [module for module in HEAVY_MODULES if module in modules] == []
+
+
+@pytest.mark.benchmark
+def test_cli_startup_time() -> None:
+    # reported against importing the minting code in the same environment, test_cli_import_is_light is the check
+    heavy_import_time = min(run_python("-c", "import chianft.util.mint") for _ in range(3))
+    help_time = min(run_python("-m", "chianft.cmds.cli", "--help") for _ in range(3))
+    print(f"cli --help: {help_time:.3f}s, importing chianft.util.mint: {heavy_import_time:.3f}s")
+
+
+def write_metadata_without_targets(path: Path, rows: list[list[str]]) -> Path:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(DEFAULT_HEADER)
+        writer.writerows(rows)
+    return path
+
+
+def test_target_column_only_required_with_has_targets(tmp_path: Path) -> None:
+    # a bad hash makes validation fail before any RPC connection, so the output shows which checks ran
+    metadata_path = write_metadata_without_targets(tmp_path / "metadata.csv", [["nothex", *[""] * 7]])
+    runner = CliRunner()
+    args = ["create-mint-spend-bundles", "-w", "2", str(metadata_path), str(tmp_path / "bundles.pkl")]
+
+    result = runner.invoke(cli, args)
+    assert "target:" not in result.output
+    assert "Row 2, hash:" in result.output
+    assert result.exit_code == 1
+
+    result = runner.invoke(cli, [*args, "-t", "True"])
+    assert "target: column is missing" in result.output
+    assert result.exit_code == 1
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from chia.rpc.rpc_client import ResponseFailureError
+from chia.wallet.wallet_rpc_client import WalletRpcClient
+
+from chianft.util import clients
+from chianft.util.clients import RpcConnections, rpc_error_message
+
+CONFIG = {
+    "self_hostname": "localhost",
+    "daemon_ssl": {"private_crt": "daemon.crt", "private_key": "daemon.key"},
+    "full_node": {"rpc_port": 8555},
+    "wallet": {"rpc_port": 9256},
+    "farmer": {
+        "selected_network": "testnet",
+        "network_overrides": {"constants": {"testnet": {"GENESIS_CHALLENGE": "ab" * 32}}},
+    },
+}
+
+
+@pytest.mark.asyncio
+async def test_connections_share_config_and_session(monkeypatch: pytest.MonkeyPatch) -> None:
+    config_loads: list[Path] = []
+    logins: list[int] = []
+
+    def load_config(root_path: Path, filename: str) -> dict[str, Any]:
+        config_loads.append(root_path)
+        return CONFIG
+
+    async def get_logged_in_fingerprint(self: WalletRpcClient) -> SimpleNamespace:
+        return SimpleNamespace(fingerprint=1)
+
+    async def log_in(self: WalletRpcClient, request: Any) -> None:
+        logins.append(request.fingerprint)
+
+    monkeypatch.setattr(clients, "load_config", load_config)
+    monkeypatch.setattr(clients, "private_ssl_ca_paths", lambda root_path, config: (None, None))
+    monkeypatch.setattr(clients, "ssl_context_for_client", lambda *paths: None)
+    monkeypatch.setattr(WalletRpcClient, "get_logged_in_fingerprint", get_logged_in_fingerprint)
+    monkeypatch.setattr(WalletRpcClient, "log_in", log_in)
+
+    async with RpcConnections() as connections:
+        maybe_clients = await connections.get_node_and_wallet_clients(None, None, 2)
+        assert maybe_clients is not None
+        node_client, wallet_client = maybe_clients
+        assert node_client.url == "https://localhost:8555/"
+        assert wallet_client.url == "https://localhost:9256/"
+        assert node_client.session is wallet_client.session
+        assert logins == [2]
+        # the logged in wallet is not switched again, and the same client is handed out
+        assert await connections.wallet_client(fingerprint=1) is wallet_client
+        assert logins == [2]
+        assert connections.additional_data() == bytes.fromhex("ab" * 32)
+        session = node_client.session
+
+    assert session.closed
+    assert len(config_loads) == 1
+
+
+def test_rpc_error_message() -> None:
+    err = ResponseFailureError({"success": False, "error": "DOUBLE_SPEND"})
+    assert rpc_error_message(err) == "DOUBLE_SPEND"
+    assert rpc_error_message(ValueError("no connection")) == "no connection"
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from secrets import token_bytes
+
+import pytest
+from chia.types.blockchain_format.coin import Coin
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint64
+
+from chianft.util.bundle_store import BundleFile
+from chianft.util.fee_pool import FeeCoinPool
+from tests.fake_rpc import XCH_PUZZLE_HASH, FakeChain, create_bundles, make_minter, spend_coin
+
+
+def make_coin(amount: int) -> Coin:
+    return Coin(bytes32(token_bytes(32)), XCH_PUZZLE_HASH, uint64(amount))
+
+
+@pytest.mark.asyncio
+async def test_lease_release_and_retire() -> None:
+    small, large = make_coin(100), make_coin(1000)
+    pool = FeeCoinPool([small, large])
+
+    assert await pool.lease() == large
+    # the change of the fee spend goes back into the pool
+    change = Coin(large.name(), XCH_PUZZLE_HASH, uint64(900))
+    await pool.release(large, spend_coin(large, [[51, XCH_PUZZLE_HASH, 900]]))
+    assert await pool.lease(200) == change
+
+    # a submission waits for a coin large enough to be returned
+    waiting = asyncio.create_task(pool.lease(200))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    await pool.release(change)
+    assert await waiting == change
+
+    # once the only large enough coin is retired there is nothing to wait for
+    waiting = asyncio.create_task(pool.lease(200))
+    await asyncio.sleep(0)
+    await pool.retire(change)
+    with pytest.raises(ValueError, match="No coin left in the fee pool holds 200 mojos"):
+        await waiting
+    assert pool.coin_ids() == [small.name()]
+
+
+@pytest.mark.asyncio
+async def test_submit_splits_fee_budget(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    chain = FakeChain([10**12, 10**12, 10**6], block_time=0.02)
+    minter = make_minter(chain)
+    monkeypatch.setattr(minter.metrics, "sleep", lambda reason, seconds: asyncio.sleep(0.01))
+    bundle_path, _ = await create_bundles(minter, tmp_path, 200, lanes=2)
+
+    with BundleFile(bundle_path) as spends:
+        chain.calls.clear()
+        await minter.submit_spend_bundles(spends, fee=100, lanes=2, chains=spends.chains(), block_share=0, fee_coins=4)
+
+    assert chain.mempool_bundles == {}
+    # the lanes were funded from two of the coins, so the fee budget of 800 was split from the third into four
+    # coins in one transaction, then each bundle was pushed with a fee from a leased coin
+    assert chain.calls["push_tx"] == 1 + 8
+    fee_coins = [record for record in chain.coin_records.values() if 200 <= record.coin.amount <= 203]
+    assert len(fee_coins) == 4
+    assert all(record.spent_block_index > 0 for record in fee_coins)
+
+
+@pytest.mark.asyncio
+async def test_split_dropped_from_mempool_fails(monkeypatch: pytest.MonkeyPatch) -> None:
+    chain = FakeChain([10**12], block_time=0.02)
+    minter = make_minter(chain)
+    await minter.get_wallet_ids()
+    monkeypatch.setattr(minter.metrics, "sleep", lambda reason, seconds: asyncio.sleep(0.01))
+    # the node accepts the split, but it never makes it into the mempool
+    monkeypatch.setattr(chain, "push", lambda sb: None)
+
+    with pytest.raises(ValueError, match="left the mempool without confirming"):
+        await minter.split_funding_coin([100, 101])
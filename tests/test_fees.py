@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from pathlib import Path
+from secrets import token_bytes
+from typing import Any
+
+import pytest
+from chia.rpc.rpc_client import ResponseFailureError
+from chia_rs import SpendBundle
+from chia_rs.sized_bytes import bytes32
+
+from chianft.util.bundle_store import BundleFile
+from chianft.util.fees import BlockFillFeeEstimator, FeeEscalation, fee_rate_distribution, marginal_fee_per_cost
+from chianft.util.mempool import MempoolSnapshot
+from tests.fake_rpc import FakeChain, create_bundles, make_minter
+
+
+def make_snapshot(items: list[tuple[int, int]]) -> MempoolSnapshot:
+    mempool_items: dict[bytes32, dict[str, Any]] = {}
+    for cost, fee in items:
+        mempool_items[bytes32(token_bytes(32))] = {
+            "spend_bundle_name": bytes32(token_bytes(32)).hex(),
+            "cost": cost,
+            "fee": fee,
+            "additions": [],
+        }
+    return MempoolSnapshot.from_items(mempool_items)
+
+
+def test_fee_rate_distribution() -> None:
+    snapshot = make_snapshot([(100, 100), (100, 1000), (50, 0)])
+    assert fee_rate_distribution(snapshot) == [(10.0, 100), (1.0, 100), (0.0, 50)]
+
+
+def test_marginal_fee_per_cost() -> None:
+    distribution = [(30.0, 100), (20.0, 100), (10.0, 100)]
+    assert marginal_fee_per_cost(distribution, 250) == 10.0
+    assert marginal_fee_per_cost(distribution, 150) == 20.0
+    assert marginal_fee_per_cost(distribution, 300) is None
+
+
+def test_no_fee_when_block_has_room() -> None:
+    estimator = BlockFillFeeEstimator(block_cost=1000)
+    assert estimator.estimate(make_snapshot([(100, 0)]), sb_cost=100, attempt=1) == 0
+
+
+def test_fee_beats_marginal_item() -> None:
+    estimator = BlockFillFeeEstimator(block_cost=1000)
+    snapshot = make_snapshot([(500, 15000), (400, 8000), (300, 1500)])
+    # only 300 of the 1000 block cost is left after the 30 fee per cost item, so the bundle has to outbid the 20
+    assert estimator.estimate(snapshot, sb_cost=200, attempt=1) == 200 * 21
+    assert estimator.estimate(snapshot, sb_cost=200, attempt=3) == 200 * 23
+
+
+def test_fee_for_target_blocks_and_cap() -> None:
+    snapshot = make_snapshot([(500, 15000), (400, 8000), (300, 1500)])
+    assert BlockFillFeeEstimator(target_blocks=2, block_cost=1000).estimate(snapshot, 200, 1) == 0
+    assert BlockFillFeeEstimator(max_fee=1000, block_cost=1000).estimate(snapshot, 200, 1) == 1000
+
+
+def test_replacement_fee_bump_and_cap() -> None:
+    escalation = FeeEscalation(min_bump=100, max_fee=350)
+    assert escalation.replacement_fee(0, available=1000) == 100
+    assert escalation.replacement_fee(200, available=1000) == 300
+    assert escalation.replacement_fee(300, available=1000) is None
+    # never more than the fee coin holds
+    assert escalation.replacement_fee(0, available=50) is None
+    assert FeeEscalation(min_bump=100).replacement_fee(10**12, available=10**13) == 10**12 + 100
+
+
+@pytest.mark.asyncio
+async def test_stuck_bundle_is_replaced_with_higher_fee(tmp_path: Path) -> None:
+    chain = FakeChain([10**12, 10**12], block_time=0.02)
+    escalation = FeeEscalation(after_blocks=2)
+    minter = make_minter(chain, fee_escalation=escalation)
+    bundle_path, _ = await create_bundles(minter, tmp_path, 50)
+
+    with BundleFile(bundle_path) as spends:
+        # other users fill every block paying more per cost than a fee of 10, but less than a replacement
+        sb_cost = minter.spend_cost(spends[0])
+        chain.mempool_load = [(chain.block_cost, chain.block_cost * 10**6 // sb_cost)]
+        chain.add_mempool_load()
+        chain.calls.clear()
+        await minter.submit_spend_bundles(spends, fee=10, chains=spends.chains(), block_share=0)
+
+    assert chain.mempool_bundles == {}
+    # every bundle sat in the mempool for two blocks before a replacement paying the minimum bump more got in
+    assert chain.calls["push_tx"] == 2 * len(spends)
+
+
+@pytest.mark.asyncio
+async def test_rejected_replacement_waits_for_replaced_bundle(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    chain = FakeChain([10**12, 10**12], block_time=0.02)
+    # a bump below the mempool's minimum, so every replacement is turned down
+    escalation = FeeEscalation(after_blocks=2, min_bump=1000)
+    minter = make_minter(chain, fee_escalation=escalation)
+    bundle_path, _ = await create_bundles(minter, tmp_path, 50)
+
+    push = chain.push
+
+    def push_then_clear_load(sb: SpendBundle) -> None:
+        try:
+            push(sb)
+        except ResponseFailureError:
+            # the other users' spends go through, so the bundle that wasn't replaced gets in
+            chain.mempool_load = []
+            raise
+
+    monkeypatch.setattr(chain, "push", push_then_clear_load)
+    with BundleFile(bundle_path) as spends:
+        chain.mempool_load = [(chain.block_cost, chain.block_cost)]
+        chain.add_mempool_load()
+        chain.calls.clear()
+        await minter.submit_spend_bundles(spends, fee=10, chains=spends.chains(), block_share=0)
+
+    assert chain.mempool_bundles == {}
+    # the first bundle's replacement was rejected, the rest went straight in
+    assert chain.calls["push_tx"] == len(spends) + 1
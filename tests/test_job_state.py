@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from pathlib import Path
+from secrets import token_bytes
+
+import pytest
+from chia_rs.sized_bytes import bytes32
+
+from chianft.util.bundle_store import BundleFile
+from chianft.util.job_state import JobState, job_state_path
+from tests.fake_rpc import FakeChain, create_bundles, make_minter
+
+
+def test_job_state_round_trip(tmp_path: Path) -> None:
+    path = job_state_path(tmp_path / "output.bundles")
+    launcher_ids = [bytes32(token_bytes(32)) for _ in range(4)]
+    first_attempt = bytes32(token_bytes(32))
+    second_attempt = bytes32(token_bytes(32))
+    with JobState(path) as job_state:
+        assert job_state.add_bundles([[0, 2, 4], [1, 3]])
+        assert job_state.resume_position([0, 2, 4]) == (0, 0)
+
+        job_state.record_submitted([0, 2], first_attempt, 100)
+        job_state.record_submitted([0, 2], second_attempt, 200)
+        job_state.record_confirmed([0, 2], 7, {0: launcher_ids[:2], 2: launcher_ids[2:]}, name=second_attempt)
+        job_state.record_submitted([1], bytes32(token_bytes(32)), 50)
+
+    # reopened, as a rerun would
+    with JobState(path) as job_state:
+        assert not job_state.add_bundles([[0, 2, 4], [1, 3]])
+        assert job_state.resume_position([0, 2, 4]) == (2, 0)
+        assert job_state.resume_position([1, 3]) == (0, 1)
+        assert job_state.launcher_ids() == launcher_ids
+        summary = job_state.summary()
+        assert summary.bundle_counts == {"pending": 2, "submitted": 1, "confirmed": 2}
+        assert summary.launcher_count == 4
+        # only the attempt that confirmed was paid
+        assert (summary.fee_paid, summary.confirmed_submissions, summary.last_confirmed_height) == (200, 1, 7)
+        assert [(s.fee, s.first_bundle, s.last_bundle) for s in summary.unconfirmed_submissions] == [(50, 1, 1)]
+
+        with pytest.raises(ValueError, match="Remove it to start a new job"):
+            job_state.add_bundles([[0, 1, 2]])
+
+
+@pytest.mark.asyncio
+async def test_submit_records_and_resumes_from_job_state(tmp_path: Path) -> None:
+    chain = FakeChain([10**12, 10**12], block_time=0.02)
+    minter = make_minter(chain)
+    bundle_path, _ = await create_bundles(minter, tmp_path, 100)
+
+    with BundleFile(bundle_path) as spends, JobState(job_state_path(bundle_path)) as job_state:
+        # the first bundle was pushed and confirmed, but the run stopped before recording it
+        await minter.submit_spend_bundles(spends[:1], chains=[[0]], fee=10, block_share=0)
+        job_state.add_bundles(spends.chains())
+        job_state.record_submitted([0], spends[0].name(), 10)
+
+        await minter.submit_spend_bundles(spends, chains=spends.chains(), fee=10, block_share=0, job_state=job_state)
+        summary = job_state.summary()
+        assert summary.bundle_counts == {"pending": 0, "submitted": 0, "confirmed": 4}
+        assert summary.fee_paid == 40
+        assert summary.last_confirmed_height is not None
+        assert summary.unconfirmed_submissions == []
+
+        # resuming a finished job is answered from the job state without looking anything up on chain
+        chain.calls.clear()
+        with pytest.raises(ValueError, match="All spend bundles have been spent"):
+            await minter.submit_spend_bundles(spends, chains=spends.chains(), fee=10, job_state=job_state)
+        assert chain.calls["get_coin_records_by_names"] == 0
+
+
+@pytest.mark.asyncio
+async def test_new_job_state_resumes_from_chain(tmp_path: Path) -> None:
+    chain = FakeChain([10**12, 10**12], block_time=0.02)
+    minter = make_minter(chain)
+    bundle_path, _ = await create_bundles(minter, tmp_path, 100)
+
+    with BundleFile(bundle_path) as spends:
+        # partly submitted before the job state existed, or after it was removed
+        await minter.submit_spend_bundles(spends[:2], chains=[[0, 1]], fee=10, block_share=0)
+        chain.calls.clear()
+        with JobState(job_state_path(bundle_path)) as job_state:
+            await minter.submit_spend_bundles(
+                spends, chains=spends.chains(), fee=10, block_share=0, job_state=job_state
+            )
+            assert job_state.summary().bundle_counts == {"pending": 0, "submitted": 0, "confirmed": 4}
+        # only the two bundles that hadn't been submitted were pushed
+        assert chain.calls["push_tx"] == 2
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from secrets import token_bytes
+
+import pytest
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.program import Program
+from chia.types.coin_spend import make_spend
+from chia_rs import G2Element, SpendBundle
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint64
+
+from chianft.util.bundle_store import BundleFile
+from chianft.util.lanes import split_into_lanes
+from tests.fake_rpc import FakeChain, create_bundles, make_minter
+
+PUZZLE = Program.to(1)
+
+
+def spend_creating(coin: Coin, amount: int) -> tuple[SpendBundle, Coin]:
+    # the identity puzzle returns its solution as conditions, so this spend creates a single CREATE_COIN
+    solution = Program.to([[51, PUZZLE.get_tree_hash(), amount]])
+    sb = SpendBundle([make_spend(coin, PUZZLE, solution)], G2Element())
+    return sb, Coin(coin.name(), PUZZLE.get_tree_hash(), uint64(amount))
+
+
+def test_split_into_lanes() -> None:
+    coin_a = Coin(bytes32(token_bytes(32)), PUZZLE.get_tree_hash(), uint64(100))
+    coin_b = Coin(bytes32(token_bytes(32)), PUZZLE.get_tree_hash(), uint64(100))
+    sb_a0, coin_a = spend_creating(coin_a, 99)
+    sb_b0, coin_b = spend_creating(coin_b, 99)
+    sb_a1, coin_a = spend_creating(coin_a, 98)
+    sb_a2, _ = spend_creating(coin_a, 97)
+    sb_b1, _ = spend_creating(coin_b, 98)
+
+    assert split_into_lanes([sb_a0, sb_b0, sb_a1, sb_a2, sb_b1]) == [[0, 2, 3], [1, 4]]
+
+
+def test_split_into_lanes_single_chain() -> None:
+    coin = Coin(bytes32(token_bytes(32)), PUZZLE.get_tree_hash(), uint64(100))
+    bundles = []
+    for amount in range(99, 95, -1):
+        sb, coin = spend_creating(coin, amount)
+        bundles.append(sb)
+
+    assert split_into_lanes(bundles) == [[0, 1, 2, 3]]
+
+
+@pytest.mark.asyncio
+async def test_lanes_funded_by_split(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # a single coin, so the lane coins are split from it
+    chain = FakeChain([10**12], block_time=0.02)
+    minter = make_minter(chain)
+    monkeypatch.setattr(minter.metrics, "sleep", lambda reason, seconds: asyncio.sleep(0.01))
+    bundle_path, bundle_count = await create_bundles(minter, tmp_path, 100, lanes=2)
+
+    assert bundle_count == 4
+    with BundleFile(bundle_path) as spends:
+        assert spends.chains() == [[0, 1], [2, 3]]
+        await minter.submit_spend_bundles(spends, fee=10, lanes=2, chains=spends.chains(), block_share=0)
+    assert chain.mempool_bundles == {}
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from secrets import token_bytes
+from typing import Any
+
+import pytest
+from chia_rs.sized_bytes import bytes32
+
+from chianft.util.mempool import MempoolSnapshot, MempoolView
+
+
+def make_item(cost: int, fee: int) -> tuple[bytes32, dict[str, Any], bytes32, bytes32]:
+    tx_id = bytes32(token_bytes(32))
+    sb_name = bytes32(token_bytes(32))
+    parent_id = bytes32(token_bytes(32))
+    item = {
+        "spend_bundle_name": "0x" + sb_name.hex(),
+        "cost": cost,
+        "fee": fee,
+        "additions": [{"parent_coin_info": "0x" + parent_id.hex(), "puzzle_hash": "0x" + "00" * 32, "amount": 1}],
+        "spend_bundle": {},
+    }
+    return tx_id, item, sb_name, parent_id
+
+
+class FakeNodeClient:
+    def __init__(self, items: dict[bytes32, dict[str, Any]]) -> None:
+        self.items = items
+        self.calls = 0
+
+    async def get_all_mempool_items(self) -> dict[bytes32, dict[str, Any]]:
+        self.calls += 1
+        return self.items
+
+
+def test_snapshot_indexes() -> None:
+    tx_a, item_a, sb_a, _ = make_item(cost=100, fee=1000)
+    tx_b, item_b, _, parent_b = make_item(cost=200, fee=400)
+    snapshot = MempoolSnapshot.from_items({tx_a: item_a, tx_b: item_b})
+
+    assert snapshot.total_cost == 300
+    assert snapshot.total_fee == 1400
+    assert snapshot.min_fee_per_cost == 2
+    assert snapshot.item_for_sb_name(sb_a) == (tx_a, item_a)
+    assert snapshot.item_spending_coin(parent_b) is item_b
+    assert snapshot.item_for_sb_name(bytes32(token_bytes(32))) is None
+
+
+def test_empty_snapshot() -> None:
+    snapshot = MempoolSnapshot.from_items({})
+    assert snapshot.total_cost == 0
+    assert snapshot.min_fee_per_cost is None
+
+
+@pytest.mark.asyncio
+async def test_view_shares_fetch_until_invalidated() -> None:
+    tx_id, item, _, _ = make_item(cost=1, fee=1)
+    node_client = FakeNodeClient({tx_id: item})
+    view = MempoolView(node_client, ttl=60)  # type: ignore[arg-type]
+
+    first = await view.snapshot()
+    second = await view.snapshot()
+    assert first is second
+    assert node_client.calls == 1
+
+    view.invalidate()
+    await view.snapshot()
+    assert node_client.calls == 2
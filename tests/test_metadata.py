@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+from chianft.util.metadata import count_metadata_rows, iter_metadata_rows
+
+
+def write_csv(path: Path, row_count: int) -> Path:
+    header = [
+        "hash",
+        "uris",
+        "meta_hash",
+        "meta_uris",
+        "license_hash",
+        "license_uris",
+        "edition_number",
+        "edition_total",
+        "target",
+    ]
+    rows = [
+        [f"{i:064x}", f"https://a/{i}", "00" * 32, "https://m", "11" * 32, "https://l", 1, 1, f"xch{i}"]
+        for i in range(row_count)
+    ]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerows([header, *rows])
+    return path
+
+
+def test_count_metadata_rows(tmp_path: Path) -> None:
+    path = write_csv(tmp_path / "metadata.csv", 7)
+    assert count_metadata_rows(path, has_header=True) == 7
+    assert count_metadata_rows(path, has_header=False) == 8
+
+
+def test_iter_metadata_rows(tmp_path: Path) -> None:
+    path = write_csv(tmp_path / "metadata.csv", 3)
+    rows = list(iter_metadata_rows(path, has_header=True))
+    assert len(rows) == 3
+    metadata, target = rows[0]
+    assert metadata["uris"] == ["https://a/0"]
+    assert metadata["edition_number"] == "1"
+    assert target == "xch0"
+
+
+def test_iter_metadata_rows_range(tmp_path: Path) -> None:
+    path = write_csv(tmp_path / "metadata.csv", 10)
+    rows = iter_metadata_rows(path, has_header=True, start=4, stop=9)
+    assert [target for _, target in rows] == ["xch4", "xch5", "xch6", "xch7", "xch8"]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from chianft.util.metrics import Metrics, instrument_client
+
+
+class FakeRpcClient:
+    async def fetch(self, path: str, request_json: dict[str, Any]) -> dict[str, Any]:
+        if path == "push_tx":
+            raise ValueError({"success": False, "error": "DOUBLE_SPEND"})
+        return {"success": True, "echo": request_json}
+
+
+@pytest.mark.asyncio
+async def test_metrics(tmp_path: Path) -> None:
+    metrics = Metrics()
+    client = FakeRpcClient()
+    instrument_client(client, metrics)  # type: ignore[arg-type]
+
+    for _ in range(3):
+        await client.fetch("get_blockchain_state", {})
+    with pytest.raises(ValueError):
+        await client.fetch("push_tx", {"spend_bundle": "00"})
+    await metrics.sleep("confirmation_poll", 0.01)
+
+    metrics.write(tmp_path / "metrics")
+    with open(tmp_path / "metrics.json") as f:
+        summary = json.load(f)
+    assert summary["rpc"]["get_blockchain_state"]["calls"] == 3
+    assert summary["rpc"]["get_blockchain_state"]["response_bytes"] == 3 * len('{"success": true, "echo": {}}')
+    assert summary["rpc"]["push_tx"]["errors"] == 1
+    assert summary["rpc"]["push_tx"]["request_bytes"] == len('{"spend_bundle": "00"}')
+    assert summary["sleeps"]["confirmation_poll"]["count"] == 1
+    assert summary["sleeps"]["confirmation_poll"]["seconds"] >= 0.01
+
+    prometheus = (tmp_path / "metrics.prom").read_text().splitlines()
+    assert 'chianft_rpc_calls_total{method="get_blockchain_state"} 3' in prometheus
+    assert 'chianft_rpc_latency_seconds_bucket{method="get_blockchain_state",le="+Inf"} 3' in prometheus
+    assert 'chianft_sleeps_total{reason="confirmation_poll"} 1' in prometheus
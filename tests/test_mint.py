@@ -55,7 +55,7 @@ def test_mint_from_did(has_targets: bool) -> None:
     runner = CliRunner()
     with runner.isolated_filesystem():
         input_file = create_metadata("metadata.csv", mint_total, has_targets)
-        output_file = "output.pkl"
+        output_file = "output.bundles"
         sb_result: Result = runner.invoke(
             cli,
             [
@@ -92,7 +92,7 @@ def test_mint_from_xch(has_targets: bool) -> None:
     runner = CliRunner()
     with runner.isolated_filesystem():
         input_file = create_metadata("metadata.csv", mint_total, has_targets)
-        output_file = "output.pkl"
+        output_file = "output.bundles"
         sb_result: Result = runner.invoke(
             cli,
             [
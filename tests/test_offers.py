@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from chia_rs.sized_ints import uint32
+
+from chianft.util.offers import OfferWorker
+
+
+class FakeWalletClient:
+    def __init__(self, broken_ids: frozenset[str] = frozenset()) -> None:
+        self.active = 0
+        self.max_active = 0
+        self.broken_ids = broken_ids
+
+    async def create_offer_for_ids(self, request: Any, tx_config: Any) -> SimpleNamespace:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        launcher_id = next(key for key, value in request.offer.items() if value == "-1")
+        if launcher_id in self.broken_ids:
+            raise ConnectionError("wallet went away")
+        return SimpleNamespace(offer=SimpleNamespace(to_bech32=lambda: f"offer1{launcher_id}"))
+
+
+@pytest.mark.asyncio
+async def test_offer_worker(tmp_path: Path) -> None:
+    wallet_client = FakeWalletClient()
+    launcher_ids = [f"{i:064x}" for i in range(30)]
+    worker = OfferWorker(wallet_client, uint32(1), 1000, concurrency=3, offers_dir=tmp_path)  # type: ignore[arg-type]
+    worker.start()
+    worker.submit(launcher_ids[:10])
+    worker.submit(launcher_ids[10:])
+    await worker.close()
+
+    assert wallet_client.max_active == 3
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f"{launcher_id}.offer" for launcher_id in launcher_ids]
+    assert (tmp_path / f"{launcher_ids[0]}.offer").read_text() == f"offer1{launcher_ids[0]}"
+
+
+@pytest.mark.asyncio
+async def test_offer_worker_survives_failures(tmp_path: Path) -> None:
+    launcher_ids = [f"{i:064x}" for i in range(6)]
+    # more failures than workers, so close would wait forever if a failure ended a worker
+    wallet_client = FakeWalletClient(broken_ids=frozenset(launcher_ids[:3]))
+    worker = OfferWorker(wallet_client, uint32(1), 1000, concurrency=2, offers_dir=tmp_path)  # type: ignore[arg-type]
+    worker.start()
+    worker.submit(launcher_ids)
+    await asyncio.wait_for(worker.close(), timeout=5)
+
+    assert sorted(worker.failed) == launcher_ids[:3]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        f"{launcher_id}.offer" for launcher_id in launcher_ids[3:]
+    ]
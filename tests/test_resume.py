@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from secrets import token_bytes
+
+import pytest
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.program import Program
+from chia.types.coin_spend import make_spend
+from chia_rs import CoinRecord, G2Element, SpendBundle
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint32, uint64
+
+from chianft.util.mint import Minter
+
+PUZZLE = Program.to(1)
+
+
+class FakeNodeClient:
+    def __init__(self, records: dict[bytes32, CoinRecord]) -> None:
+        self.records = records
+        self.calls = 0
+
+    async def get_coin_records_by_names(
+        self, names: list[bytes32], include_spent_coins: bool = True
+    ) -> list[CoinRecord]:
+        self.calls += 1
+        return [self.records[name] for name in names if name in self.records]
+
+
+def make_chain(length: int) -> tuple[list[SpendBundle], list[Coin]]:
+    coin = Coin(bytes32(token_bytes(32)), PUZZLE.get_tree_hash(), uint64(1000))
+    bundles = []
+    funding_coins = []
+    for _ in range(length):
+        next_coin = Coin(coin.name(), PUZZLE.get_tree_hash(), uint64(coin.amount - 1))
+        solution = Program.to([[51, PUZZLE.get_tree_hash(), next_coin.amount]])
+        bundles.append(SpendBundle([make_spend(coin, PUZZLE, solution)], G2Element()))
+        funding_coins.append(coin)
+        coin = next_coin
+    return bundles, funding_coins
+
+
+def node_with_progress(funding_coins: list[Coin], spent: int) -> FakeNodeClient:
+    records = {}
+    for i, coin in enumerate(funding_coins[: spent + 1]):
+        spent_index = uint32(i + 2) if i < spent else uint32(0)
+        records[coin.name()] = CoinRecord(coin, uint32(i + 1), spent_index, False, uint64(0))
+    return FakeNodeClient(records)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("spent", [0, 1, 37, 99])
+async def test_get_unspent_spend_bundle(spent: int) -> None:
+    bundles, funding_coins = make_chain(100)
+    node_client = node_with_progress(funding_coins, spent)
+    minter = Minter(None, node_client)  # type: ignore[arg-type]
+
+    coin, index = await minter.get_unspent_spend_bundle(bundles)
+    assert index == spent
+    assert coin == funding_coins[spent]
+    assert node_client.calls <= 7
+
+
+@pytest.mark.asyncio
+async def test_get_unspent_spend_bundle_all_spent() -> None:
+    bundles, funding_coins = make_chain(10)
+    node_client = node_with_progress(funding_coins, 10)
+    minter = Minter(None, node_client)  # type: ignore[arg-type]
+
+    with pytest.raises(ValueError, match="All spend bundles have been spent"):
+        await minter.get_unspent_spend_bundle(bundles)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from chianft.util.bundle_store import BundleFile
+from chianft.util.cost import FEE_SPEND_COST, MAX_SPEND_BUNDLE_COST, bundle_file_costs
+from chianft.util.scheduler import BlockFillScheduler
+from tests.fake_rpc import NFT_PUZZLE_HASH, FakeChain, create_bundles, make_minter
+from tests.test_fees import make_snapshot
+
+
+def test_budget() -> None:
+    scheduler = BlockFillScheduler(0.5, lanes=2, block_cost=1000)
+    assert scheduler.budget(make_snapshot([])) == 250
+    # limited by the room left in the next block
+    assert scheduler.budget(make_snapshot([(900, 0)])) == 100
+    # never more than the mempool accepts in one spend bundle, with room left for the fee spend
+    assert BlockFillScheduler(1).budget(make_snapshot([])) == MAX_SPEND_BUNDLE_COST - FEE_SPEND_COST
+
+
+def test_take() -> None:
+    scheduler = BlockFillScheduler()
+    costs = [100, 100, 100, 100]
+    assert scheduler.take(costs, 250) == 2
+    assert scheduler.take(costs, 250, start=3) == 1
+    assert scheduler.take(costs, 1000, start=1) == 3
+    # a full mempool still submits one bundle at a time
+    assert scheduler.take(costs, -50) == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_aggregates_chain(tmp_path: Path) -> None:
+    chain = FakeChain([10**12, 10**12], block_time=0.02)
+    minter = make_minter(chain)
+    bundle_path, bundle_count = await create_bundles(minter, tmp_path, 500)
+    assert bundle_count == 20
+
+    with BundleFile(bundle_path) as spends:
+        costs = bundle_file_costs(spends)
+        # room for 5 bundles of 25 NFTs in each submission
+        block_share = 5.5 * costs[0] / chain.block_cost
+        chain.calls.clear()
+        await minter.submit_spend_bundles(spends, chains=spends.chains(), costs=costs, block_share=block_share, fee=10)
+
+    assert chain.mempool_bundles == {}
+    assert chain.calls["push_tx"] == 4
+    assert sum(1 for record in chain.coin_records.values() if record.coin.puzzle_hash == NFT_PUZZLE_HASH) == 500
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from chia_rs.sized_ints import uint32
+
+from chianft.util.bundle_store import BundleFile
+from chianft.util.checkpoint import CreationCheckpoint, checkpoint_path
+from chianft.util.lanes import bundle_funding_coin
+from chianft.util.mint import Minter
+from chianft.util.tracker import launched_nft_ids
+from tests.fake_rpc import FakeChain, FakeNodeClient, FakeWalletClient, wallet_puzzle, write_metadata
+
+
+@pytest.mark.asyncio
+async def test_create_across_wallet_shards(tmp_path: Path) -> None:
+    chain = FakeChain([10**12], block_time=0.02)
+    for wallet_index in [1, 2]:
+        chain.add_coin(10**12, wallet_puzzle(wallet_index).get_tree_hash())
+    wallets = [FakeWalletClient(chain, wallet_index) for wallet_index in range(3)]
+    minter = Minter(wallets[0], FakeNodeClient(chain), wallet_cache_dir=None)  # type: ignore[arg-type]
+    metadata_path = tmp_path / "metadata.csv"
+    bundle_path = tmp_path / "output.bundles"
+    write_metadata(metadata_path, 300)
+
+    bundle_count = await minter.create_spend_bundles(
+        metadata_path,
+        bundle_path,
+        uint32(2),
+        has_targets=False,
+        wallet_shards=wallets[1:],  # type: ignore[arg-type]
+    )
+
+    assert bundle_count == 12
+    # every wallet minted its own contiguous share of the rows, numbered across the whole collection
+    assert [wallet.mints for wallet in wallets] == [
+        [(1, 25), (26, 25), (51, 25), (76, 25)],
+        [(101, 25), (126, 25), (151, 25), (176, 25)],
+        [(201, 25), (226, 25), (251, 25), (276, 25)],
+    ]
+    with BundleFile(bundle_path) as spends:
+        assert spends.chains() == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11]]
+        assert [len(launched_nft_ids(sb)) for sb in spends] == [25] * 12
+        # each chain is funded by a coin of the wallet that created it
+        funding_puzzle_hashes = [
+            bundle_funding_coin(spends[chain_bundles[0]]).puzzle_hash for chain_bundles in spends.chains()
+        ]
+    assert funding_puzzle_hashes == [wallet.puzzle_hash for wallet in wallets]
+
+
+@pytest.mark.asyncio
+async def test_wallet_shards_are_checked(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    chain = FakeChain([10**12], block_time=0.02)
+    for wallet_index in [1, 2]:
+        chain.add_coin(10**12, wallet_puzzle(wallet_index).get_tree_hash())
+    wallets = [FakeWalletClient(chain, wallet_index) for wallet_index in range(3)]
+    minter = Minter(wallets[0], FakeNodeClient(chain), wallet_cache_dir=None)  # type: ignore[arg-type]
+    metadata_path = tmp_path / "metadata.csv"
+    bundle_path = tmp_path / "output.bundles"
+    write_metadata(metadata_path, 300)
+
+    # the last wallet's NFT wallet has another id
+    wallets[2].nft_wallet_id = uint32(3)
+    with pytest.raises(ValueError, match="on port 9258 has no NFT wallet without a DID with id 2"):
+        await minter.create_spend_bundles(
+            metadata_path,
+            bundle_path,
+            uint32(2),
+            has_targets=False,
+            wallet_shards=wallets[1:],  # type: ignore[arg-type]
+        )
+    assert [wallet.mints for wallet in wallets] == [[], [], []]
+    assert chain.calls["select_coins"] == 0
+
+    # the checkpoint of a run is kept, as if it was interrupted after its last chunk
+    wallets[2].nft_wallet_id = uint32(2)
+    monkeypatch.setattr(CreationCheckpoint, "remove", lambda self: None)
+    await minter.create_spend_bundles(
+        metadata_path,
+        bundle_path,
+        uint32(2),
+        has_targets=False,
+        wallet_shards=wallets[1:],  # type: ignore[arg-type]
+    )
+    assert checkpoint_path(bundle_path).exists()
+    # the same wallets in another order would mint the rows of one wallet's lanes from another's coins
+    with pytest.raises(ValueError, match="different inputs or options"):
+        await minter.create_spend_bundles(
+            metadata_path,
+            bundle_path,
+            uint32(2),
+            has_targets=False,
+            wallet_shards=wallets[:0:-1],  # type: ignore[arg-type]
+        )
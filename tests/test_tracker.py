@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+from secrets import token_bytes
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.program import Program
+from chia.types.coin_spend import make_spend
+from chia_rs import CoinRecord, G2Element, SpendBundle
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint32, uint64
+
+from chianft.util.mempool import MempoolView
+from chianft.util.tracker import ConfirmationTracker, launched_nft_ids
+
+PUZZLE = Program.to(1)
+
+
+def launcher_bundle() -> tuple[SpendBundle, Coin]:
+    launcher = Coin(bytes32(token_bytes(32)), PUZZLE.get_tree_hash(), uint64(0))
+    solution = Program.to([[51, PUZZLE.get_tree_hash(), 1]])
+    nft = Coin(launcher.name(), PUZZLE.get_tree_hash(), uint64(1))
+    return SpendBundle([make_spend(launcher, PUZZLE, solution)], G2Element()), nft
+
+
+class FakeNodeClient:
+    """
+    Replays one (mempool bundle names, confirmed coins) state per block height.
+    """
+
+    def __init__(self, states: list[tuple[list[bytes32], list[Coin]]]) -> None:
+        self.states = states
+        self.height = 0
+        self.coin_record_calls = 0
+
+    async def get_blockchain_state(self) -> dict[str, Any]:
+        self.height = min(self.height + 1, len(self.states) - 1)
+        return {"peak": SimpleNamespace(height=self.height)}
+
+    async def get_all_mempool_items(self) -> dict[bytes32, dict[str, Any]]:
+        return {
+            bytes32(token_bytes(32)): {"spend_bundle_name": name.hex(), "cost": 1, "fee": 0, "additions": []}
+            for name in self.states[self.height][0]
+        }
+
+    async def get_coin_records_by_names(
+        self, names: list[bytes32], include_spent_coins: bool = True
+    ) -> list[CoinRecord]:
+        self.coin_record_calls += 1
+        confirmed = {coin.name(): coin for coin in self.states[self.height][1]}
+        return [
+            CoinRecord(confirmed[name], uint32(self.height), uint32(0), False, uint64(0))
+            for name in names
+            if name in confirmed
+        ]
+
+
+class BlockAfterCoinLookupNodeClient(FakeNodeClient):
+    """
+    Farms a block right after every coin record lookup, before anything else is asked.
+    """
+
+    async def get_blockchain_state(self) -> dict[str, Any]:
+        return {"peak": SimpleNamespace(height=self.height)}
+
+    async def get_coin_records_by_names(
+        self, names: list[bytes32], include_spent_coins: bool = True
+    ) -> list[CoinRecord]:
+        records = await super().get_coin_records_by_names(names, include_spent_coins)
+        self.height = min(self.height + 1, len(self.states) - 1)
+        return records
+
+
+def make_tracker(node_client: FakeNodeClient) -> ConfirmationTracker:
+    mempool = MempoolView(node_client, ttl=0)  # type: ignore[arg-type]
+    return ConfirmationTracker(node_client, mempool, poll_interval=0)  # type: ignore[arg-type]
+
+
+def test_launched_nft_ids() -> None:
+    sb, nft = launcher_bundle()
+    assert launched_nft_ids(sb) == [nft.name()]
+
+
+@pytest.mark.asyncio
+async def test_confirms_bundles_together() -> None:
+    sb_a, nft_a = launcher_bundle()
+    sb_b, nft_b = launcher_bundle()
+    node_client = FakeNodeClient(
+        [
+            ([], []),
+            ([sb_a.name(), sb_b.name()], []),
+            ([sb_b.name()], [nft_a]),
+            ([], [nft_a, nft_b]),
+        ]
+    )
+    tracker = make_tracker(node_client)
+
+    assert list(await asyncio.gather(tracker.wait_for_height(sb_a), tracker.wait_for_height(sb_b))) == [2, 3]
+    # one batched lookup per block, shared by both bundles
+    assert node_client.coin_record_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_reports_dropped_bundle() -> None:
+    sb, _ = launcher_bundle()
+    node_client = FakeNodeClient([([], []), ([sb.name()], []), ([], [])])
+    tracker = make_tracker(node_client)
+
+    assert await tracker.wait_for_height(sb) is None
+
+
+@pytest.mark.asyncio
+async def test_bundle_confirming_between_lookups_is_not_dropped() -> None:
+    sb, nft = launcher_bundle()
+    node_client = BlockAfterCoinLookupNodeClient([([sb.name()], []), ([sb.name()], []), ([], [nft])])
+    tracker = make_tracker(node_client)
+
+    assert await tracker.wait_for_height(sb) == 2
+
+
+@pytest.mark.asyncio
+async def test_gives_up_on_bundle_waiting_in_mempool() -> None:
+    sb, nft = launcher_bundle()
+    node_client = FakeNodeClient([([], [])] + [([sb.name()], [])] * 5 + [([], [nft])])
+    tracker = make_tracker(node_client)
+
+    with pytest.raises(asyncio.TimeoutError, match="within 3 blocks"):
+        await tracker.wait_for_height(sb, max_blocks=3)
+    assert tracker.in_flight == {}
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import pytest
+from chia.util.bech32m import decode_puzzle_hash, encode_puzzle_hash
+from chia_rs.sized_bytes import bytes32
+
+from chianft.util.metadata import DEFAULT_HEADER
+from chianft.util.validation import target_error, validate_metadata_csv
+
+ADDRESS = encode_puzzle_hash(bytes32(b"\x01" * 32), "txch")
+
+
+def valid_row(i: int) -> list[str]:
+    data_hash = i.to_bytes(32, "big").hex()
+    return [
+        data_hash,
+        f"https://example.com/{i}.png",
+        data_hash,
+        f"ipfs://bafy{i}/metadata.json",
+        data_hash,
+        "https://example.com/license",
+        str(i + 1),
+        "1000",
+        ADDRESS,
+    ]
+
+
+def write_rows(path: Path, rows: list[list[str]], header: list[str] | None = None) -> Path:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header or [*DEFAULT_HEADER, "target"])
+        writer.writerows(rows)
+    return path
+
+
+@pytest.mark.parametrize(
+    "address",
+    [
+        ADDRESS,
+        ADDRESS.upper(),
+        f" {ADDRESS} ",
+        ADDRESS[:-1] + ("q" if ADDRESS[-1] != "q" else "p"),
+        ADDRESS[:10] + ADDRESS[10].upper() + ADDRESS[11:],
+        ADDRESS[:-2],
+        ADDRESS.replace("txch1", "txch1b"),
+        "xch",
+        "",
+    ],
+)
+def test_target_error_matches_decode_puzzle_hash(address: str) -> None:
+    try:
+        decode_puzzle_hash(address)
+        decodes = True
+    except ValueError:
+        decodes = False
+    assert (target_error(address) is None) == decodes
+
+
+def test_valid_file(tmp_path: Path) -> None:
+    path = write_rows(tmp_path / "metadata.csv", [valid_row(i) for i in range(100)])
+    assert validate_metadata_csv(path, has_header=True, has_targets=True) == []
+
+
+def test_optional_uris_may_be_empty(tmp_path: Path) -> None:
+    rows = [valid_row(i) for i in range(3)]
+    rows[0][3] = ""
+    rows[1][5] = ""
+    rows[2][1] = ""
+    path = write_rows(tmp_path / "metadata.csv", rows)
+
+    errors = validate_metadata_csv(path, has_header=True, has_targets=True)
+    assert [(error.row, error.column) for error in errors] == [(4, "uris")]
+
+
+def test_reports_every_error_with_row_numbers(tmp_path: Path) -> None:
+    rows = [valid_row(i) for i in range(10)]
+    rows[1][0] = "abcd"
+    rows[3][3] = "not a uri"
+    rows[4][6] = "one"
+    rows[5][6] = "1001"
+    rows[6][8] = ADDRESS[:-1] + ("q" if ADDRESS[-1] != "q" else "p")
+    rows[7] = rows[7][:5]
+    rows[8][2] = ""
+    rows[8][7] = "0"
+    path = write_rows(tmp_path / "metadata.csv", rows)
+
+    errors = validate_metadata_csv(path, has_header=True, has_targets=True)
+    # the header is row 1, so the first data row is row 2
+    assert [(error.row, error.column) for error in errors] == [
+        (3, "hash"),
+        (5, "meta_uris"),
+        (6, "edition_number"),
+        (7, "edition_number"),
+        (8, "target"),
+        (9, "row"),
+        (10, "meta_hash"),
+        (10, "edition_total"),
+    ]
+    assert str(errors[0]) == "Row 3, hash: 'abcd' is not 32 bytes of hex"
+
+
+def test_missing_columns(tmp_path: Path) -> None:
+    path = write_rows(tmp_path / "metadata.csv", [valid_row(0)[:-1]], header=DEFAULT_HEADER)
+    errors = validate_metadata_csv(path, has_header=True, has_targets=True)
+    assert [(error.row, error.column, error.message) for error in errors] == [(1, "target", "column is missing")]
+
+
+def test_process_pool_keeps_row_order(tmp_path: Path) -> None:
+    rows = [valid_row(i) for i in range(1000)]
+    for i in range(0, 1000, 97):
+        rows[i][0] = "zz"
+    path = write_rows(tmp_path / "metadata.csv", rows)
+    errors = validate_metadata_csv(path, has_header=True, has_targets=True, max_workers=2, batch_rows=64)
+    assert [error.row for error in errors] == [i + 2 for i in range(0, 1000, 97)]
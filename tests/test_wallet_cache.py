@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from chia.wallet.util.wallet_types import WalletType
+from chia_rs.sized_bytes import bytes32
+from chia_rs.sized_ints import uint32
+
+from chianft.util.wallet_cache import get_wallet_map
+
+
+class FakeWalletClient:
+    def __init__(self) -> None:
+        self.wallets = [
+            (1, WalletType.STANDARD_WALLET),
+            (2, WalletType.DECENTRALIZED_ID),
+            (3, WalletType.NFT),
+            (4, WalletType.NFT),
+        ]
+        self.calls: Counter[str] = Counter()
+
+    async def get_wallets(self, request: Any) -> SimpleNamespace:
+        self.calls["get_wallets"] += 1
+        wallets = [SimpleNamespace(id=uint32(wallet_id), type=wallet_type) for wallet_id, wallet_type in self.wallets]
+        return SimpleNamespace(wallets=wallets, fingerprint=uint32(1234))
+
+    async def get_nft_wallet_did(self, request: Any) -> SimpleNamespace:
+        self.calls["get_nft_wallet_did"] += 1
+        return SimpleNamespace(did_id="did:chia:1abc" if request.wallet_id == 3 else None)
+
+    async def get_did_id(self, request: Any) -> SimpleNamespace:
+        self.calls["get_did_id"] += 1
+        return SimpleNamespace(my_did="did:chia:1abc", coin_id=bytes32(b"\x01" * 32))
+
+
+@pytest.mark.asyncio
+async def test_wallet_map_cache(tmp_path: Path) -> None:
+    wallet_client = FakeWalletClient()
+    wallet_map = await get_wallet_map(wallet_client, tmp_path)  # type: ignore[arg-type]
+    assert wallet_map.xch_wallet_id == 1
+    assert [(wallet.wallet_id, wallet.did_id) for wallet in wallet_map.nft_wallets] == [(3, "did:chia:1abc"), (4, None)]
+    assert [(wallet.wallet_id, wallet.my_did) for wallet in wallet_map.did_wallets] == [(2, "did:chia:1abc")]
+    assert wallet_client.calls == {"get_wallets": 1, "get_nft_wallet_did": 2, "get_did_id": 1}
+
+    # an unchanged wallet is served from the cache with a single call
+    wallet_client.calls.clear()
+    assert await get_wallet_map(wallet_client, tmp_path) == wallet_map  # type: ignore[arg-type]
+    assert wallet_client.calls == {"get_wallets": 1}
+
+    # a new wallet invalidates the cache
+    wallet_client.calls.clear()
+    wallet_client.wallets.append((5, WalletType.NFT))
+    wallet_map = await get_wallet_map(wallet_client, tmp_path)  # type: ignore[arg-type]
+    assert [wallet.wallet_id for wallet in wallet_map.nft_wallets] == [3, 4, 5]
+    assert wallet_client.calls == {"get_wallets": 1, "get_nft_wallet_did": 3, "get_did_id": 1}